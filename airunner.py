@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class AIRunner:
+    """Runs the AI providers in the background and in parallel, each bounded by a deadline."""
+
+    def __init__(self, providers, timeout=300, prepare=None, log=print):
+        """
+        :param providers: List of (name, callable) pairs; each callable takes a cancel Event and the prepared inputs.
+        :param timeout: Seconds each provider may run before it is cancelled.
+        :param prepare: Optional callable run once per run; its result is shared by every provider.
+        """
+        self.providers = providers
+        self.prepare = prepare
+        self.timeout = timeout
+        self.log = log
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, on_complete=None):
+        """Start a run unless one is already in progress. Returns immediately."""
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._supervise, args=(on_complete,), name="kibalert-ai", daemon=True)
+        self._thread.start()
+        return True
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _supervise(self, on_complete):
+        inputs = None
+        if self.prepare:
+            try:
+                inputs = self.prepare()
+            except Exception as e:
+                self.log(f"[-] AI input preparation failed: {e}")
+        started = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=max(len(self.providers), 1), thread_name_prefix="kibalert-ai")
+        runs, finished = [], {}
+        for name, func in self.providers:
+            cancel = threading.Event()
+            future = pool.submit(func, cancel, inputs)
+            future.add_done_callback(lambda _, name=name: finished.setdefault(name, time.monotonic() - started))
+            runs.append((name, cancel, future))
+
+        for name, cancel, future in runs:
+            remaining = max(self.timeout - (time.monotonic() - started), 0)
+            try:
+                future.result(timeout=remaining)
+                self.log(f"[+] AI provider {name} finished in {finished.get(name, time.monotonic() - started):.1f}s")
+            except TimeoutError:
+                # Providers check the event before publishing, so a late answer is discarded
+                cancel.set()
+                self.log(f"[-] AI provider {name} exceeded {self.timeout}s and was cancelled")
+            except Exception as e:
+                self.log(f"[-] AI provider {name} failed: {e}")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        if on_complete:
+            try:
+                on_complete()
+            except Exception as e:
+                self.log(f"[-] AI run completion failed: {e}")
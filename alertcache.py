@@ -0,0 +1,67 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class AlertCache:
+    """Remembers sent alert fingerprints so a persisting condition is only re-sent after its TTL."""
+
+    def __init__(self, path="alerts.db", ttl=3600, capacity=10000):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, sent_at REAL NOT NULL)")
+        self.prune()
+
+    @staticmethod
+    def fingerprint(entity, check, severity=''):
+        """Stable fingerprint of an alert condition."""
+        return hashlib.sha1(f"{check}|{entity}|{severity}".encode("utf-8")).hexdigest()
+
+    def _sent_at(self, fingerprint):
+        if fingerprint in self._lru:
+            self._lru.move_to_end(fingerprint)
+            return self._lru[fingerprint]
+        row = self._db.execute("SELECT sent_at FROM fingerprints WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, fingerprint, sent_at):
+        self._lru[fingerprint] = sent_at
+        self._lru.move_to_end(fingerprint)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+        self._db.execute("INSERT OR REPLACE INTO fingerprints (fingerprint, sent_at) VALUES (?, ?)", (fingerprint, sent_at))
+        self._db.commit()
+
+    def is_new(self, entity, check, severity=''):
+        """
+        Return True if this condition has not been notified within the TTL. Nothing is recorded.
+
+        :param entity: Host, service or URL the alert is about.
+        :param check: Name of the check raising it.
+        :param severity: Severity or status; a change yields a new fingerprint.
+        """
+        fingerprint = self.fingerprint(entity, check, severity)
+        with self._lock:
+            sent_at = self._sent_at(fingerprint)
+        return sent_at is None or time.time() - sent_at >= self.ttl
+
+    def record(self, entity, check, severity=''):
+        """Remember that this condition was just notified, starting its TTL."""
+        fingerprint = self.fingerprint(entity, check, severity)
+        with self._lock:
+            self._remember(fingerprint, time.time())
+
+    def prune(self):
+        """Drop fingerprints whose TTL has passed."""
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints WHERE sent_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -3,78 +3,126 @@ from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 import requests
 import json 
-from email.mime.base import MIMEBase
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from datetime import datetime
 from dotenv import load_dotenv
-from email import encoders
-from datetime import datetime, timedelta
+from esclient import shared_client
+from cursors import shared_store
+from mailer import build_message
+from logstore import RotatingLogStore
+from compaction import LogCompactor
 
 load_dotenv()
 
+# Checks run concurrently; direct appends to the shared log files go through this lock
+_write_lock = threading.Lock()
+
 class Base:
-    def __init__(self,kibana_url,api_key,slack_token,webhook_url,smtp_server,smtp_port,smtp_user,smtp_password,receiver,slack_channel, sleep_time,notify_limit, hits_size,log_file,save,verbose,user_log_file,latency_threshold,cpu_threshold,rule_id,SERVICE_RULE_IDS,ai_prompt,ai_model,ai_context,deep_seek_key, deep_seek_url,deep_seek_model,openai_model,openai_api_key,ai_run_schedules,last_run_file):
-        self.KIBANA_URL = kibana_url
-        self.API_KEY = api_key 
-        self.headers = {
-            "Authorization": f"ApiKey {api_key}",
-            "kbn-xsrf": "true",
-            "Content-Type": "application/json",
-        }
-        self.SLACK_CHANNEL = slack_channel 
-        self.SLEEP_TIME = sleep_time 
-        self.NOTIFY_LIMIT = notify_limit 
-        self.HOSTS_RULE_IDS = rule_id 
-        self.SERVICE_RULE_IDS = SERVICE_RULE_IDS 
-        self.KIBANA_RULE_URL = f"{kibana_url}/.alerts-*/_search"
-        self.LATENCY_THRESHOLD = latency_threshold 
-        self.CPU_THRESHOLD = cpu_threshold 
-        self.HITS_SIZE = hits_size 
-        self.APP_LOG_FILE= log_file 
-        self.USER_LOG_FILE = user_log_file
-        self.SAVE = save 
-        self.VERBOSE = verbose 
-        # Slack variables
-        self.SLACK_TOKEN = slack_token
-        self.client = WebClient(token=self.SLACK_TOKEN)
-        self.WEBHOOK_URL = webhook_url
-        # SMTP variables
-        self.SMTP_SERVER = smtp_server 
-        self.SMTP_PORT = smtp_port 
-        self.SMTP_USER = smtp_user 
-        self.SMTP_PASSWORD = smtp_password 
-        self.EMAIL_RECEIVERS = receiver
-        # AI variables
-        self.AI_PROMPT =  ai_prompt or ''
-        self.MODEL_NAME = ai_model
-        self.AI_CONTEXT = ai_context 
-        
-        # Deepseek variables
-        self.DEEPSEEK_API_KEY = deep_seek_key or None
-        self.DEEPSEEK_API_URL = deep_seek_url or None
-        self.DEEPSEEK_API_MODEL = deep_seek_model or  'deepseek-model'
-
-        # OpenAI variables
-        self.GPT_MODEL_NAME = openai_model or 'gpt-3.5-turbo'
-        self.GPT_API_KEY = openai_api_key or None
-        
-        #  For cleanup
-        self.GENERATED_FILES = []
-        
-        self.AI_SCHEDULED_RUN_TIMES= ai_run_schedules
-        self.LAST_RUN_FILE= last_run_file
+    def __init__(self, settings, slack_client=None, es_client=None, cursor_store=None, dispatcher=None, smtp_session=None, mail_digest=None, alert_cache=None, report_cache=None, log_writer=None, log_store=None, generated_files=None):
+        """
+        :param settings: Shared Settings; every field becomes an upper-case attribute.
+        The remaining arguments are the long-lived services shared by every component.
+        """
+        self.settings = settings
+        for name, value in settings.attributes():
+            setattr(self, name, value)
+        self.KIBANA_RULE_URL = f"{settings.kibana_url}/.alerts-*/_search"
+        self.KIBANA_RULE_MSEARCH_URL = f"{settings.kibana_url}/.alerts-*/_msearch"
+        # Pooled Elasticsearch client shared by every fetcher in the process
+        self.es = es_client or shared_client(
+            settings.api_key,
+            connect_timeout=settings.es_connect_timeout,
+            read_timeout=settings.es_read_timeout,
+            retries=settings.es_retries,
+            backoff=settings.es_backoff,
+            compress=settings.es_compress,
+        )
+        # Per-check high-water marks, shared by every check in the process
+        self.cursors = cursor_store or shared_store(settings.cursor_file, max_lookback=settings.cursor_max_lookback, ingest_delay=settings.cursor_ingest_delay)
+        # Fingerprints of alerts already sent; every condition is re-sent when absent
+        self.alert_cache = alert_cache
+        # Previously generated AI reports; every analysis goes to the provider when absent
+        self.report_cache = report_cache
+        # Buffered background writer for both log files; writes directly when absent
+        self.log_writer = log_writer
+        # Size- and age-bounded rotation for the log files
+        self.log_store = log_store
+        self.client = slack_client or WebClient(token=settings.slack_token)
+        # Background sender for brief notifications; sends synchronously when absent
+        self.dispatcher = dispatcher
+        # Shared SMTP connection and, in digest mode, the cycle's pending emails
+        self.smtp_session = smtp_session
+        self.mail_digest = mail_digest
+        #  For cleanup, shared between components when a list is passed in
+        self.GENERATED_FILES = generated_files if generated_files is not None else []
+
+    @staticmethod
+    def time_range(window):
+        """Build an @timestamp range filter for a (gte, lt) epoch-millisecond cursor window."""
+        return {"range": {"@timestamp": {"gte": window[0], "lt": window[1], "format": "epoch_millis"}}}
+
+    @staticmethod
+    def epoch(timestamp):
+        """Epoch seconds of an ISO-8601 timestamp, or now when it cannot be parsed."""
+        try:
+            return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return time.time()
 
     def write_to_log_file(self, log_data, title=''):
         """Write log data to file."""
         if log_data:
-            with open(self.USER_LOG_FILE, "a") as file:
-                if title:
-                    file.write(f"\n{title}\n")
-                for log in log_data:
-                    file.write(
-                        ", ".join(f"{key}: {str(val)}" for key, val in log.items()) + "\n"
-                    )
+            text = f"\n{title}\n" if title else ""
+            text += "".join(
+                ", ".join(f"{key}: {str(val)}" for key, val in log.items()) + "\n"
+                for log in log_data
+            )
+            self.append_to_file(self.USER_LOG_FILE, text)
+
+    def append_to_file(self, path, text):
+        """Append text to a file, through the buffered writer when there is one."""
+        if self.log_writer is not None:
+            self.log_writer.write(path, text)
+        else:
+            with _write_lock, open(path, "a") as file:
+                file.write(text)
+
+    def rotate_log(self, path):
+        """Start a fresh log file, keeping the old content as a rotated segment."""
+        try:
+            if self.log_writer is not None:
+                self.log_writer.rotate(path)
+            else:
+                self.log_store.rotate(path)
+            if self.VERBOSE:
+                print(f"[+] Rotated log file: {path}")
+        except Exception as e:
+            if self.VERBOSE:
+                print(f"[-] Failed to rotate {path}: {e}")
+
+    def read_log(self, path):
+        """Read a log file for analysis, capped to its most recent AI_INPUT_BYTES."""
+        self.flush_logs()
+        return RotatingLogStore.tail_bytes(path, self.AI_INPUT_BYTES)
+
+    def compact_logs(self):
+        """Read both log files once and compact them into the shared AI token budget."""
+        texts = []
+        for file_path in [self.USER_LOG_FILE, self.APP_LOG_FILE]:
+            try:
+                texts.append(self.read_log(file_path))
+            except FileNotFoundError:
+                self.log_message(f"File not found: {file_path}")
+            except Exception as e:
+                self.log_message(f"Error reading file {file_path}: {e}")
+        return LogCompactor(self.AI_TOKEN_BUDGET).compact(texts)
+
+    def flush_logs(self):
+        """Make sure buffered log lines are on disk before a file is read or attached."""
+        if self.log_writer is not None:
+            self.log_writer.flush()
 
     def send_slack(self, message, file_path=None):
         """
@@ -82,11 +130,12 @@ class Base:
 
         :param message: The message to send.
         :param file_path: Optional path to a file to upload with the message.
+        :return: True if the message was posted.
         """
         try:
             
-            if not self.SLACK_CHANNEL or self.SLACK_TOKEN:
-                return
+            if not self.SLACK_CHANNEL or not self.SLACK_TOKEN:
+                return False
             
             # Send the message
             self.log_message(f"Sending Slack notification to {self.SLACK_CHANNEL}")
@@ -108,19 +157,21 @@ class Base:
                     self.log_message(f"File uploaded successfully: {file_response['file']['id']}")
                 except SlackApiError as e:
                     self.log_message(f"Failed to upload file: {e.response['error']}")
+            return True
         except SlackApiError as e:
             self.log_message(f"Failed to send Slack notification: {e.response['error']}")    
-            pass
+            return False
 
     def send_via_hook(self, message):
         """
         Send a notification to a Slack channel via webhook.
 
         :param message: The message to send.
+        :return: True if the webhook accepted it.
         """
         if not self.WEBHOOK_URL:
             # self.log_message("\t Slack webhook URL is not configured.")
-            return
+            return False
 
         payload = {
             "text": message
@@ -135,74 +186,116 @@ class Base:
             )
             if response.status_code == 200:
                 self.log_message("Slack message sent successfully.")
-            else:
-                self.log_message(f"Failed to send Slack notification: {response.status_code} - {response.text}")
+                return True
+            self.log_message(f"Failed to send Slack notification: {response.status_code} - {response.text}")
         except Exception as e:
             self.log_message(f"Failed to send Slack notification: {e}")
-            pass
+        return False
 
     def send_mail(self, subject, body='',attachment=None):
-        """Send email notification via SMTP."""
+        """Send email notification via SMTP, or add it to the cycle digest in digest mode."""
 
         if not all([self.SMTP_USER, self.SMTP_PASSWORD, self.EMAIL_RECEIVERS]):   
             # self.log_message("\t Email receiver is not configured.")
             return
 
-        self.log_message(f"Sending email notification to {self.EMAIL_RECEIVERS}")
-        msg = MIMEMultipart()
-        msg["From"] = self.SMTP_USER
-        msg["To"] = ", ".join(self.EMAIL_RECEIVERS)
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
+        if self.mail_digest is not None:
+            self.mail_digest.add(self.EMAIL_RECEIVERS, subject, body, attachment)
+            return
 
-        if attachment:
-            try:
-                 with open(attachment, "rb") as file:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(file.read())
-                    encoders.encode_base64(part)
-                    
-                    # Extract the filename from the file path
-                    filename = os.path.basename(attachment)
-                    
-                    # Add the header with the filename
-                    part.add_header(
-                        "Content-Disposition",
-                        f"attachment; filename={filename}"
-                    )
-                    msg.attach(part)
-            except Exception as e:
-                self.log_message(f"Failed to attach file: {e}")
-                pass
-            
+        self.deliver_mail(self.EMAIL_RECEIVERS, subject, body, [attachment] if attachment else [])
+
+    def deliver_mail(self, receivers, subject, body='', attachments=None):
+        """Build and send one email, over the persistent SMTP session when there is one."""
+        self.log_message(f"Sending email notification to {receivers}")
+        self.flush_logs()
+        msg = build_message(self.SMTP_USER, receivers, subject, body, attachments, log=self.log_message)
         try:
+            if self.smtp_session is not None:
+                self.smtp_session.sendmail(self.SMTP_USER, receivers, msg.as_string())
+            else:
                 with smtplib.SMTP(self.SMTP_SERVER, self.SMTP_PORT) as server:
                     server.starttls()
                     server.login(self.SMTP_USER, self.SMTP_PASSWORD)
-                    server.sendmail(self.SMTP_USER, self.EMAIL_RECEIVERS, msg.as_string())
-                self.log_message(f"Email sent to {self.EMAIL_RECEIVERS} successfully.")
+                    server.sendmail(self.SMTP_USER, receivers, msg.as_string())
+            self.log_message(f"Email sent to {receivers} successfully.")
         except Exception as e:
-                self.log_message(f"Failed to send email: {e}")
-                pass
+            self.log_message(f"Failed to send email: {e}")
+
+    def flush_mail_digest(self):
+        """Send everything collected in the digest as one email per receiver list."""
+        if self.mail_digest is None:
+            return
+        for receivers, subject, body, attachments in self.mail_digest.drain():
+            self.deliver_mail(receivers, subject, body, attachments)
 
     def log_message(self,message=None):
         """Log messages to console and save application logs to file."""
         if self.VERBOSE or (isinstance(self.VERBOSE, str) and self.VERBOSE.upper().startswith('T')):
             print(message)
         if self.SAVE:
-            with open(self.APP_LOG_FILE, "a") as f:
-                f.write(f"{message}\n")
+            self.append_to_file(self.APP_LOG_FILE, f"{message}\n")
 
-    def brief_notify(self,message):
-        """ Send A Brief Notification"""
-        if self.SLACK_CHANNEL:
-            self.send_slack(message=message)
-        else:
-            self.send_via_hook(message)
+    def new_alerts(self, items, check, entity_keys, severity_key=None):
+        """
+        Keep only the items whose condition has not been notified within the re-notify TTL.
+
+        Nothing is recorded; notify_alert records each item once it is delivered.
+
+        :param items: Alert dicts.
+        :param check: Name of the check raising them.
+        :param entity_keys: Keys whose values identify the entity.
+        :param severity_key: Optional key holding the severity or status.
+        """
+        if self.alert_cache is None:
+            return items
+        return [item for item in items if self.alert_cache.is_new(*self.alert_identity(item, check, entity_keys, severity_key))]
+
+    def record_alerts(self, items, check, entity_keys, severity_key=None):
+        """Start the re-notify TTL of the items that were sent; arguments as for new_alerts."""
+        if self.alert_cache is None:
+            return
+        for item in items:
+            self.alert_cache.record(*self.alert_identity(item, check, entity_keys, severity_key))
+
+    @staticmethod
+    def alert_identity(item, check, entity_keys, severity_key=None):
+        """(entity, check, severity) of an alert item, as fingerprinted by the alert cache."""
+        return (
+            "|".join(str(item.get(key, '')) for key in entity_keys),
+            check,
+            item.get(severity_key, '') if severity_key else '',
+        )
+
+    def brief_notify(self, message, on_sent=None):
+        """
+        Send A Brief Notification; returns True if it was queued or delivered.
+
+        :param on_sent: Optional callable run once the message was actually delivered; with
+            the dispatcher that is after its batch is posted, and never if the batch is dropped.
+        """
+        if self.dispatcher:
+            if self.SLACK_CHANNEL:
+                if self.SLACK_TOKEN:
+                    self.dispatcher.enqueue(("slack", self.SLACK_CHANNEL), message, on_sent)
+                    return True
+            elif self.WEBHOOK_URL:
+                self.dispatcher.enqueue(("webhook", self.WEBHOOK_URL), message, on_sent)
+                return True
+            return False
+        sent = self.send_slack(message=message) if self.SLACK_CHANNEL else self.send_via_hook(message)
+        if sent and on_sent is not None:
+            on_sent()
+        return sent
+
+    def notify_alert(self, item, message, check, entity_keys, severity_key=None):
+        """Brief-notify one alert item, starting its re-notify TTL only once it is delivered."""
+        return self.brief_notify(message, on_sent=lambda: self.record_alerts([item], check, entity_keys, severity_key))
   
     def full_notify(self, subject, message,file_path=None):
         """Send a Full notification via Slack, webhook, or email with attachments"""
         file_path = file_path or self.USER_LOG_FILE
+        self.flush_logs()
         if file_path:
             if self.SLACK_CHANNEL:
                 self.send_slack(message=message, file_path=file_path)
@@ -212,11 +305,20 @@ class Base:
     def clean_up_files(self, directory="."):
         """
         Removes specified files from a given directory if they exist.
+        Log files are rotated into bounded segments instead when a log store is configured.
         :param targets: List of filenames to remove (default: None)
         :param directory: Directory to check (default: current directory ".")
         """
-        self.GENERATED_FILES.extend([self.USER_LOG_FILE,self.APP_LOG_FILE]) 
-        targets = self.GENERATED_FILES or None
+        self.flush_logs()
+        log_files = [self.USER_LOG_FILE,self.APP_LOG_FILE]
+        if self.log_store is not None:
+            for file_name in filter(None, log_files):
+                self.rotate_log(os.path.abspath(os.path.join(directory, file_name)))
+            log_files = []
+        targets = self.GENERATED_FILES + log_files
+        # Empty in place so long-lived components sharing the list do not grow it forever
+        del self.GENERATED_FILES[:]
+        targets = [target for target in targets if target] or None
         if targets is None:
             if self.VERBOSE:
                 print('[-] No files to cleanup')
@@ -236,58 +338,59 @@ class Base:
                 if self.VERBOSE:
                     print(f"[-] Cleanup skipped, File not found: {file_path}")
                     
-    def load_last_run(self):
-        """Load last run timestamps from file, return as dictionary."""
-        if os.path.exists(self.LAST_RUN_FILE):
-            with open(self.LAST_RUN_FILE, "r") as f:
-                data = json.load(f)
-                return data
-        else:
-            with open(self.LAST_RUN_FILE, "w") as f:
-                # Initialize the dictionary
-                data={}
-                for val in self.AI_SCHEDULED_RUN_TIMES:
-                    # Get the current time
-                    stop_time = datetime.strptime(val, "%H:%M").time()
-                    stop_datetime = datetime.combine(datetime.today(), stop_time)
-                    # Add 30 minutes
-                    new_stop_time = stop_datetime + timedelta(minutes=30)
-                    # Extract the new time in "H:M" format
-                    data[val] = {'start':val,'stop':new_stop_time.strftime("%H:%M")}
-                json.dump(data, f, indent=4)
-                return data
-                
-    def save_last_run(self,data):
-        """Save last run to file."""
-        if data:
-            with open(self.LAST_RUN_FILE, "w") as f:
-                json.dump(data, f, indent=4)
-
-    def run_ai_now(self):
-        """Check if AI should run based on schedule and 30-minute buffer."""
-        # Load the last run times
-        last_run_tracker = self.load_last_run()      
-        if not last_run_tracker:
-            return False
-        
-        for key,val in last_run_tracker.items():
-            # Get current time
-            now = datetime.now().replace(second=0, microsecond=0).time()
-            # Define time range
-            start_time = datetime.strptime(val.get('start','00:00'), "%H:%M").time()
-            end_time = datetime.strptime(val.get('stop','00:30'), "%H:%M").time()
-            # Check if current time is within the time range
-            if start_time <= now <= end_time:
-                last_run =  val.get('last_run',None)
-                if last_run is None or last_run == '':
-                    # Script has not ran
-                    return (last_run_tracker,key)           
-                else:
-                    actual_run_date = datetime.strptime(last_run, "%Y-%m-%d %H:%M:%S.%f")
-                    datetime_obj = actual_run_date.strftime("%H:%M")
-                    datetime_obj = datetime.strptime(datetime_obj, "%H:%M").time()
-                    # Check if it already ran in the current timeframe
-                    if not(start_time <= datetime_obj <= end_time and actual_run_date.date() == datetime.now().date()):
-                        # Script has not ran
-                        return (last_run_tracker,key)
+    def ai_cancelled(self, cancel, provider):
+        """True, and logged, if the AI run cancelled this provider after its deadline."""
+        if cancel is not None and cancel.is_set():
+            self.log_message(f'[-] {provider} response discarded, deadline exceeded')
+            return True
         return False
+
+    def stream_report(self, provider, chunks, report_name, cancel=None, preview=False):
+        """
+        Write AI output to report_name chunk by chunk as it arrives and return the full text.
+
+        With preview, the first paragraph is sent as a brief notification as soon as it is complete.
+        Returns None, and removes the partial report, if the run is cancelled mid-stream.
+        """
+        parts = []
+        preview = preview and self.AI_STREAM_PREVIEW
+        with open(report_name, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                if self.ai_cancelled(cancel, provider):
+                    # Release the provider's open response instead of draining it
+                    if hasattr(chunks, "close"):
+                        chunks.close()
+                    break
+                if not chunk:
+                    continue
+                f.write(chunk)
+                f.flush()
+                parts.append(chunk)
+                if preview:
+                    paragraph, end, _ = "".join(parts).lstrip().partition("\n\n")
+                    if end:
+                        self.brief_notify(f"🤖 {provider} analysis preview:\n{paragraph}")
+                        preview = False
+            else:
+                return "".join(parts)
+        os.remove(report_name)
+        return None
+
+    def cached_report(self, provider, model, logs):
+        """
+        Look up a report for the same provider, model, context, prompt and inputs.
+
+        :return: (cache key, cached report or None)
+        """
+        if self.report_cache is None:
+            return None, None
+        key = self.report_cache.key(provider, model, self.AI_CONTEXT, self.AI_PROMPT, logs)
+        report = self.report_cache.get(key)
+        if report is not None:
+            self.log_message(f'[+] {provider} report served from cache')
+        return key, report
+
+    def cache_report(self, key, report):
+        """Remember a freshly generated report under the key from cached_report."""
+        if self.report_cache is not None and key and report:
+            self.report_cache.put(key, report)
@@ -0,0 +1,117 @@
+import warnings
+import numpy as np
+
+PHASES = ("tcp", "tls", "http")
+
+
+class LatencyBaselines:
+    """
+    Rolling per-URL latency baselines.
+
+    Each URL owns one fixed-size ring buffer row of recent TCP/TLS/HTTP samples. Every
+    cycle all URLs are scored at once with a robust z-score, the distance from the
+    URL's own median in units of its median absolute deviation (MAD).
+    """
+
+    def __init__(self, window=120, min_samples=20, threshold=3.5, min_delta=50.0, max_urls=5000):
+        """
+        :param window: Samples kept per URL.
+        :param min_samples: Samples needed before a URL is judged against its baseline.
+        :param threshold: Robust z-score above which a phase is anomalous.
+        :param min_delta: Milliseconds a phase must also exceed its median by, so tiny jitter never alerts.
+        :param max_urls: URLs tracked; beyond it the least recently seen URL's row is reused.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.min_delta = min_delta
+        self.max_urls = max_urls
+        self._rows = {}
+        self._urls = []
+        self._tick = 0
+        self._allocate(min(64, max_urls))
+
+    def _allocate(self, capacity):
+        old = len(self._urls)
+        samples = np.full((capacity, self.window, len(PHASES)), np.nan)
+        cursor = np.zeros(capacity, dtype=np.int64)
+        count = np.zeros(capacity, dtype=np.int64)
+        last_seen = np.zeros(capacity, dtype=np.int64)
+        if old:
+            samples[:old], cursor[:old], count[:old], last_seen[:old] = self._samples, self._cursor, self._count, self._last_seen
+        self._samples, self._cursor, self._count, self._last_seen = samples, cursor, count, last_seen
+
+    def _row(self, url):
+        row = self._rows.get(url)
+        if row is None:
+            row = self._claim(url)
+        # Marked as soon as it is looked up, so a row used earlier in this cycle is never evicted
+        self._last_seen[row] = self._tick
+        return row
+
+    def _claim(self, url):
+        if len(self._urls) < len(self._samples):
+            row = len(self._urls)
+            self._urls.append(url)
+        elif len(self._samples) < self.max_urls:
+            self._allocate(min(len(self._samples) * 2, self.max_urls))
+            row = len(self._urls)
+            self._urls.append(url)
+        else:
+            row = int(np.argmin(self._last_seen))
+            del self._rows[self._urls[row]]
+            self._urls[row] = url
+            self._samples[row] = np.nan
+            self._cursor[row] = self._count[row] = 0
+        self._rows[url] = row
+        return row
+
+    def _append(self, row, samples):
+        samples = np.asarray(samples, dtype=float).reshape(-1, len(PHASES))[-self.window:]
+        slots = (self._cursor[row] + np.arange(len(samples))) % self.window
+        self._samples[row, slots] = samples
+        self._cursor[row] = (self._cursor[row] + len(samples)) % self.window
+        self._count[row] = min(self._count[row] + len(samples), self.window)
+
+    def score(self, urls, values, earlier=None):
+        """
+        Score this cycle's samples against each URL's baseline, then add them to it.
+
+        :param urls: URL of each sample; a URL should appear once per call.
+        :param values: Array-like of shape (len(urls), 3) holding TCP, TLS and HTTP milliseconds.
+        :param earlier: Optional samples of each URL seen earlier in this cycle, oldest first;
+            they join the baseline unscored, before the latest sample is scored.
+        :return: (scores, medians, anomalous) arrays. scores and medians are (n, 3) and NaN
+            while a URL is still warming up; anomalous is a boolean (n,) array.
+        """
+        values = np.asarray(values, dtype=float).reshape(len(urls), len(PHASES))
+        if not len(urls):
+            return np.empty((0, len(PHASES))), np.empty((0, len(PHASES))), np.zeros(0, dtype=bool)
+        self._tick += 1
+        rows = np.fromiter((self._row(url) for url in urls), dtype=np.int64, count=len(urls))
+        for row, samples in zip(rows, earlier or ()):
+            if len(samples):
+                self._append(row, samples)
+
+        history = self._samples[rows]
+        ready = self._count[rows] >= self.min_samples
+        with warnings.catch_warnings():
+            # Rows that are still empty yield NaN, which the ready mask discards
+            warnings.simplefilter("ignore", RuntimeWarning)
+            medians = np.nanmedian(history, axis=1)
+            mad = np.nanmedian(np.abs(history - medians[:, None, :]), axis=1)
+        # A perfectly steady URL has a MAD of zero; never divide by less than a millisecond
+        mad = np.maximum(mad, 1.0)
+        scores = 0.6745 * (values - medians) / mad
+        scores[~ready] = np.nan
+        medians[~ready] = np.nan
+        with np.errstate(invalid="ignore"):
+            anomalous = ((scores > self.threshold) & (values - medians > self.min_delta)).any(axis=1)
+
+        self._samples[rows, self._cursor[rows]] = values
+        self._cursor[rows] = (self._cursor[rows] + 1) % self.window
+        self._count[rows] = np.minimum(self._count[rows] + 1, self.window)
+        return scores, medians, anomalous
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,88 @@
+import re
+from collections import deque
+
+DEFAULT_CATEGORIES = {
+    "SSL Errors": r"(OpenSSL error|SSL routines::wrong version number)",
+    "PHP Errors": r"(PHP Fatal error|PHP Warning|Undefined variable|Attempt to read property on null)",
+    "Kubernetes Errors": r"(Evicted|OOMKilled|CrashLoopBackOff|Pod is in failed state)",
+    "Network Issues": r"(connection refused|timeout|failed to connect|network unreachable)"
+}
+
+
+# Backreferences and group conditionals depend on group numbering, which an alternation shifts
+GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+class LogClassifier:
+    """
+    Single-pass log classifier.
+
+    Categories are combined into one case-insensitive alternation, so each chunk of a file
+    is scanned once to find the lines that match anything. Each such line is then checked
+    against every category's own pattern, so a line is counted under every category it
+    matches. Only the most recent max_lines lines are kept per category.
+    """
+
+    def __init__(self, categories=None, max_lines=50, chunk_size=1024 * 1024):
+        self.categories = dict(categories or DEFAULT_CATEGORIES)
+        self.max_lines = max_lines
+        self.chunk_size = chunk_size
+        self._patterns = {category: re.compile(pattern, re.IGNORECASE) for category, pattern in self.categories.items()}
+        combined = [pattern for pattern in self.categories.values() if not GROUP_REFERENCE.search(pattern)]
+        self._scanners = [self._patterns[category] for category, pattern in self.categories.items() if GROUP_REFERENCE.search(pattern)]
+        try:
+            if combined:
+                self._scanners.insert(0, re.compile("|".join(f"(?:{pattern})" for pattern in combined), re.IGNORECASE))
+        except re.error:
+            # e.g. two categories defining the same group name; scan each pattern on its own
+            self._scanners = list(self._patterns.values())
+
+    def _scan(self, text, lines, counts):
+        """Classify every line of text that matches at least one category."""
+        starts = set()
+        for scanner in self._scanners:
+            for match in scanner.finditer(text):
+                starts.add(text.rfind("\n", 0, match.start()) + 1)
+        for start in sorted(starts):
+            end = text.find("\n", start)
+            line = text[start:end if end != -1 else len(text)]
+            for category, pattern in self._patterns.items():
+                if pattern.search(line):
+                    counts[category] += 1
+                    lines[category].append(line.strip())
+
+    def classify(self, path):
+        """
+        Read a file in chunks and collect matching lines per category.
+
+        :return: ({category: [lines]}, {category: total matches})
+        """
+        lines = {category: deque(maxlen=self.max_lines) for category in self.categories}
+        counts = dict.fromkeys(self.categories, 0)
+        remainder = ""
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                chunk = remainder + chunk
+                # Chunks end on a line boundary so no line is split between two scans
+                boundary = chunk.rfind("\n") + 1
+                remainder = chunk[boundary:]
+                self._scan(chunk[:boundary], lines, counts)
+        if remainder:
+            self._scan(remainder, lines, counts)
+        return {category: list(kept) for category, kept in lines.items()}, counts
+
+    def format(self, path):
+        """Classify a file and render one markdown section per category that matched."""
+        lines, counts = self.classify(path)
+        sections = []
+        for category, kept in lines.items():
+            if not kept:
+                continue
+            header = f"## {category}"
+            if counts[category] > len(kept):
+                header += f" (last {len(kept)} of {counts[category]})"
+            sections.append(f"{header}\n- " + "\n- ".join(kept))
+        return "\n".join(sections)
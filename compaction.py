@@ -0,0 +1,63 @@
+import re
+
+# Volatile tokens masked out when deciding whether two lines repeat each other
+VOLATILE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\d+(?:[.:\-T]\d+)*", re.IGNORECASE)
+
+SEVERITY = [
+    (3, re.compile(r"fatal|critical|panic|is down|\bdown\b|oomkilled|crashloop", re.IGNORECASE)),
+    (2, re.compile(r"error|exception|fail|refused|unreachable", re.IGNORECASE)),
+    (1, re.compile(r"warn|timeout|high|exceeded|alert", re.IGNORECASE)),
+]
+
+
+class LogCompactor:
+    """Deduplicates and ranks log lines so the AI inputs fit one shared token budget."""
+
+    def __init__(self, token_budget=8000, chars_per_token=4):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+
+    @staticmethod
+    def severity(line):
+        for score, pattern in SEVERITY:
+            if pattern.search(line):
+                return score
+        return 0
+
+    def compact(self, texts):
+        """
+        Merge texts into one compacted block within the token budget.
+
+        Repeated lines (ignoring numbers, ids and timestamps) collapse into their latest
+        occurrence with a count; the most severe, then most recent, lines are kept and
+        returned in their original order.
+        """
+        entries = {}
+        position = 0
+        for text in texts:
+            for line in text.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                position += 1
+                key = VOLATILE.sub("#", line)
+                entry = entries.get(key)
+                if entry is None:
+                    entries[key] = [1, position, line]
+                else:
+                    entry[0] += 1
+                    entry[1] = position
+                    entry[2] = line
+
+        budget = self.token_budget * self.chars_per_token
+        ranked = sorted(entries.values(), key=lambda entry: (self.severity(entry[2]), entry[1]), reverse=True)
+        selected, used = [], 0
+        for count, last_position, line in ranked:
+            rendered = f"{line} (x{count})" if count > 1 else line
+            if used + len(rendered) + 1 > budget:
+                continue
+            selected.append((last_position, rendered))
+            used += len(rendered) + 1
+
+        selected.sort()
+        return "\n".join(rendered for _, rendered in selected)
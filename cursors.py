@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+import time
+
+
+class CursorStore:
+    """Persisted per-check high-water marks so consecutive query windows tile time exactly."""
+
+    def __init__(self, path="cursors.json", max_lookback=3600, ingest_delay=30):
+        self.path = path
+        self.max_lookback = max_lookback
+        self.ingest_delay = ingest_delay
+        self._lock = threading.Lock()
+        self._cursors = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        # Write then rename so a crash never leaves a half-written cursor file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._cursors, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def window(self, check, lookback):
+        """
+        Return the (gte, lt) epoch-millisecond window a check should query next.
+
+        :param check: Name of the check owning the cursor.
+        :param lookback: Seconds to look back when the check has no cursor yet.
+        """
+        now = int((time.time() - self.ingest_delay) * 1000)
+        with self._lock:
+            cursor = self._cursors.get(check, {})
+        start = cursor.get("timestamp", now - int(lookback * 1000))
+        # After a long outage, resume from max_lookback instead of rescanning everything
+        start = max(start, now - int(self.max_lookback * 1000))
+        return (start, now)
+
+    def commit(self, check, window):
+        """Advance a check's cursor to the end of a fully processed window."""
+        with self._lock:
+            self._cursors[check] = {"timestamp": window[1]}
+            self._save()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def shared_store(path="cursors.json", **kwargs):
+    """Return the process-wide CursorStore, creating it on first use."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = CursorStore(path, **kwargs)
+        return _shared_store
@@ -1,3 +1,4 @@
+import json
 import uuid
 import requests
 from base import Base
@@ -24,14 +25,43 @@ class DeepSeek(Base):
             "max_tokens": max_tokens
         }
         try:
-            response = requests.post(self.DEEPSEEK_API_URL, headers=headers, json=payload)
+            response = requests.post(self.DEEPSEEK_API_URL, headers=headers, json=payload, timeout=self.AI_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             self.log_message(f'[-] DeepSeek API request failed: {e}')
             return None
 
-    def generateReport(self):
+    def streamDeepSeek(self, prompt, model="deepseek-model", temperature=0.7, max_tokens=1000):
+        """
+        Sends a prompt to the DeepSeek API with streaming enabled and yields the text as it arrives.
+        """
+        headers = {
+            "Authorization": f"Bearer {self.DEEPSEEK_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": model,
+            "messages": [ {"role":"system","content":self.AI_CONTEXT}, {"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        with requests.post(self.DEEPSEEK_API_URL, headers=headers, json=payload, timeout=self.AI_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            # Server-sent events: one "data: {json}" line per chunk, ending with "data: [DONE]"
+            for line in response.iter_lines(chunk_size=None):
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data).get("choices", [{}])[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    def generateReport(self, cancel=None, logs=None):
         """
         Generates a report using the DeepSeek model.
         """
@@ -47,37 +77,46 @@ class DeepSeek(Base):
         if self.AI_PROMPT:
             content.append(self.AI_PROMPT)
 
-        # Append file content
-        for file_path in [self.USER_LOG_FILE, self.APP_LOG_FILE]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-                    content.append(file_content)
-            except FileNotFoundError:
-                self.log_message(f"File not found: {file_path}")
-            except Exception as e:
-                self.log_message(f"Error reading file {file_path}: {e}")
+        # Append the compacted log content
+        logs = self.compact_logs() if logs is None else logs
+        if logs:
+            content.append(logs)
 
         if len(content) > 0:
             try:
                 # Combine all content into a single prompt
                 combined_prompt = "\n".join(content)
-                response = self.promptDeepSeek(
-                    prompt=combined_prompt,
-                    model=self.DEEPSEEK_API_MODEL,
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-
-                if response:
+                cache_key, cached_text = self.cached_report('DeepSeekAI', self.DEEPSEEK_API_MODEL, logs)
+                streamed = cached_text is None and self.AI_STREAM
+                if cached_text is not None:
+                    chunks = [cached_text]
+                elif streamed:
+                    chunks = self.streamDeepSeek(
+                        prompt=combined_prompt,
+                        model=self.DEEPSEEK_API_MODEL,
+                        temperature=0.7,
+                        max_tokens=1000
+                    )
+                else:
+                    response = self.promptDeepSeek(
+                        prompt=combined_prompt,
+                        model=self.DEEPSEEK_API_MODEL,
+                        temperature=0.7,
+                        max_tokens=1000
+                    )
                     # Extract the generated text from the response
-                    generated_text = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+                    chunks = [response.get("choices", [{}])[0].get("message", {}).get("content", "")] if response else None
+
+                if chunks is not None:
                     report_name = f"report{uuid.uuid4()}.md"
                     self.GENERATED_FILES.append(report_name)
-                    # Save the report
-                    with open(report_name, "w", encoding="utf-8") as f:
-                        f.write(generated_text)
-                        self.log_message('DeepSeekAI report has been saved to ' + report_name)
+                    # Save the report as it is generated
+                    generated_text = self.stream_report('DeepSeekAI', chunks, report_name, cancel, preview=streamed)
+                    if generated_text is None:
+                        return None
+                    if cached_text is None:
+                        self.cache_report(cache_key, generated_text)
+                    self.log_message('DeepSeekAI report has been saved to ' + report_name)
 
                     # Notify about the report
                     self.full_notify(subject='AI Analysis', message=report_name, file_path=report_name)
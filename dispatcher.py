@@ -0,0 +1,215 @@
+import json
+import queue
+import threading
+import time
+import requests
+from slack_sdk.errors import SlackApiError
+
+
+class RateLimited(Exception):
+    """Raised when a destination answers 429; carries the Retry-After delay in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket limiting posts per second, pausable on Retry-After."""
+
+    def __init__(self, rate=1.0, capacity=3):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def pause(self, seconds):
+        """Hold all sends for the given number of seconds and drain the bucket."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                time.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+class NotificationDispatcher:
+    """Background thread that coalesces brief notifications per destination into batched posts."""
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, slack_client=None, rate=1.0, burst=3, max_batch=10, max_chars=3500, max_retries=3, log=print):
+        self.slack_client = slack_client
+        self.max_batch = max_batch
+        self.max_chars = max_chars
+        self.max_retries = max_retries
+        self.log = log
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kibalert-notify", daemon=True)
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.last_send_latency = 0.0
+        self._total_send_latency = 0.0
+        self._posts = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def enqueue(self, destination, message, on_sent=None):
+        """
+        Queue a message and return immediately.
+
+        :param destination: ("slack", channel) or ("webhook", url).
+        :param message: Message text.
+        :param on_sent: Optional callable run on the worker thread once the message was posted;
+            never run if its batch is dropped.
+        """
+        self._queue.put((destination, message, on_sent))
+
+    @property
+    def queue_depth(self):
+        """Messages waiting to be posted."""
+        with self._lock:
+            pending = sum(len(messages) for messages in self._pending.values())
+        return self._queue.qsize() + pending
+
+    def stats(self):
+        """Queue depth, delivery counts and send latency in seconds."""
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "last_send_latency": round(self.last_send_latency, 3),
+            "avg_send_latency": round(self._total_send_latency / self._posts, 3) if self._posts else 0.0,
+        }
+
+    def stop(self, timeout=30):
+        """Flush what is queued, then stop the worker thread."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Coalesce everything already queued before posting
+            with self._lock:
+                while item is not None:
+                    destination, message, on_sent = item
+                    self._pending.setdefault(destination, []).append((message, on_sent))
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        item = None
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            destinations = list(self._pending)
+        for destination in destinations:
+            while True:
+                with self._lock:
+                    messages = self._pending.get(destination)
+                    if not messages:
+                        self._pending.pop(destination, None)
+                        break
+                    batch = self._take_batch(messages)
+                self._deliver(destination, batch)
+
+    def _take_batch(self, messages):
+        """Pop up to max_batch (message, on_sent) pairs whose messages fit in max_chars once joined."""
+        batch, size = [], 0
+        while messages and len(batch) < self.max_batch:
+            extra = len(messages[0][0]) + (len(self.SEPARATOR) if batch else 0)
+            if batch and size + extra > self.max_chars:
+                break
+            batch.append(messages.pop(0))
+            size += extra
+        return batch
+
+    def _deliver(self, destination, batch):
+        text = self.SEPARATOR.join(message for message, _ in batch)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            started = time.monotonic()
+            try:
+                self._post(destination, text)
+                self._record_latency(time.monotonic() - started)
+                self.sent += len(batch)
+                self.log(f"Slack notification batch of {len(batch)} sent to {destination[1]}")
+                self._confirm(batch)
+                return
+            except RateLimited as e:
+                self.log(f"Slack rate limited for {destination[1]}, retrying in {e.retry_after}s")
+                self.bucket.pause(e.retry_after)
+            except Exception as e:
+                self.log(f"Failed to send Slack notification: {e}")
+                break
+        self.failed += len(batch)
+
+    def _confirm(self, batch):
+        """Run the on_sent callbacks of a delivered batch."""
+        for _, on_sent in batch:
+            if on_sent is None:
+                continue
+            try:
+                on_sent()
+            except Exception as e:
+                self.log(f"Failed to record a sent notification: {e}")
+
+    def _record_latency(self, latency):
+        self.last_send_latency = latency
+        self._total_send_latency += latency
+        self._posts += 1
+
+    def _post(self, destination, text):
+        kind, target = destination
+        if kind == "slack":
+            try:
+                self.slack_client.chat_postMessage(channel=target, text=text)
+            except SlackApiError as e:
+                if e.response.status_code == 429:
+                    raise RateLimited(_retry_after(e.response.headers))
+                raise Exception(e.response["error"])
+        else:
+            response = self.session.post(
+                target,
+                data=json.dumps({"text": text}),
+                headers={"Content-Type": "application/json"},
+                timeout=10,
+            )
+            if response.status_code == 429:
+                raise RateLimited(_retry_after(response.headers))
+            if response.status_code != 200:
+                raise Exception(f"{response.status_code} - {response.text}")
+
+
+def _retry_after(headers):
+    """Read Retry-After from response headers, whatever their casing."""
+    for key, value in (headers or {}).items():
+        if key.lower() == "retry-after":
+            try:
+                return max(int(value), 1)
+            except ValueError:
+                break
+    return 1
@@ -0,0 +1,129 @@
+import re
+from collections import Counter, OrderedDict
+
+WILDCARD = "<*>"
+HAS_DIGIT = re.compile(r"\d")
+
+
+class LogTemplate:
+    """A mined message template with total and per-service counts."""
+
+    __slots__ = ("id", "tokens", "count", "services")
+
+    def __init__(self, template_id, tokens):
+        self.id = template_id
+        self.tokens = tokens
+        self.count = 0
+        self.services = Counter()
+
+    @property
+    def template(self):
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    """
+    Online Drain-style template miner.
+
+    Messages are routed through a fixed-depth prefix tree (token count, then leading
+    tokens) to a small list of candidate templates; the most similar one absorbs the
+    message, turning differing tokens into wildcards, or a new template is created.
+    Templates are kept in LRU order and the least recently matched are evicted.
+    """
+
+    def __init__(self, depth=4, similarity=0.5, max_children=100, max_templates=1000):
+        self.depth = max(depth, 3)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self._root = {}
+        self._templates = OrderedDict()
+        self._leaves = {}
+        self._next_id = 1
+
+    @staticmethod
+    def tokenize(message):
+        return [WILDCARD if HAS_DIGIT.search(token) else token for token in str(message).split()]
+
+    def _leaf(self, tokens):
+        """Return the candidate list for tokens and the keys leading to it from the root."""
+        path = [len(tokens)]
+        node = self._root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth - 2]:
+            if token not in node and len(node) >= self.max_children:
+                token = WILDCARD
+            path.append(token)
+            node = node.setdefault(token, {})
+        return node.setdefault(None, []), tuple(path)
+
+    def _prune(self, path):
+        """Remove an emptied leaf and every prefix-tree node left without children above it."""
+        nodes = [self._root]
+        for key in path:
+            nodes.append(nodes[-1][key])
+        del nodes[-1][None]
+        for parent, key, node in zip(reversed(nodes[:-1]), reversed(path), reversed(nodes[1:])):
+            if node:
+                break
+            del parent[key]
+
+    @staticmethod
+    def _score(template_tokens, tokens):
+        same = wildcards = 0
+        for template_token, token in zip(template_tokens, tokens):
+            if template_token == WILDCARD:
+                wildcards += 1
+            elif template_token == token:
+                same += 1
+        return same / len(tokens), wildcards
+
+    def add(self, message, service=""):
+        """
+        Assign a message to a template.
+
+        :return: (LogTemplate, is_new) where is_new is True when the template was just created.
+        """
+        tokens = self.tokenize(message)
+        if not tokens:
+            tokens = [""]
+        leaf, path = self._leaf(tokens)
+
+        best, best_score = None, (-1, -1)
+        for template in leaf:
+            score = self._score(template.tokens, tokens)
+            if score > best_score:
+                best, best_score = template, score
+
+        is_new = best is None or best_score[0] < self.similarity
+        if is_new:
+            best = LogTemplate(self._next_id, tokens)
+            self._next_id += 1
+            leaf.append(best)
+            self._leaves[best.id] = (leaf, path)
+            self._templates[best.id] = best
+            self._evict()
+        else:
+            best.tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(best.tokens, tokens)
+            ]
+            self._templates.move_to_end(best.id)
+
+        best.count += 1
+        best.services[service] += 1
+        return best, is_new
+
+    def _evict(self):
+        while len(self._templates) > self.max_templates:
+            template_id, template = self._templates.popitem(last=False)
+            leaf, path = self._leaves.pop(template_id)
+            leaf.remove(template)
+            if not leaf:
+                self._prune(path)
+
+    def top(self, count=10):
+        """Most frequent templates seen since they were created."""
+        return sorted(self._templates.values(), key=lambda template: template.count, reverse=True)[:count]
+
+    def __len__(self):
+        return len(self._templates)
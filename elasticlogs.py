@@ -1,70 +1,111 @@
 import requests
+from collections import Counter
 from base import Base
+from drain import TemplateMiner
+from projection import Projection
+
+LOG = Projection("LogRecord", {
+    "timestamp": ("@timestamp", "N/A"),
+    "agent": ("agent.name", "N/A"),
+    "version": ("agent.version", "N/A"),
+    "culprit": ("error.culprit", "Unknown"),
+    "exception_code": ("error.exception[0].code", "N/A"),
+    "exception_message": ("error.exception[0].message", "No message"),
+    "service_name": ("service.name", "Unknown"),
+    "service_env": ("service.environment", "N/A"),
+    "hostname": ("host.name", "Unknown"),
+    "host_ip": ("host.ip[0]", "N/A"),
+    "runtime": ("service.runtime.name", "Unknown"),
+    "runtime_version": ("service.runtime.version", "N/A"),
+    "url": ("url.full", "N/A"),
+    "transaction": ("transaction.name", "N/A"),
+    "message": ("message", ""),
+}, extra=("template",))
 
 class  ElasticLogs(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        # Message templates are kept across cycles so only new ones are alerted
+        self.templates = TemplateMiner(similarity=self.LOG_TEMPLATE_SIMILARITY, max_templates=self.LOG_TEMPLATE_MAX)
 
     def fetch_logs(self):
         """Fetch logs from logs-* index, extract meaningful fields, and alert if a message is present."""
         self.log_message("[-] Fetching logs from logs-* index...")
-        url = f"{self.KIBANA_URL}/logs-*/_search"
-        query = {
-            "query": {
-                "range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}m", "lt": "now"}}
-            },
-            "size": self.HITS_SIZE
-        }
+        window = self.cursors.window("logs", self.SLEEP_TIME)
+        query = LOG.shape({
+            "query": self.time_range(window)
+        })
         
         try:
-            response = requests.post(url, headers=self.headers, json=query)
-            if response.status_code != 200:
-                self.log_message(f"Error fetching logs: {response.status_code} - {response.text}")
-                return None
-            
-            logs_data = response.json().get("hits", {}).get("hits", [])
-            return self.process_logs(logs_data)
+            # Page through every log in the window; each page is processed as soon as it arrives
+            pages = self.es.paginate(self.KIBANA_URL, "logs-*", query, self.HITS_SIZE)
+
+            def checkpoint(page):
+                # If a later page fails, the next cycle resumes from this page's last timestamp
+                # instead of alerting on and persisting the handled pages again
+                sort = page[-1].get("sort")
+                if sort:
+                    self.cursors.commit("logs", (window[0], sort[0]))
+
+            count = self.process_logs(pages, checkpoint)
+            self.cursors.commit("logs", window)
+            return count
         except requests.exceptions.RequestException as e:
             self.log_message(f"Network error while fetching logs: {e}")
         except Exception as e:
             self.log_message(f"Unexpected error while fetching logs: {e}")
         return None
 
-    def process_logs(self, logs_data):
-        """Extracts necessary fields from logs and alerts if a message is found."""
-        extracted_logs = []
-        count = 0
-        for log in logs_data:
-            log_source = log.get("_source", {})
-            extracted_log = {
-                "timestamp": log_source.get("@timestamp", "N/A"),
-                "agent": log_source.get("agent", {}).get("name", "N/A"),
-                "version": log_source.get("agent", {}).get("version", "N/A"),
-                "culprit": log_source.get("error", {}).get("culprit", "Unknown"),
-                "exception_code": log_source.get("error", {}).get("exception", [{}])[0].get("code", "N/A"),
-                "exception_message": log_source.get("error", {}).get("exception", [{}])[0].get("message", "No message"),
-                "service_name": log_source.get("service", {}).get("name", "Unknown"),
-                "service_env": log_source.get("service", {}).get("environment", "N/A"),
-                "hostname": log_source.get("host", {}).get("name", "Unknown"),
-                "host_ip": log_source.get("host", {}).get("ip", ["N/A"])[0],
-                "runtime": log_source.get("service", {}).get("runtime", {}).get("name", "Unknown"),
-                "runtime_version": log_source.get("service", {}).get("runtime", {}).get("version", "N/A"),
-                "url": log_source.get("url", {}).get("full", "N/A"),
-                "transaction": log_source.get("transaction", {}).get("name", "N/A"),
-                "message": log_source.get("message", "")
-            }
-            extracted_logs.append(extracted_log)
-            
-            if count < self.NOTIFY_LIMIT and extracted_log["message"]:
-                self.alert_log_issue(extracted_log)
-    
-            self.log_message(f"{extracted_log['timestamp']} - {extracted_log['service_name']} - {extracted_log['culprit']} - {extracted_log['exception_code']} - {extracted_log['exception_message']}")
+    def process_logs(self, pages, checkpoint=None):
+        """
+        Run each page of raw hits through extract -> mine -> alert -> persist as it arrives.
 
-            count += 1
+        Only one page is held in memory at a time. Logs matching an already known template
+        are counted but neither alerted nor persisted. checkpoint, when given, is called with
+        each page once it is fully handled. Returns the number of logs processed.
+        """
+        cycle_counts = Counter()
+        alerted = saved = 0
+        for page in pages:
+            new_logs = list(self.mine_templates(self.extract_logs(page), cycle_counts))
+            alerted += self.alert_logs(new_logs, self.NOTIFY_LIMIT - alerted)
+            if new_logs:
+                self.persist_logs(new_logs, title="📌 Logs Collected for further Analysis" if saved == 0 else "")
+                saved += len(new_logs)
+            if checkpoint is not None:
+                checkpoint(page)
 
-        self.save_logs(extracted_logs)
+        self.report_templates(cycle_counts)
+        self.save_logs(saved)
         self.log_message('[-] Logs processing completed.')
-        return extracted_logs
+        return sum(cycle_counts.values())
+
+    def extract_logs(self, hits):
+        """Yield the meaningful fields of each raw log hit."""
+        return LOG.hits(hits)
+
+    def mine_templates(self, logs, cycle_counts):
+        """Assign each log to a message template, counting it, and yield only logs that start a new template."""
+        for extracted_log in logs:
+            message = extracted_log["exception_message"]
+            if not message or message == "No message":
+                message = extracted_log["message"]
+            template, is_new = self.templates.add(message, extracted_log["service_name"])
+            cycle_counts[template] += 1
+            if is_new:
+                extracted_log.template = template.template
+                yield extracted_log
+
+    def alert_logs(self, logs, limit):
+        """Log every record and alert on at most limit of those that carry a message; return how many were alerted."""
+        alerted = 0
+        for extracted_log in logs:
+            if alerted < limit and extracted_log["message"]:
+                self.alert_log_issue(extracted_log)
+                alerted += 1
+
+            self.log_message(f"{extracted_log['timestamp']} - {extracted_log['service_name']} - {extracted_log['culprit']} - {extracted_log['exception_code']} - {extracted_log['exception_message']}")
+        return alerted
 
     def alert_log_issue(self, log_data):
         """Triggers an alert if a log message is found."""
@@ -83,20 +124,41 @@ class  ElasticLogs(Base):
         self.brief_notify(alert_message)
         return
     
-    def save_logs(self, logs):
-        """Save logs for further analysis."""
+    def report_templates(self, cycle_counts):
+        """Log and persist this cycle's most frequent templates with their counts."""
+        if not cycle_counts:
+            return
+        top_templates = [
+            {
+                "count": count,
+                "total": template.count,
+                "services": ", ".join(f"{service} ({seen})" for service, seen in template.services.most_common(3)),
+                "template": template.template,
+            }
+            for template, count in cycle_counts.most_common(self.LOG_TEMPLATE_TOP)
+        ]
+        self.log_message(f"[+] {sum(cycle_counts.values())} logs matched {len(cycle_counts)} templates ({len(self.templates)} known)")
+        for row in top_templates:
+            self.log_message(f"{row['count']}x [{row['services']}] {row['template']}")
+        if self.USER_LOG_FILE:
+            self.write_to_log_file(top_templates, "📊 Top Log Templates")
+
+    def persist_logs(self, logs, title=''):
+        """Append a batch of extracted logs to the user log file."""
+        if self.USER_LOG_FILE:
+            self.write_to_log_file(logs, title)
+
+    def save_logs(self, count):
+        """Send the collected logs for further analysis once every page has been persisted and new templates were seen."""
         
-        if not logs:
-            self.log_message("No logs found for further analysis.")
+        if not count:
+            self.log_message("No new log templates found for further analysis.")
             return
        
         
-        self.log_message(f"Saving {len(logs)} logs for further analysis.")
+        self.log_message(f"Saved {count} logs with new templates for further analysis.")
     
         if self.USER_LOG_FILE:
             subject = "📌 Logs Collected for further Analysis"
             body = "Attached log file contains error logs for analysis."
-            self.write_to_log_file(logs,subject)
-            self.full_notify(subject=subject, message=body)
-            self.send_mail(subject=subject, body=body)
-            
\ No newline at end of file
+            self.full_notify(subject=subject, message=body)
\ No newline at end of file
@@ -0,0 +1,181 @@
+import gzip
+import io
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3.util.retry import Retry
+
+try:
+    # Optional: decodes response bytes considerably faster than the json module
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+# Only the parts of a response the fetchers read; _index, _id, _score, _shards and totals are dropped
+SEARCH_FILTER = "hits.hits._source,hits.hits.fields,hits.hits.sort,aggregations,pit_id,error"
+# status is kept so every search keeps its slot in the responses array
+MSEARCH_FILTER = "responses.status,responses.hits.hits._source,responses.hits.hits.fields,responses.hits.hits.sort,responses.error"
+
+
+class ElasticClient:
+    """Pooled HTTP client shared by every Elasticsearch fetcher in the process."""
+
+    def __init__(self, api_key, connect_timeout=5, read_timeout=30, retries=3, backoff=0.5, pool_size=10, compress=True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.compress = compress
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"ApiKey {api_key}",
+            "kbn-xsrf": "true",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+        })
+        # Searches are read-only, so POST is safe to retry alongside GET.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST", "DELETE"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Response bytes received on the wire, so the cost of a cycle can be measured
+        self._bytes = 0
+        self._bytes_lock = threading.Lock()
+
+    def _receive(self, response):
+        """
+        Read a streamed response's body as sent and count its bytes.
+
+        The count is of the compressed bytes on the wire, whether or not the reply carried
+        a Content-Length. The connection is then released and the body is handed back to
+        requests as a buffered stream, so response.content decodes it as usual.
+        """
+        raw = response.raw
+        try:
+            body = raw.read(decode_content=False)
+        finally:
+            raw.release_conn()
+        with self._bytes_lock:
+            self._bytes += len(body)
+        response.raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=raw.headers,
+            status=raw.status,
+            reason=raw.reason,
+            preload_content=False,
+            decode_content=True,
+        )
+        return response
+
+    def take_bytes(self):
+        """Return the response bytes received since the last call and reset the count."""
+        with self._bytes_lock:
+            received, self._bytes = self._bytes, 0
+        return received
+
+    def post(self, url, json=None, **kwargs):
+        """POST a JSON body over the pooled session, gzip-compressing it when enabled."""
+        headers = kwargs.pop("headers", {})
+        data = None
+        if json is not None:
+            data = _dumps(json).encode("utf-8")
+            if self.compress:
+                data = gzip.compress(data)
+                headers = {**headers, "Content-Encoding": "gzip"}
+        return self._receive(self.session.post(url, data=data, headers=headers, timeout=self.timeout, stream=True, **kwargs))
+
+    def search(self, url, body, filter_path=SEARCH_FILTER, **kwargs):
+        """
+        POST a search with a slimmed response.
+
+        Total hit counting is skipped unless the body asks for it, and filter_path strips
+        the response down to what the fetchers read.
+        """
+        body = dict(body, track_total_hits=body.get("track_total_hits", False))
+        return self.post(url, json=body, params={"filter_path": filter_path}, **kwargs)
+
+    def msearch(self, url, searches, filter_path=MSEARCH_FILTER, **kwargs):
+        """
+        Run several searches in one _msearch round trip, with slimmed responses.
+
+        :param url: The _msearch endpoint, optionally scoped to an index.
+        :param searches: List of (header, body) pairs, one per search.
+        """
+        lines = []
+        for header, body in searches:
+            lines.append(_dumps(header))
+            lines.append(_dumps(dict(body, track_total_hits=body.get("track_total_hits", False))))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        headers = {"Content-Type": "application/x-ndjson"}
+        if self.compress:
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        return self._receive(self.session.post(url, data=data, headers=headers, params={"filter_path": filter_path}, timeout=self.timeout, stream=True, **kwargs))
+
+    @staticmethod
+    def decode(response):
+        """Decode a JSON response body, straight from bytes with msgspec when it is installed."""
+        if msgspec is not None:
+            return msgspec.json.decode(response.content)
+        return response.json()
+
+    def paginate(self, base_url, index, query, page_size, sort=None, keep_alive="1m"):
+        """
+        Yield every page of hits for a query, paging with search_after over a point-in-time.
+
+        :param base_url: Elasticsearch base URL.
+        :param index: Index pattern the point-in-time is opened on.
+        :param query: Search body without size, sort or pagination.
+        :param page_size: Hits per page.
+        :param sort: Sort clause; a _shard_doc tiebreaker is appended.
+        """
+        response = self.post(f"{base_url}/{index}/_pit?keep_alive={keep_alive}")
+        response.raise_for_status()
+        pit_id = self.decode(response)["id"]
+        body = dict(query, size=page_size, sort=list(sort or [{"@timestamp": "asc"}]) + [{"_shard_doc": "asc"}])
+        try:
+            while True:
+                body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                response = self.search(f"{base_url}/_search", body)
+                response.raise_for_status()
+                data = self.decode(response)
+                pit_id = data.get("pit_id", pit_id)
+                hits = data.get("hits", {}).get("hits", [])
+                if hits:
+                    yield hits
+                if len(hits) < page_size:
+                    break
+                body["search_after"] = hits[-1]["sort"]
+        finally:
+            try:
+                self.session.delete(f"{base_url}/_pit", json={"id": pit_id}, timeout=self.timeout)
+            except requests.RequestException:
+                pass
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+def _dumps(body):
+    return json.dumps(body, separators=(",", ":"))
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_client(api_key, **kwargs):
+    """Return the process-wide ElasticClient, creating it on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = ElasticClient(api_key, **kwargs)
+        return _shared_client
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CycleExecutor:
+    """Run the checks of one polling cycle concurrently with a per-check deadline."""
+
+    def __init__(self, timeout=None, max_workers=None, log=print):
+        self.timeout = timeout or None
+        self.log = log
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kibalert-check")
+        # Checks that overran their deadline keep running in the pool; track them
+        # so the next cycle does not start a second copy of the same check.
+        self._inflight = {}
+
+    async def _run_check(self, name, func):
+        """Run one blocking check in the worker pool and time it."""
+        started = time.perf_counter()
+        previous = self._inflight.get(name)
+        if previous is not None and not previous.done():
+            return {"name": name, "status": "skipped", "duration": 0.0, "result": None}
+
+        future = self._pool.submit(func)
+        self._inflight[name] = future
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            result, status = None, "timeout"
+        except Exception as e:
+            result, status = e, "error"
+        return {"name": name, "status": status, "duration": time.perf_counter() - started, "result": result}
+
+    async def _run_all(self, checks):
+        return await asyncio.gather(*(self._run_check(name, func) for name, func in checks))
+
+    def run(self, checks):
+        """
+        Run all checks concurrently and report how long each one took.
+
+        :param checks: List of (name, callable) pairs.
+        :return: List of dicts with name, status, duration and result per check.
+        """
+        started = time.perf_counter()
+        results = asyncio.run(self._run_all(checks))
+        for item in results:
+            message = f"[+] Check {item['name']}: {item['status']} in {item['duration']:.2f}s"
+            if item["status"] == "error":
+                message += f" ({item['result']})"
+            elif item["status"] == "timeout":
+                message += f" (deadline {self.timeout}s exceeded, still running in background)"
+            elif item["status"] == "skipped":
+                message += " (previous run still in progress)"
+            self.log(message)
+        self.log(f"[+] Cycle finished in {time.perf_counter() - started:.2f}s")
+        return results
+
+    def shutdown(self):
+        """Stop accepting checks without waiting for overrunning ones."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -15,7 +15,18 @@ class GeminiAI(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def generateAIresponse(self):
+    def stream_text(self, response):
+        """Yield the text of each streamed chunk, skipping chunks blocked by safety filters."""
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # A blocked chunk has no text parts; chunk.text raises instead of returning ''
+                self.log_message('[-] Gemini AI skipped a chunk blocked by safety filters')
+                continue
+            yield text
+
+    def generateAIresponse(self, cancel=None, logs=None):
         if not self.MODEL_NAME:
             self.log_message('[+] No AI model selected')
             return
@@ -25,29 +36,31 @@ class GeminiAI(Base):
         if self.AI_PROMPT:
             content.append(self.AI_PROMPT)
 
-        # Append file content as text
-        for file_path in [self.USER_LOG_FILE, self.APP_LOG_FILE]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-                    content.append(file_content)
-            except FileNotFoundError:
-                self.log_message(f"File not found: {file_path}")
-            except Exception as e:
-                self.log_message(f"Error reading file {file_path}: {e}")
+        # Append the compacted log content as text
+        logs = self.compact_logs() if logs is None else logs
+        if logs:
+            content.append(logs)
         try:
             if len(content) > 0:
-                model = genai.GenerativeModel(self.MODEL_NAME, system_instruction=self.AI_CONTEXT, safety_settings=None)
-                response = model.generate_content(content, stream=True)
-                response.resolve()
+                cache_key, report = self.cached_report('Gemini AI', self.MODEL_NAME, logs)
+                streamed = report is None and self.AI_STREAM
+                if report is not None:
+                    chunks = [report]
+                else:
+                    model = genai.GenerativeModel(self.MODEL_NAME, system_instruction=self.AI_CONTEXT, safety_settings=None)
+                    response = model.generate_content(content, stream=self.AI_STREAM, request_options={"timeout": self.AI_TIMEOUT})
+                    chunks = self.stream_text(response) if streamed else [response.text]
                 report_name = f"report{uuid.uuid4()}.md"
                 self.GENERATED_FILES.append(report_name)
-                with open(report_name, "w", encoding="utf-8") as f:
-                    f.write(response.text)
-                    self.log_message('AI response report has been saved to ' + report_name)
+                text = self.stream_report('Gemini AI', chunks, report_name, cancel, preview=streamed)
+                if text is None:
+                    return
+                if report is None:
+                    self.cache_report(cache_key, text)
+                self.log_message('AI response report has been saved to ' + report_name)
                 self.full_notify(subject='AI Analysis',message=report_name,file_path=report_name)
                 self.log_message('[+] AI response generation complete ...')
-                return response
+                return text
             else:
                 self.log_message('[+] Skipping, no content found...')
                 return
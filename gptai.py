@@ -7,12 +7,22 @@ class GptAI(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def promptGPT(self):
+    @staticmethod
+    def stream_text(stream):
+        """Yield the content of each streamed chunk, closing the stream however iteration ends."""
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    def promptGPT(self, cancel=None, logs=None):
         if not self.GPT_API_KEY:
             self.log_message('[+] No OpenAI API key provided')
             return
         
-        client = OpenAI(api_key=self.GPT_API_KEY)  
+        client = OpenAI(api_key=self.GPT_API_KEY, timeout=self.AI_TIMEOUT)
         
         self.log_message('[-] OpenAI generation started...')   
         content = []
@@ -23,40 +33,45 @@ class GptAI(Base):
         if self.AI_PROMPT:
             content.append({"role": "user", "content": self.AI_PROMPT})
 
-        # Append file content as text
-        for file_path in [self.USER_LOG_FILE, self.APP_LOG_FILE]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_content = f.read().strip()
-                    if file_content:
-                        content.append({"role": "user", "content": file_content})
-            except FileNotFoundError:
-                self.log_message(f"[-] File not found: {file_path}")
-            except Exception as e:
-                self.log_message(f"[-] Error reading file {file_path}: {e}")
+        # Append the compacted log content as text
+        logs = self.compact_logs() if logs is None else logs
+        if logs:
+            content.append({"role": "user", "content": logs})
 
         if not content:
             self.log_message('[+] Skipping, no content found...')
             return
 
         try:
-            response = client.chat.completions.create(
-                model=self.GPT_MODEL_NAME, 
-                messages=content,
-                temperature=0.7
-            )
-            
-            report_text = response.choices[0].message.content
+            cache_key, cached_text = self.cached_report('OpenAI', self.GPT_MODEL_NAME, logs)
+            streamed = cached_text is None and self.AI_STREAM
+            if cached_text is not None:
+                chunks = [cached_text]
+            else:
+                response = client.chat.completions.create(
+                    model=self.GPT_MODEL_NAME, 
+                    messages=content,
+                    temperature=0.7,
+                    stream=streamed
+                )
+                if streamed:
+                    chunks = self.stream_text(response)
+                else:
+                    chunks = [response.choices[0].message.content]
+
             report_name = f"report_{uuid.uuid4()}.md"
             self.GENERATED_FILES.append(report_name)
-            with open(report_name, "w", encoding="utf-8") as f:
-                f.write(report_text)
+            report_text = self.stream_report('OpenAI', chunks, report_name, cancel, preview=streamed)
+            if report_text is None:
+                return
+            if cached_text is None:
+                self.cache_report(cache_key, report_text)
             
             self.log_message(f'[+] OpenAI report saved to {report_name}')
             self.full_notify(subject='AI Analysis', message=report_name, file_path=report_name)
             self.log_message('[+] OpenAI generation complete ...')
 
-            return response
+            return report_text
         except Exception as e:
             self.log_message(f'[-] OpenAI generation failed: {e}')
             return
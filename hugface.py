@@ -1,39 +1,20 @@
-import re
 import uuid
 from huggingface_hub import InferenceClient
 from  base import Base
+from classifier import LogClassifier
 
 class HuggingFaceAI(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        # Category patterns are compiled once and reused for every file
+        self.classifier = LogClassifier(self.LOG_CATEGORIES, self.LOG_CATEGORY_LINES)
 
     def preprocess_logs(self, log_file):
         """
         Extracts and categorizes critical logs for better AI analysis.
         """
-        error_patterns = {
-            "SSL Errors": r"(OpenSSL error|SSL routines::wrong version number)",
-            "PHP Errors": r"(PHP Fatal error|PHP Warning|Undefined variable|Attempt to read property on null)",
-            "Kubernetes Errors": r"(Evicted|OOMKilled|CrashLoopBackOff|Pod is in failed state)",
-            "Network Issues": r"(connection refused|timeout|failed to connect|network unreachable)"
-        }
-
-        categorized_logs = {key: [] for key in error_patterns}
-
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                for line in lines:
-                    for category, pattern in error_patterns.items():
-                        if re.search(pattern, line, re.IGNORECASE):
-                            categorized_logs[category].append(line.strip())
-
-            formatted_logs = []
-            for category, logs in categorized_logs.items():
-                if logs:
-                    formatted_logs.append(f"## {category}\n- " + "\n- ".join(logs))
-
-            return "\n".join(formatted_logs)
+            return self.classifier.format(log_file)
 
         except FileNotFoundError:
             if self.VERBOSE:
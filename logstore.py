@@ -0,0 +1,107 @@
+import gzip
+import os
+import shutil
+import threading
+import time
+
+
+class RotatingLogStore:
+    """Size- and age-bounded log files with numbered, optionally gzipped, rotated segments."""
+
+    def __init__(self, max_bytes=5 * 1024 * 1024, max_age=86400, backups=5, compress=True):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.compress = compress
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _segment(self, path, index):
+        return f"{path}.{index}.gz" if self.compress else f"{path}.{index}"
+
+    def started(self, path):
+        """
+        When the live file was started, taken from the files themselves.
+
+        That is the time of the last rotation, the mtime of segment 1, or else the file's
+        creation time where the platform records it. A file with neither is dated from
+        when it was first seen.
+        """
+        try:
+            return os.path.getmtime(self._segment(path, 1))
+        except OSError:
+            pass
+        try:
+            return os.stat(path).st_birthtime
+        except (OSError, AttributeError):
+            return self._started.setdefault(path, time.time())
+
+    def should_rotate(self, path):
+        """True once the file has reached max_bytes or was started max_age seconds ago."""
+        path = os.path.abspath(path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        return size >= self.max_bytes or (self.max_age and time.time() - self.started(path) >= self.max_age)
+
+    def maybe_rotate(self, path):
+        """Rotate the file if it is over its size or age cap."""
+        if self.should_rotate(path):
+            self.rotate(path)
+
+    def rotate(self, path):
+        """Move the live file to segment 1, shifting older segments and dropping the oldest."""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._started[path] = time.time()
+            if not os.path.exists(path):
+                return
+            oldest = self._segment(path, self.backups)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for index in range(self.backups - 1, 0, -1):
+                segment = self._segment(path, index)
+                if os.path.exists(segment):
+                    os.replace(segment, self._segment(path, index + 1))
+            if self.backups < 1:
+                os.remove(path)
+            elif self.compress:
+                with open(path, "rb") as source, gzip.open(self._segment(path, 1), "wb") as target:
+                    shutil.copyfileobj(source, target)
+                os.remove(path)
+            else:
+                os.replace(path, self._segment(path, 1))
+                # Segment 1's mtime dates the start of the next live file
+                os.utime(self._segment(path, 1))
+
+    @staticmethod
+    def tail_bytes(path, max_bytes):
+        """Return at most the last max_bytes of a file, starting on a line boundary."""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size <= max_bytes:
+                f.seek(0)
+                return f.read().decode("utf-8", errors="replace")
+            f.seek(size - max_bytes)
+            data = f.read()
+        newline = data.find(b"\n")
+        if newline != -1:
+            data = data[newline + 1:]
+        return data.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def tail_records(path, count, block_size=8192):
+        """Return the last count lines of a file, reading backwards in blocks."""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= count:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        return lines[-count:] if count else []
@@ -0,0 +1,74 @@
+import atexit
+import os
+import threading
+
+
+class BufferedLogWriter:
+    """Background writer that batches appends to log files and flushes them periodically or when full."""
+
+    def __init__(self, flush_interval=1.0, max_lines=1000, store=None):
+        self.flush_interval = flush_interval
+        self.store = store
+        self.max_lines = max_lines
+        self._buffers = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kibalert-logwriter", daemon=True)
+        atexit.register(self.close)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def write(self, path, text):
+        """Buffer text to be appended to path."""
+        # One buffer per file however the path is spelled
+        path = os.path.abspath(path)
+        with self._lock:
+            self._buffers.setdefault(path, []).append(text)
+            self._pending += 1
+            pending = self._pending
+        if pending >= self.max_lines:
+            self._wake.set()
+        # The buffer is bounded: if the writer thread falls behind, the caller flushes
+        if pending >= self.max_lines * 2:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far; returns once it is on disk."""
+        with self._io_lock:
+            with self._lock:
+                buffers, self._buffers, self._pending = self._buffers, {}, 0
+            for path, chunks in buffers.items():
+                try:
+                    if self.store is not None:
+                        self.store.maybe_rotate(path)
+                    with open(path, "a") as f:
+                        f.write("".join(chunks))
+                except OSError as e:
+                    print(f"[-] Failed to write log file {path}: {e}")
+
+    def rotate(self, path):
+        """Flush pending lines, then start a fresh file for path."""
+        path = os.path.abspath(path)
+        self.flush()
+        if self.store is not None:
+            with self._io_lock:
+                self.store.rotate(path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
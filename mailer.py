@@ -0,0 +1,108 @@
+import os
+import smtplib
+import threading
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+
+def build_message(sender, receivers, subject, body='', attachments=None, log=print):
+    """Build a MIME email with optional file attachments."""
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = ", ".join(receivers)
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain"))
+
+    for attachment in attachments or []:
+        try:
+            with open(attachment, "rb") as file:
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(file.read())
+                encoders.encode_base64(part)
+                # Add the header with the filename
+                part.add_header(
+                    "Content-Disposition",
+                    f"attachment; filename={os.path.basename(attachment)}"
+                )
+                msg.attach(part)
+        except Exception as e:
+            log(f"Failed to attach file: {e}")
+    return msg
+
+
+class SMTPSession:
+    """Authenticated SMTP connection kept open across sends, reconnecting on failure."""
+
+    def __init__(self, server, port, user, password, timeout=30):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self._smtp = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        smtp.starttls()
+        smtp.login(self.user, self.password)
+        self._smtp = smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def sendmail(self, sender, receivers, message):
+        """Send over the open connection, reconnecting once if the server dropped it."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._smtp is None:
+                        self._connect()
+                    self._smtp.sendmail(sender, receivers, message)
+                    return
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPSenderRefused, OSError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def close(self):
+        """Log out and close the connection."""
+        with self._lock:
+            self._disconnect()
+
+
+class MailDigest:
+    """Collects a cycle's full notifications so they go out as one email per receiver list."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, receivers, subject, body='', attachment=None):
+        with self._lock:
+            self._entries.setdefault(tuple(receivers), []).append((subject, body, attachment))
+
+    def drain(self):
+        """
+        Return and clear the collected notifications.
+
+        :return: List of (receivers, subject, body, attachments), one per receiver list.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, {}
+
+        digests = []
+        for receivers, items in entries.items():
+            subject = items[0][0] if len(items) == 1 else f"Kibalert digest: {len(items)} notifications"
+            body = "\n\n".join(f"{item_subject}\n{'-' * len(item_subject)}\n{item_body}" for item_subject, item_body, _ in items)
+            # The same log file is attached by most checks; attach it once
+            attachments = list(dict.fromkeys(attachment for _, _, attachment in items if attachment))
+            digests.append((list(receivers), subject, body, attachments))
+        return digests
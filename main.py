@@ -1,17 +1,12 @@
-from datetime import datetime
 import os
+import re
+import json
 import sys
 import argparse
 import time
 from dotenv import load_dotenv
-from rules import  Rule
-from metrics import Metrics
-from monitor import Monitor
-from elasticlogs import ElasticLogs
-from genai import GeminiAI
-from deepseek import DeepSeek
-from gptai import GptAI
-from base import Base
+from runtime import Runtime
+from scheduler import CronExpression
 
 # Command Line Args Error Handling
 def error_handler(errmsg):
@@ -42,6 +37,7 @@ def argument_handler():
     parser.add_argument("--smtp_password", type=str, default=os.getenv('SMTP_PASSWORD', ''), help="SMTP password")
     parser.add_argument("--userlog", type=str, default=os.getenv('USER_LOG_FILE', 'user_activity.log'), help="User activity log file")
     parser.add_argument("--hits_size", type=int, default=int(os.getenv('HITS_SIZE', 100)), help="Hits size per query")
+    parser.add_argument("--check_timeout", type=int, default=int(os.getenv('CHECK_TIMEOUT', 120)), help="Deadline in seconds for each check in a cycle")
 
     return parser.parse_args()
 
@@ -51,122 +47,153 @@ def parse_list_remove_blanks(items=None):
         items =  items.split(',')
         return list(filter(lambda x: x.strip(), items))
 
+
+# Split AI run schedules; cron expressions contain commas, so ';' separates them when present
+def parse_schedules(items=None):
+    if items and ';' in items:
+        return list(filter(lambda x: x.strip(), items.split(';')))
+    return parse_list_remove_blanks(items)
+
     
 def main(url, api_key, slack_token, webhook_url, smtp_server, smtp_port, smtp_user, smtp_password, receiver,
          slack_channel, sleep_time, notify_limit, hits_size, log_file, save, verbose, user_log_file,
-         latency_threshold, cpu_threshold, rule_id, SERVICE_RULE_IDS):
+         latency_threshold, cpu_threshold, rule_id, SERVICE_RULE_IDS, check_timeout=None):
     """Monitor anomalies and send notifications."""
     if verbose:
         print("Kibalert monitoring started...")
-    okay_status = True
-    while okay_status:
+
+    #If no api key is provided, exit
+    if not api_key:
+        if verbose:
+            print('\t[!] No API key provided. Exiting...')
+        return
+
+    # Read schedule from .env and split into a list
+    ai_run_schedules= parse_schedules(os.getenv("AI_RUN_SCHEDULES", "00:00,12:00"))
+    for schedule in ai_run_schedules or []:
+        try:
+            CronExpression(schedule)
+        except ValueError as e:
+            error_handler(f"AI_RUN_SCHEDULES entry '{schedule.strip()}' is invalid: {e}")
+    last_run_file= "last_run.json"
+
+    # Custom log categories are a JSON object of category name to regular expression
+    log_categories = None
+    if os.getenv('LOG_CATEGORIES'):
         try:
-            #If no api key is provided, exit
-            if not api_key:
+            log_categories = json.loads(os.getenv('LOG_CATEGORIES'))
+        except ValueError as e:
+            error_handler(f"LOG_CATEGORIES is not valid JSON: {e}")
+        if not isinstance(log_categories, dict):
+            error_handler("LOG_CATEGORIES must be a JSON object of category name to regular expression")
+        for category, pattern in log_categories.items():
+            try:
+                re.compile(pattern, re.IGNORECASE)
+            except (re.error, TypeError) as e:
+                error_handler(f"LOG_CATEGORIES pattern for '{category}' is not a valid regular expression: {e}")
+
+    # Settings fields, resolved once by the runtime and shared by every component for the lifetime of the process
+    base_config = {
+    'kibana_url': url,
+    'api_key': api_key,
+    'slack_token': slack_token,
+    'webhook_url': webhook_url,
+    'smtp_server': smtp_server,
+    'smtp_port': smtp_port,
+    'smtp_user': smtp_user,
+    'smtp_password': smtp_password,
+    'email_receivers': parse_list_remove_blanks(receiver),
+    'slack_channel': slack_channel,
+    'sleep_time': sleep_time,
+    'notify_limit': notify_limit,
+    'hits_size': hits_size,
+    'app_log_file': log_file,
+    'save': save,
+    'verbose': verbose,
+    'user_log_file': user_log_file,
+    'latency_threshold': latency_threshold,
+    'cpu_threshold': cpu_threshold,
+    'hosts_rule_ids': parse_list_remove_blanks(rule_id),
+    'service_rule_ids': parse_list_remove_blanks(SERVICE_RULE_IDS),
+    'ai_prompt' : 'Analyse the data and provide insights and resources like links to learn more or address the issues. Generate a detailed report to include findings, actions and reccommendations',
+    'model_name':os.getenv('AI_MODEL',None),
+    'ai_context' : os.getenv('AI_CONTEXT',''),
+    'deepseek_api_key': os.getenv('DEEPSEEK_API_KEY',None),
+    'deepseek_api_url':os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions'),
+    'deepseek_api_model': os.getenv('DEEPSEEK_API_MODEL','deepseek-model'),
+    'gpt_model_name': os.getenv('GPT_MODEL_NAME', 'gpt-3.5-turbo'),
+    'gpt_api_key':os.getenv('GPT_API_KEY',None),
+    'ai_run_schedules':ai_run_schedules,
+    'last_run_file':last_run_file,
+    'es_connect_timeout': float(os.getenv('ES_CONNECT_TIMEOUT', 5)),
+    'es_read_timeout': float(os.getenv('ES_READ_TIMEOUT', 30)),
+    'es_retries': int(os.getenv('ES_RETRIES', 3)),
+    'es_backoff': float(os.getenv('ES_BACKOFF', 0.5)),
+    'es_compress': os.getenv('ES_COMPRESS', 'True').upper().startswith('T'),
+    'host_downtime_lookback': os.getenv('HOST_DOWNTIME_LOOKBACK', '24h'),
+    'host_buckets_size': int(os.getenv('HOST_BUCKETS_SIZE', 1000)),
+    'cursor_file': os.getenv('CURSOR_FILE', 'cursors.json'),
+    'cursor_max_lookback': int(os.getenv('CURSOR_MAX_LOOKBACK', 3600)),
+    'cursor_ingest_delay': int(os.getenv('CURSOR_INGEST_DELAY', 30)),
+    'notify_rate': float(os.getenv('NOTIFY_RATE', 1.0)),
+    'notify_burst': int(os.getenv('NOTIFY_BURST', 3)),
+    'notify_batch_size': int(os.getenv('NOTIFY_BATCH_SIZE', 10)),
+    'mail_digest_mode': os.getenv('MAIL_DIGEST', 'False').upper().startswith('T'),
+    'alert_cache_file': os.getenv('ALERT_CACHE_FILE', 'alerts.db'),
+    'alert_renotify_ttl': int(os.getenv('ALERT_RENOTIFY_TTL', 3600)),
+    'log_flush_interval': float(os.getenv('LOG_FLUSH_INTERVAL', 1.0)),
+    'log_buffer_lines': int(os.getenv('LOG_BUFFER_LINES', 1000)),
+    'log_max_bytes': int(os.getenv('LOG_MAX_BYTES', 5242880)),
+    'log_max_age': int(os.getenv('LOG_MAX_AGE', 86400)),
+    'log_backups': int(os.getenv('LOG_BACKUPS', 5)),
+    'log_compress': os.getenv('LOG_COMPRESS', 'True').upper().startswith('T'),
+    'ai_input_bytes': int(os.getenv('AI_INPUT_BYTES', 1048576)),
+    'ai_timeout': int(os.getenv('AI_TIMEOUT', 300)),
+    'ai_token_budget': int(os.getenv('AI_TOKEN_BUDGET', 8000)),
+    'ai_run_window': int(os.getenv('AI_RUN_WINDOW', 1800)),
+    'latency_baseline_window': int(os.getenv('LATENCY_BASELINE_WINDOW', 120)),
+    'latency_baseline_min_samples': int(os.getenv('LATENCY_BASELINE_MIN_SAMPLES', 20)),
+    'latency_zscore': float(os.getenv('LATENCY_ZSCORE', 3.5)),
+    'latency_min_delta': float(os.getenv('LATENCY_MIN_DELTA', 50)),
+    'latency_sketch_file': os.getenv('LATENCY_SKETCH_FILE', 'latency_sketches.json'),
+    'latency_sketch_accuracy': float(os.getenv('LATENCY_SKETCH_ACCURACY', 0.01)),
+    'latency_sketch_save_interval': int(os.getenv('LATENCY_SKETCH_SAVE_INTERVAL', 300)),
+    'memory_threshold': float(os.getenv('MEMORY_THRESHOLD', 90)),
+    'disk_threshold': float(os.getenv('DISK_THRESHOLD', 90)),
+    'resource_trend_window': int(os.getenv('RESOURCE_TREND_WINDOW', 30)),
+    'resource_trend_min_samples': int(os.getenv('RESOURCE_TREND_MIN_SAMPLES', 5)),
+    'resource_forecast_horizon': int(os.getenv('RESOURCE_FORECAST_HORIZON', 3600)),
+    'ai_stream': os.getenv('AI_STREAM', 'True').upper().startswith('T'),
+    'ai_stream_preview': os.getenv('AI_STREAM_PREVIEW', 'True').upper().startswith('T'),
+    'report_cache_file': os.getenv('REPORT_CACHE_FILE', 'reports.db'),
+    'report_cache_ttl': int(os.getenv('REPORT_CACHE_TTL', 86400)),
+    'log_template_similarity': float(os.getenv('LOG_TEMPLATE_SIMILARITY', 0.5)),
+    'log_template_max': int(os.getenv('LOG_TEMPLATE_MAX', 1000)),
+    'log_template_top': int(os.getenv('LOG_TEMPLATE_TOP', 10)),
+    'log_categories': log_categories,
+    'log_category_lines': int(os.getenv('LOG_CATEGORY_LINES', 50)),
+    }
+
+    # Build every component once and reuse it across cycles
+    runtime = Runtime(base_config, check_timeout=check_timeout)
+
+    okay_status = True
+    try:
+        while okay_status:
+            try:
+                runtime.run_cycle()
+
+                if verbose:
+                    print('\t Sleeping for {} seconds...'.format(sleep_time))
+                time.sleep(sleep_time)
+
+            except Exception as e:
                 if verbose:
-                    print('\t[!] No API key provided. Exiting...')
-                break
-            
-            if receiver:
-                receiver = parse_list_remove_blanks(receiver)
-            if SERVICE_RULE_IDS:
-                SERVICE_RULE_IDS = parse_list_remove_blanks(SERVICE_RULE_IDS)
-            if rule_id:
-                rule_id = parse_list_remove_blanks(rule_id)
-            
-            # Read schedule from .env and split into a list
-            ai_run_schedules= parse_list_remove_blanks(os.getenv("AI_RUN_SCHEDULES", "00:00,12:00"))
-            last_run_file= "last_run.json"
-        
-            # Configure base class params
-            base_config = {
-            'kibana_url': url,
-            'api_key': api_key,
-            'slack_token': slack_token,
-            'webhook_url': webhook_url,
-            'smtp_server': smtp_server,
-            'smtp_port': smtp_port,
-            'smtp_user': smtp_user,
-            'smtp_password': smtp_password,
-            'receiver': receiver,
-            'slack_channel': slack_channel,
-            'sleep_time': sleep_time,
-            'notify_limit': notify_limit,
-            'hits_size': hits_size,
-            'log_file': log_file,
-            'save': save,
-            'verbose': verbose,
-            'user_log_file': user_log_file,
-            'latency_threshold': latency_threshold,
-            'cpu_threshold': cpu_threshold,
-            'rule_id': rule_id,
-            'SERVICE_RULE_IDS': SERVICE_RULE_IDS,
-            'ai_prompt' : 'Analyse the data and provide insights and resources like links to learn more or address the issues. Generate a detailed report to include findings, actions and reccommendations',
-            'ai_model':os.getenv('AI_MODEL',None),
-            'ai_context' : os.getenv('AI_CONTEXT',''),
-            'deep_seek_key' : os.getenv('DEEPSEEK_API_KEY',None),
-            'deep_seek_url' :os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions'),
-            'deep_seek_model': os.getenv('DEEPSEEK_API_MODEL','deepseek-model'),
-            'openai_model': os.getenv('GPT_MODEL_NAME', 'gpt-3.5-turbo'),
-            'openai_api_key' :os.getenv('GPT_API_KEY',None),
-            'ai_run_schedules':ai_run_schedules,
-            'last_run_file':last_run_file
-            }
-                        
-            # Config
-            base  = Base(**base_config)
-            # Fetch from rule
-            rule = Rule(**base_config)
-            rule.fetch_host_alerts()   # Host CPU Usage
-            rule.fetch_service_alerts() # Service Latency  
-                       
-            # Fetch Host and Latency Metrics
-            metrics = Metrics(**base_config)
-            metrics.get_latency()  # Fetch and process latency data
-            metrics.get_cpu_usage() # Fetch and process CPU usage data
-            
-            # Check Downtime
-            monitor = Monitor(**base_config)
-            monitor.check_host_downtime()
-            monitor.check_service_downtime()
-            
-            # Collect Logs
-            logs = ElasticLogs(**base_config)
-            logs.fetch_logs() 
-                      
-            # Run AI Based on Schedule
-            print(base.run_ai_now())
-            if base.run_ai_now():
-            
-                # Gemini AI
-                ai = GeminiAI(**base_config)
-                ai.generateAIresponse()
-
-                # Deep Seek
-                deepseek = DeepSeek(**base_config)
-                deepseek.generateReport()
-
-                # OpenAI GPT
-                gpt = GptAI(**base_config)
-                gpt.promptGPT()
-                
-                # Update next run time 
-                (last_run_tracker,start_time)  = base.run_ai_now()
-                last_run_tracker[start_time]['last_run'] = str(datetime.now())
-                base.save_last_run(last_run_tracker)
-
-                # Cleanup old log and report files
-                base.clean_up_files()
-
-            if verbose:
-                print('\t Sleeping for {} seconds...'.format(sleep_time))
-            time.sleep(sleep_time)
-           
-        except Exception as e:
-            if verbose:
-                print(f"Unexpected error: {e}")
-                print('\n\n\t Sleeping for {} seconds...\n'.format(sleep_time))
-            time.sleep(sleep_time)
+                    print(f"Unexpected error: {e}")
+                    print('\n\n\t Sleeping for {} seconds...\n'.format(sleep_time))
+                time.sleep(sleep_time)
+    finally:
+        runtime.close()
 
 if __name__ == "__main__":
     load_dotenv()
@@ -193,5 +220,6 @@ if __name__ == "__main__":
         latency_threshold=args.latency,
         cpu_threshold=args.cpu,
         rule_id=args.id,
-        SERVICE_RULE_IDS=args.service
+        SERVICE_RULE_IDS=args.service,
+        check_timeout=args.check_timeout
     )
\ No newline at end of file
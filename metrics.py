@@ -1,18 +1,73 @@
 import requests
 from base import Base
+from baselines import LatencyBaselines, PHASES
+from esclient import SEARCH_FILTER
+from projection import Projection
+from sketches import LatencySketches
+from trends import RESOURCES, ResourceTrends
+import math
 import time
 
+# Every field is read from doc values, so Elasticsearch never loads _source for these checks
+LATENCY = Projection("LatencyRecord", {
+    "url": ("url.full", "unknown"),
+    # None when a monitor has no such phase, e.g. TLS on plain HTTP
+    "tcp": ("tcp.rtt.connect.us", None),
+    "tls": ("tls.rtt.handshake.us", None),
+    "http": ("http.rtt.total.us", None),
+    "timestamp": ("@timestamp", "unknown"),
+}, docvalues=("url", "tcp", "tls", "http", "timestamp"), extra=("phase", "baseline", "score", "percentiles", "level"))
+
+# Every heartbeat of a monitor in the window comes back as inner hits of its collapsed latest hit;
+# 100 is Elasticsearch's default index.max_inner_result_window
+HEARTBEATS = "heartbeats"
+HEARTBEATS_SIZE = 100
+LATENCY_FILTER = f"{SEARCH_FILTER},hits.hits.inner_hits.{HEARTBEATS}.hits.hits.fields"
+
+CPU = Projection("CpuRecord", {
+    "name": ("host.name", "unknown"),
+    "timestamp": ("@timestamp", lambda: time.strftime("%Y-%m-%d %H:%M:%S")),
+    "platform": ("host.os.platform", "unknown"),
+    "kernel": ("host.os.kernel", "unknown"),
+    "cpu_usage": ("host.cpu.usage", None),
+    "sys_cores": ("system.cpu.cores", "0.00"),
+    "sys_cpu_usage": ("system.cpu.system.pct", "0.00"),
+    "sys_user_usage": ("system.cpu.user.pct", "0.00"),
+    "sys_load": ("system.load.1", "unavailable"),
+    "load_cores": ("system.load.cores", "unavailable"),
+    "memory_usage": ("system.memory.actual.used.pct", "unknown"),
+    "disk_usage": ("system.filesystem.used.pct", "unknown"),
+}, extra=("level",), docvalues=("name", "timestamp", "platform", "kernel", "cpu_usage", "sys_cores", "sys_cpu_usage", "sys_user_usage", "sys_load", "load_cores", "memory_usage", "disk_usage"))
+
+# Metricbeat reports memory and filesystems in their own metricsets, apart from CPU
+MEMORY = Projection("MemoryRecord", {
+    "name": ("host.name", "unknown"),
+    "timestamp": ("@timestamp", None),
+    "memory_usage": ("system.memory.actual.used.pct", None),
+}, docvalues=("name", "timestamp", "memory_usage"))
+
 class Metrics(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        # Per-URL latency history is kept across cycles so each URL is judged against its own normal
+        self.baselines = LatencyBaselines(
+            window=self.LATENCY_BASELINE_WINDOW,
+            min_samples=self.LATENCY_BASELINE_MIN_SAMPLES,
+            threshold=self.LATENCY_ZSCORE,
+            min_delta=self.LATENCY_MIN_DELTA,
+        )
+        self.sketches = LatencySketches(self.LATENCY_SKETCH_FILE, self.LATENCY_SKETCH_ACCURACY)
+        self._sketches_saved = time.monotonic()
+        # Per-host CPU, memory and disk history for early warnings before a threshold is crossed
+        self.trends = ResourceTrends(self.RESOURCE_TREND_WINDOW, self.RESOURCE_TREND_MIN_SAMPLES)
 
-    def fetch_data(self, endpoint, query):
+    def fetch_data(self, endpoint, query, filter_path=SEARCH_FILTER):
         """Fetch data from Elasticsearch."""
         url = f"{self.KIBANA_URL}/{endpoint}"
         try:
-            response = requests.post(url, headers=self.headers, json=query)
+            response = self.es.search(url, query, filter_path)
             response.raise_for_status()
-            return response.json()
+            return self.es.decode(response)
         except requests.RequestException as e:
             self.log_message(f"Error fetching data: {e}")
             return None
@@ -23,13 +78,17 @@ class Metrics(Base):
             self.log_message(f"[+] Fetching {item_type} Data complete [0] Affected Items...")
             return
 
-        for item in affected_items[:notify_limit]:
-            message = self.generate_notification_message(item, item_type, threshold)
-            self.brief_notify(message=message)
+        # Only conditions that are new or past their re-notify TTL are sent
+        entity_keys = {"latency": ("url",), "trend": ("name", "resource"), "resource": ("name", "resource")}.get(item_type, ("name",))
+        new_items = self.new_alerts(affected_items, item_type, entity_keys, "level")
+        # Items past the limit or not delivered stay unrecorded, so a later cycle sends them
+        for item in new_items[:notify_limit]:
+            self.notify_alert(item, self.generate_notification_message(item, item_type, threshold), item_type, entity_keys, "level")
 
         if self.USER_LOG_FILE:
             self.write_to_log_file(affected_items, log_subject)
-            self.full_notify(subject=log_subject, message=log_body)
+            if new_items:
+                self.full_notify(subject=log_subject, message=log_body)
 
         self.log_message(f"Affected {item_type.capitalize()}s: {len(affected_items)}")
         self.log_message(f"[+] Fetching {item_type.capitalize()} Data complete...")
@@ -37,15 +96,30 @@ class Metrics(Base):
     def generate_notification_message(self, item, item_type, threshold):
         """Generate a notification message based on the item type."""
         if item_type == "latency":
+            # Percentiles are kept on one line for the user log; the notification gives each phase its own
+            percentiles = "\n".join((item.get('percentiles') or '').split("; "))
+            phases = self.phase_lines(item, sep="\n")
+            if item.get('level') == "anomaly":
+                # Below the threshold: what alerted is the deviation from this URL's own normal
+                return f"""
+🟠 Latency Deviating From Baseline On {item['url']} ⚠️
+
+Timestamp: {item['timestamp']}
+Deviation: {self.deviation(item)}
+Threshold: {threshold} ms (not exceeded)
+
+{phases}
+{percentiles}
+            """
             return f"""
 🔴 High Latency Alert On {item['url']} ❌
 
 Timestamp: {item['timestamp']}
 Exceeded threshold: {threshold} ms
 
-TCP Latency: {item['tcp']} ms
-TLS Latency: {item['tls']} ms
-HTTP Latency: {item['http']} ms
+{phases}
+{f"Deviation: {self.deviation(item)}" if item.get('phase') else ''}
+{percentiles}
             """
         elif item_type == "cpu":
             return f"""
@@ -72,6 +146,25 @@ Memory Usage: {item.get('memory_usage','unknown')}%
 # Disk Usage
 Disk Usage: {item.get('disk_usage','unknown')}%  
             """
+        elif item_type == "resource":
+            resource = item['resource'].capitalize()
+            return f"""
+🔴 High {resource} Usage Alert on {item['name']}! ❌
+
+{resource} Usage: {item['current']}%
+Threshold: {item['threshold']}%
+Timestamp: {item['timestamp']}
+            """
+        elif item_type == "trend":
+            resource = {"cpu": "CPU"}.get(item['resource'], item['resource'].capitalize())
+            return f"""
+🟠 {resource} Usage Rising on {item['name']} ⚠️
+
+{resource} Usage: {item['current']}% (rising {item['rate']}% per hour)
+Threshold: {item['threshold']}%
+Projected to cross in: {item['eta']} minutes
+Timestamp: {item['timestamp']}
+            """
 
     @staticmethod
     def calculate_cpu_usage(host):
@@ -84,156 +177,333 @@ Disk Usage: {item.get('disk_usage','unknown')}%
         except (ValueError, ZeroDivisionError):
             return "N/A"
 
-    def fetch_latency_data(self):
-        """Fetch latency data from Elasticsearch."""
+    def fetch_latency_data(self, window):
+        """Fetch latency data for a (gte, lt) cursor window from Elasticsearch."""
         self.log_message("[+] Started Fetching Latency Data From Elastic...")
-        query = {
+        query = LATENCY.shape({
             "size": self.HITS_SIZE,
-            "_source": [
-                "@timestamp",
-                "url.full",
-                "tcp.rtt.connect.us",
-                "tls.rtt.handshake.us",
-                "http.rtt.total.us",
-            ],
             "query": {
                 "bool": {
-                    "must": [{"range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}s", "lt": "now"}}}],
+                    "must": [self.time_range(window)],
                     "filter": [{"term": {"monitor.status": "up"}}],
                 }
             },
+            # One latest document per monitor; url.full is a wildcard field and cannot be collapsed on
+            "collapse": {
+                "field": "monitor.id",
+                "inner_hits": {
+                    "name": HEARTBEATS,
+                    "size": HEARTBEATS_SIZE,
+                    "_source": False,
+                    "docvalue_fields": LATENCY.docvalue_fields,
+                    # Newest first, so the latest heartbeats are kept when there are more than fit
+                    "sort": [{"@timestamp": {"order": "desc"}}],
+                },
+            },
             "sort": [{"@timestamp": {"order": "desc"}}],
-        }
-        return self.fetch_data("_search", query)
+        })
+        return self.fetch_data("_search", query, LATENCY_FILTER)
 
     def process_latency_data(self, data):
         """Process latency data and identify affected hosts."""
+        # Hits are collapsed server-side to the latest document per monitor
         hits = data.get("hits", {}).get("hits", [])
         self.log_message(f"Found [{len(hits)}] services. Checking {self.LATENCY_THRESHOLD} ms threshold...")
+        records = self.to_milliseconds(LATENCY.hits(hits))
+        heartbeats = [self.heartbeats(hit) for hit in hits]
+        self.update_sketches(heartbeats)
+
+        # Score every URL against its own baseline in one pass; the earlier heartbeats of
+        # the window join the baseline first, oldest first
+        scores, medians, anomalous = self.baselines.score(
+            [record.url for record in records],
+            [self.phase_values(record) for record in records],
+            [[self.phase_values(beat) for beat in reversed(beats[1:])] for beats in heartbeats],
+        )
         affected_hosts = []
-        found_hosts = set()
-        for hit in hits:
-            source = hit.get("_source", {})
-            # Get the Url
-            url = source.get("url", {}).get("full", "unknown")
-            # Skip if the URL is already processed
-            if url in found_hosts:
-                continue  
-            # Add the URL to the set
-            found_hosts.add(url)  
-            latency_dict = {
-                "url": url,
-                "tcp": source.get("tcp", {}).get("rtt", {}).get("connect", {}).get("us", 0) / 1000,
-                "tls": source.get("tls", {}).get("rtt", {}).get("handshake", {}).get("us", 0) / 1000,
-                "http": source.get("http", {}).get("rtt", {}).get("total", {}).get("us", 0) / 1000,
-                "timestamp": source.get("@timestamp", "unknown"),
-            }
-
-            if any(latency > self.LATENCY_THRESHOLD for latency in [latency_dict["tcp"], latency_dict["tls"], latency_dict["http"]]):
-                affected_hosts.append(latency_dict)
-                self.log_message(
-                    f" {latency_dict['timestamp']}- {latency_dict['url']} | TCP: {latency_dict['tcp']} ms | TLS: {latency_dict['tls']} ms | HTTP: {latency_dict['http']} ms"
-                )
+        for record, score, median, is_anomalous in zip(records, scores, medians, anomalous):
+            if any(value is not None and value > self.LATENCY_THRESHOLD for value in (record.tcp, record.tls, record.http)):
+                # The global threshold is a hard ceiling, whatever the URL's own baseline
+                record.level = "critical"
+            elif is_anomalous:
+                # Below the ceiling only a deviation from this URL's normal latency alerts
+                record.level = "anomaly"
+            else:
+                continue
+            if is_anomalous:
+                phase = int(score.argmax())
+                record.phase = PHASES[phase]
+                record.baseline = round(float(median[phase]), 1)
+                record.score = round(float(score[phase]), 1)
+            record.percentiles = self.sketches.format(record.url, sep="; ")
+            affected_hosts.append(record)
+            self.log_message(
+                f" {record.timestamp}- {record.url} | {self.phase_lines(record)}"
+                + (f" | {self.deviation(record)}" if record.phase else "")
+            )
 
         return affected_hosts
 
-    def fetch_cpu_data(self):
-        """Fetch CPU usage data from Elasticsearch."""
+    @staticmethod
+    def heartbeats(hit):
+        """Every heartbeat of a collapsed hit's monitor in the window, newest first, in milliseconds."""
+        return Metrics.to_milliseconds(LATENCY.hits(hit.get("inner_hits", {}).get(HEARTBEATS, {}).get("hits", {}).get("hits") or [hit]))
+
+    @staticmethod
+    def to_milliseconds(records):
+        """Convert the phases of latency records from microseconds, leaving missing phases as None."""
+        records = list(records)
+        for record in records:
+            for phase in PHASES:
+                value = record[phase]
+                record[phase] = None if value is None else value / 1000
+        return records
+
+    @staticmethod
+    def phase_values(record):
+        """TCP, TLS and HTTP milliseconds of a record, NaN for a phase the monitor lacks."""
+        return tuple(math.nan if record[phase] is None else record[phase] for phase in PHASES)
+
+    @staticmethod
+    def deviation(record):
+        """The phase that deviated from its baseline, e.g. "HTTP 420.0 ms is 8.3 MADs above its baseline median of 101.0 ms"."""
+        return f"{record['phase'].upper()} {record[record['phase']]} ms is {record['score']} MADs above its baseline median of {record['baseline']} ms"
+
+    @staticmethod
+    def phase_lines(record, sep=" | "):
+        """The phases a monitor reported, e.g. "TCP Latency: 1.0 ms | HTTP Latency: 20.0 ms"."""
+        return sep.join(f"{phase.upper()} Latency: {record[phase]} ms" for phase in PHASES if record[phase] is not None)
+
+    def update_sketches(self, heartbeats):
+        """Add every heartbeat in the window to the per-URL percentile sketches, saving them periodically."""
+        for beats in heartbeats:
+            for beat in beats:
+                values = {phase: beat[phase] for phase in PHASES if beat[phase] is not None}
+                if values:
+                    self.sketches.add(beat.url, values, self.epoch(beat.timestamp))
+        self.sketches.prune()
+        # Written on an interval rather than every cycle, and once more at shutdown
+        if time.monotonic() - self._sketches_saved >= self.LATENCY_SKETCH_SAVE_INTERVAL:
+            self.save_sketches()
+
+    def save_sketches(self):
+        """Persist the latency percentile sketches."""
+        self._sketches_saved = time.monotonic()
+        try:
+            self.sketches.save()
+        except OSError as e:
+            self.log_message(f"[-] Could not save latency percentiles: {e}")
+
+    def fetch_cpu_data(self, window):
+        """Fetch CPU usage data for a (gte, lt) cursor window from Elasticsearch."""
         self.log_message("[-] Started fetching CPU Usage Data From Elastic...")
-        query = {
+        query = CPU.shape({
             "query": {
                 "bool": {
                     "must": [
-                        {"range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}s", "lt": "now"}}},
+                        self.time_range(window),
                         {"exists": {"field": "host.cpu.usage"}},
                     ]
                 }
             },
             "size": self.HITS_SIZE,
-            "_source": [
-                "host.name",
-                "@timestamp",
-                "host.ip",
-                "host.os.kernel",
-                "host.os.platform",
-                "host.hostname",
-                "host.cpu.usage",
-                "system.cpu.user.pct",
-                "system.cpu.system.pct",
-                "system.cpu.cores",
-                "system.memory.actual.used.pct",
-                "system.filesystem.used.pct",
-                "system.load.cores",
-                "system.load.1",
-                "system.memory.page_stats.direct_efficiency.pct",
-            ],
+            # One latest document per host
+            "collapse": {"field": "host.name"},
+            "sort": [{"@timestamp": {"order": "desc"}}],
+        })
+        return self.fetch_data("metricbeat-*/_search", query)
+
+    def fetch_memory_data(self, window):
+        """Fetch the latest memory usage per host for a (gte, lt) cursor window."""
+        query = MEMORY.shape({
+            "query": {
+                "bool": {
+                    "must": [
+                        self.time_range(window),
+                        {"exists": {"field": "system.memory.actual.used.pct"}},
+                    ]
+                }
+            },
+            "size": self.HITS_SIZE,
+            # One latest document per host
+            "collapse": {"field": "host.name"},
+            "sort": [{"@timestamp": {"order": "desc"}}],
+        })
+        return self.fetch_data("metricbeat-*/_search", query)
+
+    def fetch_disk_data(self, window):
+        """Fetch the usage of the fullest filesystem per host for a (gte, lt) cursor window."""
+        query = {
+            "size": 0,
+            "query": {
+                "bool": {
+                    "must": [
+                        self.time_range(window),
+                        {"exists": {"field": "system.filesystem.used.pct"}},
+                    ]
+                }
+            },
+            # A host reports one document per mounted filesystem; the fullest is the one that fills up first
+            "aggs": {
+                "hosts": {
+                    "terms": {"field": "host.name", "size": self.HOST_BUCKETS_SIZE},
+                    "aggs": {
+                        "usage": {"max": {"field": "system.filesystem.used.pct"}},
+                        "latest": {"max": {"field": "@timestamp"}},
+                    },
+                }
+            },
         }
         return self.fetch_data("metricbeat-*/_search", query)
 
-    def process_cpu_data(self, data):
-        """Process CPU usage data and identify affected hosts."""
+    def resource_samples(self, records, memory=None, disk=None):
+        """
+        Merge the latest CPU, memory and disk readings of each host.
+
+        :param records: Projected CPU records.
+        :param memory: Memory search response, one collapsed hit per host.
+        :param disk: Filesystem aggregation response, one bucket per host.
+        :return: {host: [epoch seconds, cpu, memory, disk]} with NaN where a resource was not reported.
+        """
+        samples = {}
+
+        def sample(name, timestamp):
+            entry = samples.setdefault(name, [timestamp, math.nan, math.nan, math.nan])
+            entry[0] = max(entry[0], timestamp)
+            return entry
+
+        for record in records:
+            # Readings on the CPU document itself stand in when a metricset reports nothing for the host
+            sample(record.name, self.epoch(record.timestamp))[1:] = [self.percent(record.cpu_usage), self.percent(record.memory_usage), self.percent(record.disk_usage)]
+        for record in MEMORY.hits((memory or {}).get("hits", {}).get("hits", [])):
+            sample(record.name, self.epoch(record.timestamp))[2] = self.percent(record.memory_usage)
+        for bucket in (disk or {}).get("aggregations", {}).get("hosts", {}).get("buckets", []):
+            latest = bucket.get("latest", {}).get("value")
+            timestamp = latest / 1000 if latest is not None else time.time()
+            sample(bucket["key"], timestamp)[3] = self.percent(bucket.get("usage", {}).get("value"))
+        return samples
+
+    def process_cpu_data(self, data, memory=None, disk=None):
+        """Process CPU usage data and identify affected hosts; memory and disk feed the usage trends."""
+        # Hits are collapsed server-side to the latest document per host
         hits = data.get("hits", {}).get("hits", [])
         self.log_message(f"Found [{len(hits)}] hosts. Checking {self.CPU_THRESHOLD}% threshold...")
 
         affected_hosts = []
-        affected_host_names = set()
+        records = list(CPU.hits(hits))
+        samples = self.resource_samples(records, memory, disk)
+        self.trends.add(
+            list(samples),
+            [sample[0] for sample in samples.values()],
+            [sample[1:] for sample in samples.values()],
+        )
 
-        for hit in hits:
-            metadata = hit.get("_source", {})
-            host = metadata.get("host", {})
-            host_name = host.get("name", "unknown")
+        for record in records:
+            # Memory and disk come from their own metricsets; show them on the CPU alert when known
+            _, _, memory_usage, disk_usage = samples[record.name]
+            if not math.isnan(memory_usage):
+                record.memory_usage = round(memory_usage, 2)
+            if not math.isnan(disk_usage):
+                record.disk_usage = round(disk_usage, 2)
 
-            cpu_usage = host.get("cpu", {}).get("usage")
-            if cpu_usage is None or not isinstance(cpu_usage, float):
-                self.log_message(f"No CPU usage data for {host_name}")
+        for record in records:
+            # Integral readings such as 0 or 1 are as valid as floats; booleans are not readings
+            cpu_usage = self.percent(record.cpu_usage)
+            if math.isnan(cpu_usage):
+                self.log_message(f"No CPU usage data for {record.name}")
                 continue
+            record.cpu_usage = round(float(cpu_usage), 2)
 
-            # Convert to percentage
-            if cpu_usage <= 1:
-                cpu_usage *= 100
-            cpu_usage = round(cpu_usage, 2)
-
-            if cpu_usage >= self.CPU_THRESHOLD and host_name not in affected_host_names:
-                host_dict = {
-                    "name": host_name,
-                    "timestamp": metadata.get("@timestamp", time.strftime("%Y-%m-%d %H:%M:%S")),
-                    "platform": host.get("os", {}).get("platform", "unknown"),
-                    "kernel": host.get("os", {}).get("kernel", "unknown"),
-                    "cpu_usage": cpu_usage,
-                    "sys_cores": metadata.get("system", {}).get("cpu", {}).get("cores", "0.00"),
-                    "sys_cpu_usage": metadata.get("system", {}).get("cpu", {}).get("system", {}).get("pct", "0.00"),
-                    "sys_user_usage": metadata.get("system", {}).get("cpu", {}).get("user", {}).get("pct", "0.00"),
-                    "sys_load": metadata.get("system", {}).get("load", {}).get("1", "unavailable"),
-                    "load_cores": metadata.get("system", {}).get("load", {}).get("cores", "unavailable"),
-                    "memory_usage": metadata.get("system", {}).get("memory", {}).get("actual", {}).get("used", {}).get("pct", "unknown"),
-                    "disk_usage": metadata.get("system", {}).get("filesystem", {}).get("used", {}).get("pct", "unknown"),
-                }
-
-                affected_hosts.append(host_dict)
-                affected_host_names.add(host_name)
-                self.log_message(f"{host_dict['timestamp']} - {host_name} - CPU usage: {cpu_usage}%")
+            if record.cpu_usage >= self.CPU_THRESHOLD:
+                record.level = "critical"
+                affected_hosts.append(record)
+                self.log_message(f"{record.timestamp} - {record.name} - CPU usage: {record.cpu_usage}%")
 
         return affected_hosts
 
+    @staticmethod
+    def percent(value):
+        """A usage reading as a percentage, or NaN when it is missing."""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return math.nan
+        return value * 100 if value <= 1 else value
+
+    def resource_alerts(self, data, memory=None, disk=None):
+        """Hosts whose memory or disk usage is already at or over its threshold; CPU is checked by process_cpu_data."""
+        samples = self.resource_samples(list(CPU.hits(data.get("hits", {}).get("hits", []))), memory, disk)
+        thresholds = {"memory": self.MEMORY_THRESHOLD, "disk": self.DISK_THRESHOLD}
+        alerts = []
+        for name, (timestamp, _, *usage) in samples.items():
+            for resource, current in zip(("memory", "disk"), usage):
+                if math.isnan(current) or current < thresholds[resource]:
+                    continue
+                alerts.append({
+                    "name": name,
+                    "resource": resource,
+                    "level": "critical",
+                    "current": round(current, 2),
+                    "threshold": thresholds[resource],
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)),
+                })
+                self.log_message(f"{name} - {resource} usage {current:.2f}% is over the {thresholds[resource]}% threshold")
+        return alerts
+
+    def forecast_resources(self):
+        """Early warnings for hosts whose CPU, memory or disk is projected to cross its threshold soon."""
+        thresholds = {"cpu": self.CPU_THRESHOLD, "memory": self.MEMORY_THRESHOLD, "disk": self.DISK_THRESHOLD}
+        now = time.time()
+        warnings = []
+        for name, resource, current, rate, eta in self.trends.forecast(
+            [thresholds[resource] for resource in RESOURCES], self.RESOURCE_FORECAST_HORIZON, now
+        ):
+            warnings.append({
+                "name": name,
+                "resource": resource,
+                "level": "warning",
+                "current": round(current, 2),
+                "threshold": thresholds[resource],
+                "rate": round(rate, 2),
+                "eta": round(eta / 60),
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
+            })
+            self.log_message(f"{name} - {resource} usage {current:.2f}% rising {rate:.2f}%/h, projected to reach {thresholds[resource]}% in {eta / 60:.0f} min")
+        return warnings
+
     def get_latency(self):
         """Fetch, process, and notify about high latency."""
-        data = self.fetch_latency_data()
+        window = self.cursors.window("latency", self.SLEEP_TIME)
+        data = self.fetch_latency_data(window)
         if data:
             affected_hosts = self.process_latency_data(data)
-            self.notify(
-                affected_hosts,
-                "latency",
-                self.LATENCY_THRESHOLD,
-                self.NOTIFY_LIMIT,
-                f"High Latency Detected on {len(affected_hosts)} Hosts",
-                f"Latency exceeded threshold on {len(affected_hosts)} hosts. Check attached log.",
-            )
+            self.notify(affected_hosts, "latency", self.LATENCY_THRESHOLD, self.NOTIFY_LIMIT, *self.latency_summary(affected_hosts))
+            self.cursors.commit("latency", window)
+
+    def latency_summary(self, affected_hosts):
+        """Email subject and body for a cycle's latency alerts, worded by what each one crossed."""
+        exceeded = sum(1 for record in affected_hosts if record.level == "critical")
+        deviating = len(affected_hosts) - exceeded
+        parts = []
+        if exceeded:
+            parts.append((
+                f"High Latency Detected on {exceeded} Hosts",
+                f"Latency exceeded the {self.LATENCY_THRESHOLD} ms threshold on {exceeded} hosts.",
+            ))
+        if deviating:
+            parts.append((
+                f"Latency Deviating From Baseline on {deviating} Hosts",
+                f"Latency on {deviating} hosts deviated from their own baseline while staying under the {self.LATENCY_THRESHOLD} ms threshold.",
+            ))
+        subject = ", ".join(subject for subject, _ in parts)
+        body = " ".join(body for _, body in parts) + " Check attached log."
+        return subject, body
 
     def get_cpu_usage(self):
         """Fetch, process, and notify about high CPU usage."""
-        data = self.fetch_cpu_data()
+        window = self.cursors.window("cpu_usage", self.SLEEP_TIME)
+        data = self.fetch_cpu_data(window)
         if data:
-            affected_hosts = self.process_cpu_data(data)
+            memory, disk = self.fetch_memory_data(window), self.fetch_disk_data(window)
+            affected_hosts = self.process_cpu_data(data, memory, disk)
             self.notify(
                 affected_hosts,
                 "cpu",
@@ -241,4 +511,25 @@ Disk Usage: {item.get('disk_usage','unknown')}%
                 self.NOTIFY_LIMIT,
                 f"🔴 High CPU Usage Detected on [{len(affected_hosts)}] Hosts ❌",
                 f"CPU usage on {len(affected_hosts)} hosts exceeded {self.CPU_THRESHOLD}%. Check file attachment for logs.",
-            )
\ No newline at end of file
+            )
+            exhausted = self.resource_alerts(data, memory, disk)
+            # Each alert carries the threshold of its own resource
+            self.notify(
+                exhausted,
+                "resource",
+                None,
+                self.NOTIFY_LIMIT,
+                f"🔴 Memory or Disk Usage Over Threshold on [{len(exhausted)}] Hosts ❌",
+                f"{len(exhausted)} host resources are over their memory or disk threshold. Check file attachment for logs.",
+            )
+            warnings = self.forecast_resources()
+            # Each warning carries the threshold of its own resource
+            self.notify(
+                warnings,
+                "trend",
+                None,
+                self.NOTIFY_LIMIT,
+                f"🟠 Resource Usage Projected to Cross Thresholds on [{len(warnings)}] Hosts ⚠️",
+                f"{len(warnings)} host resources are projected to cross their threshold within {self.RESOURCE_FORECAST_HORIZON // 60} minutes. Check file attachment for logs.",
+            )
+            self.cursors.commit("cpu_usage", window)
\ No newline at end of file
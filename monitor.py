@@ -1,20 +1,40 @@
+import time
 import requests
 from base import Base
+from projection import Projection
+
+SERVICE_DOWN = Projection("ServiceDownRecord", {
+    "name": ("monitor.name", "Unknown Service"),
+    "id": ("monitor.id", "N/A"),
+    "url": ("url.full", "N/A"),
+    "timestamp": ("@timestamp", "N/A"),
+    "location": ("observer.geo.name", "Unknown Location"),
+    "status": ("monitor.status", "down"),
+})
+
+HOST_DOWN = Projection("HostDownRecord", {
+    "name": ("host.name", "Unknown Host"),
+    "timestamp": ("@timestamp", "N/A"),
+})
 
 class Monitor(Base):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def fetch_downtime_data(self, index: str, query: dict, source_fields: list):
-        """Generic method to fetch downtime data from Kibana."""
+    def fetch_downtime_data(self, index: str, query: dict, source_fields: list = None, aggregation: str = None):
+        """Generic method to fetch downtime data from Kibana, as hits or as the buckets of an aggregation."""
         self.log_message(f"[-] Checking for downtime in {index}...")
         url = f"{self.KIBANA_URL}/{index}/_search"
-        query["_source"] = source_fields
+        if source_fields is not None:
+            query["_source"] = source_fields
 
         try:
-            response = requests.post(url, headers=self.headers, json=query)
+            response = self.es.search(url, query)
             if response.status_code == 200:
-                return response.json().get("hits", {}).get("hits", [])
+                data = self.es.decode(response)
+                if aggregation:
+                    return data.get("aggregations", {}).get(aggregation, {}).get("buckets", [])
+                return data.get("hits", {}).get("hits", [])
             else:
                 self.log_message(f"Error fetching {index} downtime logs: {response.status_code} - {response.text}")
                 return None
@@ -25,33 +45,27 @@ class Monitor(Base):
         return None
 
     def process_downtime(self, downtime_data=[], entity_key=''):
-        """Process downtime data and extract unique entities."""
+        """Extract entities from downtime hits, already collapsed to one document per entity."""
         if not downtime_data:
             self.log_message("No downtime data found.")
             return []
         
-        unique_entities = []
-        unique_entity_names = set()
-        for hit in downtime_data:
-            entity_info = hit.get("_source", {})
-            entity_name = entity_info.get(entity_key,{}).get("name", "Unknown")
-            if entity_name not in unique_entity_names:
-                if entity_key == 'monitor':
-                    unique_entities.append({
-                            "name": entity_info.get("monitor",{}).get("name", "Unknown Service"),
-                            "id": entity_info.get("monitor",{}).get("id", "N/A"),
-                            "url": entity_info.get("url",{}).get("full", "N/A"),
-                            "timestamp": entity_info.get("@timestamp", "N/A"),
-                            "location": entity_info.get("observer",{}).get("geo",{}).get("name", "Unknown Location")
-                    })
-                   
-                else:
-                    unique_entities.append({
-                        "name": entity_info.get("host",{}).get("name", "Unknown Host"),
-                        "timestamp": entity_info.get("@timestamp", "N/A"),
-                    })
-                unique_entity_names.add(entity_name)
-        return unique_entities
+        projection = SERVICE_DOWN if entity_key == 'monitor' else HOST_DOWN
+        return list(projection.hits(downtime_data))
+
+    def process_last_seen(self, buckets=[]):
+        """Extract silent hosts from last-seen aggregation buckets."""
+        if not buckets:
+            self.log_message("No downtime data found.")
+            return []
+        return [
+            {
+                "name": bucket.get("key", "Unknown Host"),
+                "timestamp": bucket.get("last_seen", {}).get("value_as_string", "N/A"),
+                "status": "silent",
+            }
+            for bucket in buckets
+        ]
 
     def notify_downtime(self, downtime_list, entity_type):
         """Handles notifications and alerts for downtime entities."""
@@ -62,21 +76,24 @@ class Monitor(Base):
         count = len(downtime_list)
         self.log_message(f"⚠️ Found {count} {entity_type}(s) that are DOWN.")
        
-        for entity in downtime_list[:self.NOTIFY_LIMIT]:
+        # Only outages that are new or past their re-notify TTL are sent
+        check = f"{entity_type}_downtime"
+        new_entities = self.new_alerts(downtime_list, check, ("name",), "status")
+        for entity in new_entities[:self.NOTIFY_LIMIT]:
             alert_message = f"""
             🔴 Siren Alert! {entity_type.capitalize()} **{entity['name']}** is DOWN!
             🌍 Location: {entity.get('location', 'Unknown')}
             🕒 Timestamp: {entity.get('timestamp', 'N/A')}
             🔗 ID: {entity.get('id', 'N/A')}
             """
-            self.brief_notify(alert_message)
+            self.notify_alert(entity, alert_message, check, ("name",), "status")
 
         if self.USER_LOG_FILE:
             subject = f"⚠️ Downtime Alert: {count} {entity_type.capitalize()}(s) Are Down"
             body = "Check attached log file"
             self.write_to_log_file(downtime_list,subject)
-            self.full_notify(subject=subject, message=body)
-            self.send_mail(subject=subject, body=body)
+            if new_entities:
+                self.full_notify(subject=subject, message=body)
 
         for entity in downtime_list:
             self.log_message(f"{entity.get('timestamp', 'N/A')} - {entity.get('name', 'Unknown')} is DOWN.")
@@ -85,42 +102,60 @@ class Monitor(Base):
 
     def check_host_downtime(self):
         """Identify hosts that have stopped sending data."""
+        # Hosts seen within the lookback whose latest document is older than one cycle
+        cutoff = int((time.time() - self.SLEEP_TIME) * 1000)
         query = {
+            "size": 0,
             "query": {
-                "bool": {
-                    "must_not": [
-                        {"range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}s", "lt": "now"}}}
-                    ]
+                "range": {"@timestamp": {"gte": f"now-{self.HOST_DOWNTIME_LOOKBACK}"}}
+            },
+            "aggs": {
+                "hosts": {
+                    "terms": {"field": "host.name", "size": self.HOST_BUCKETS_SIZE},
+                    "aggs": {
+                        "last_seen": {"max": {"field": "@timestamp"}},
+                        "silent": {
+                            "bucket_selector": {
+                                "buckets_path": {"last_seen": "last_seen"},
+                                "script": {
+                                    "source": "params.last_seen < params.cutoff",
+                                    "params": {"cutoff": cutoff},
+                                },
+                            }
+                        },
+                    },
                 }
             },
-            "size": self.HITS_SIZE
         }
-        source_fields = ["host.name","@timestamp"]
-        downtime_data = self.fetch_downtime_data("metricbeat-*",query,source_fields)
-        if downtime_data is None:
+        buckets = self.fetch_downtime_data("metricbeat-*", query, aggregation="hosts")
+        if buckets is None:
             return None
 
-        down_hosts = self.process_downtime(downtime_data, "host")
+        down_hosts = self.process_last_seen(buckets)
         self.notify_downtime(down_hosts, "host")
         return down_hosts
 
     def check_service_downtime(self):
         """Check if any services are currently down based on Heartbeat data."""
-        query = {
+        window = self.cursors.window("service_downtime", self.SLEEP_TIME)
+        query = SERVICE_DOWN.shape({
             "query": {
                 "bool": {
                     "must": [
-                        {"range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}s", "lt": "now"}}},
+                        self.time_range(window),
                         {"match": {"monitor.status": "down"}}
                     ]
                 }
             },
+            # One latest document per monitor
+            "collapse": {"field": "monitor.id"},
+            "sort": [{"@timestamp": {"order": "desc"}}],
             "size": self.HITS_SIZE
-        }
-        source_fields = [ "monitor.name", "monitor.id","url.full","@timestamp","observer.geo.name"]
-        downtime_data = self.fetch_downtime_data("heartbeat-*", query,source_fields)
+        })
+        downtime_data = self.fetch_downtime_data("heartbeat-*", query)
         if downtime_data is None:
             return None
         down_services = self.process_downtime(downtime_data, "monitor")
         self.notify_downtime(down_services, "service")
+        self.cursors.commit("service_downtime", window)
         return down_services
\ No newline at end of file
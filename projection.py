@@ -0,0 +1,161 @@
+import re
+
+EMPTY = {}
+SEGMENT = re.compile(r"\[(\d+)\]|[^.\[\]]+")
+
+
+class Record:
+    """
+    Base of projected hit records.
+
+    Records are slotted, so they cost a fraction of a dict, and still support the
+    read-style dict access the notification and log code uses.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return ((field, getattr(self, field, None)) for field in self.FIELDS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{key}={value!r}' for key, value in self.items())})"
+
+
+class Projection:
+    """
+    Extracts a fixed set of dotted field paths from hit sources into slotted records.
+
+    Paths are declared once and compiled into a single function that looks up every
+    shared parent object once per hit. A [N] segment indexes into a list
+    ("error.exception[0].message"). A callable default is called only when the field is missing.
+    Attributes listed in docvalues are read from the hit's docvalue "fields" instead of _source.
+    """
+
+    def __init__(self, name, fields, flat=False, extra=(), docvalues=()):
+        """
+        :param name: Name of the generated record class.
+        :param fields: Mapping of record attribute to (dotted path, default).
+        :param flat: Sources store dotted keys literally ({"host.name": ...}), as in Kibana alerts.
+        :param extra: Attributes filled in later by the check, initialised to None.
+        :param docvalues: Attributes, typically numeric metrics, requested as docvalue_fields.
+        """
+        self.fields = dict(fields)
+        self.flat = flat
+        self.docvalues = frozenset(docvalues)
+        slots = tuple(self.fields) + tuple(extra)
+        self.record = type(name, (Record,), {"__slots__": slots, "FIELDS": slots})
+        self.extra = tuple(extra)
+        self.extract = self._compile()
+
+    @staticmethod
+    def segments(path):
+        """Split "a.b[0].c" into ("a", "b", 0, "c")."""
+        return tuple(int(match.group(1)) if match.group(1) else match.group(0) for match in SEGMENT.finditer(path))
+
+    def _compile(self):
+        namespace = {"EMPTY": EMPTY, "MISSING": object(), "new": object.__new__, "record": self.record}
+        for index, (_, default) in enumerate(self.fields.values()):
+            namespace[f"default{index}"] = default
+        source = self._source("fast", checked=False) + "\n" + self._source("checked", checked=True)
+        exec(compile(source, f"<projection {self.record.__name__}>", "exec"), namespace)
+        fast, checked = namespace["fast"], namespace["checked"]
+
+        def extract(source, fields=EMPTY):
+            # Well-formed sources take the unchecked path; anything unexpected is retried defensively
+            try:
+                return fast(source, fields)
+            except (AttributeError, TypeError, KeyError, IndexError):
+                return checked(source, fields)
+        return extract
+
+    def _source(self, name, checked):
+        """Generate the extractor; the checked variant tolerates any shape of source."""
+        lines = [f"def {name}(source, fields):", "    item = new(record)"]
+        parents = {(): "source"}
+
+        def parent_of(segments):
+            """Emit, once, the lookups needed to reach a nested object and return its variable."""
+            if segments in parents:
+                return parents[segments]
+            container = parent_of(segments[:-1])
+            variable = f"node{len(parents)}"
+            segment = segments[-1]
+            if isinstance(segment, int):
+                lines.append(f"    {variable} = {container}[{segment}] if isinstance({container}, list) and len({container}) > {segment} else EMPTY")
+                if checked:
+                    lines.append(f"    {variable} = {variable} if isinstance({variable}, dict) else EMPTY")
+            elif checked:
+                lines.append(f"    {variable} = {container}.get({segment!r}) if isinstance({container}, dict) else None")
+                lines.append(f"    {variable} = {variable} if isinstance({variable}, (dict, list)) else EMPTY")
+            else:
+                lines.append(f"    {variable} = {container}.get({segment!r}) or EMPTY")
+            parents[segments] = variable
+            return variable
+
+        for index, (attribute, (path, default)) in enumerate(self.fields.items()):
+            fallback = f"default{index}()" if callable(default) else f"default{index}"
+            if attribute in self.docvalues:
+                # Docvalue fields are flat and always arrive as a list of values
+                if checked:
+                    lines.append(f"    value = fields.get({path!r}) if isinstance(fields, dict) else None")
+                    lines.append(f"    item.{attribute} = value[0] if isinstance(value, list) and value else {fallback}")
+                else:
+                    lines.append(f"    value = fields.get({path!r})")
+                    lines.append(f"    item.{attribute} = value[0] if value else {fallback}")
+                continue
+            segments = (path,) if self.flat else self.segments(path)
+            container = parent_of(segments[:-1])
+            leaf = segments[-1]
+            if isinstance(leaf, int):
+                lookup = f"{container}[{leaf}] if isinstance({container}, list) and len({container}) > {leaf} else MISSING"
+            elif checked:
+                lookup = f"{container}.get({leaf!r}, MISSING) if isinstance({container}, dict) else MISSING"
+            elif not callable(default):
+                lines.append(f"    item.{attribute} = {container}.get({leaf!r}, default{index})")
+                continue
+            else:
+                lookup = f"{container}.get({leaf!r}, MISSING)"
+            lines.append(f"    value = {lookup}")
+            lines.append(f"    item.{attribute} = {fallback} if value is MISSING else value")
+        for attribute in self.extra:
+            lines.append(f"    item.{attribute} = None")
+        lines.append("    return item")
+        return "\n".join(lines)
+
+    @property
+    def paths(self):
+        """Source paths to request, so the query fetches exactly what is projected."""
+        return [re.sub(r"\[\d+\]", "", path) for attribute, (path, _) in self.fields.items() if attribute not in self.docvalues]
+
+    @property
+    def docvalue_fields(self):
+        return [path for attribute, (path, _) in self.fields.items() if attribute in self.docvalues]
+
+    def shape(self, query):
+        """Restrict a search body to the projected _source paths and docvalue fields."""
+        query["_source"] = self.paths or False
+        if self.docvalues:
+            query["docvalue_fields"] = self.docvalue_fields
+        return query
+
+    def hits(self, hits):
+        """Yield a record for each raw hit."""
+        extract = self.extract
+        for hit in hits:
+            yield extract(hit.get("_source") or EMPTY, hit.get("fields") or EMPTY)
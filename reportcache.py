@@ -0,0 +1,71 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+# Timestamps and identifiers only; measured values such as latencies, counts and
+# percentages are part of what the report is about and stay in the key
+IDENTIFIERS = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"
+    r"|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|\b0x[0-9a-f]+\b"
+    r"|\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{16,}\b"
+    r"|\b\d{10,}\b"
+    r"|\b((?:[a-z]+[_-])?id|pid|tid)([=:]\s*|\s+)[\w.-]+",
+    re.IGNORECASE,
+)
+
+
+def mask_identifiers(text):
+    """Replace timestamps and identifiers in text with "#"."""
+    return IDENTIFIERS.sub(lambda match: f"{match.group(1)}{match.group(2)}#" if match.group(1) else "#", text)
+
+
+class ReportCache:
+    """On-disk cache of AI reports keyed on a hash of everything sent to the provider."""
+
+    def __init__(self, path="reports.db", ttl=86400):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, created_at REAL NOT NULL, report TEXT NOT NULL)")
+        self.prune()
+
+    @staticmethod
+    def key(provider, model, context, prompt, inputs):
+        """
+        Stable key of an analysis request.
+
+        Timestamps and ids in the inputs are masked so that logs which only differ in
+        those hash the same; any other number, such as a latency, changes the key.
+        """
+        digest = hashlib.sha256()
+        for part in (provider, model, context, prompt, mask_identifiers(inputs or "")):
+            digest.update(str(part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached report, or None when absent or older than the TTL."""
+        with self._lock:
+            row = self._db.execute("SELECT created_at, report FROM reports WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[0] >= self.ttl:
+            return None
+        return row[1]
+
+    def put(self, key, report):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO reports (key, created_at, report) VALUES (?, ?, ?)", (key, time.time(), report))
+            self._db.commit()
+
+    def prune(self):
+        """Drop reports whose TTL has passed."""
+        with self._lock:
+            self._db.execute("DELETE FROM reports WHERE created_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
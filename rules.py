@@ -1,73 +1,128 @@
 import requests
 import time
 from base import Base
+from projection import Projection
+
+# Alert documents store their fields under literal dotted keys
+ALERT_FIELDS = {
+    "alert_status": ("kibana.alert.status", "unknown"),
+    "features": ("kibana.alert.rule.consumer", ""),
+    "started": ("kibana.alert.start", ""),
+    "rule_name": ("kibana.alert.rule.name", ""),
+    "rule_category": ("kibana.alert.rule.category", ""),
+    "alert_reason": ("kibana.alert.reason", ""),
+    "timestamp": ("@timestamp", lambda: time.strftime('%Y-%m-%d %H:%M:%S')),
+    "threshold": ("kibana.alert.evaluation.threshold", ""),
+}
+
+HOST_ALERT = Projection("HostAlertRecord", {
+    "name": ("host.name", ""),
+    **ALERT_FIELDS,
+    "platform": ("host.os.platform", ""),
+    "version": ("host.os.version", ""),
+    "os": ("host.os.type", ""),
+    "kernel": ("host.os.kernel", ""),
+    "resource_type": ("kibana.alert.rule.producer", ""),
+}, flat=True)
+
+SERVICE_ALERT = Projection("ServiceAlertRecord", {
+    "name": ("service.name", ""),
+    **ALERT_FIELDS,
+    "language": ("service.language.name", ""),
+    "transaction_type": ("transaction.type", ""),
+    "service_environment": ("service.environment", ""),
+}, flat=True)
 
 class Rule(Base):
     def __init__(self, **kwargs):
         # Call parent class's __init__ with all arguments
         super().__init__(**kwargs)
         
-    def _fetch_alerts(self, rule_id):
-        """Fetch alerts from Kibana based on rule ID."""
-        query = {
+    def _alerts_query(self, rule_id, window, search_after=None, is_host_alert=True):
+        """Build the alerts query for a single rule ID over a (gte, lt) cursor window."""
+        query = (HOST_ALERT if is_host_alert else SERVICE_ALERT).shape({
             "query": {
                 "bool": {
                     "must": [{"term": {"kibana.alert.rule.uuid": rule_id}}],
-                    "filter": [{"range": {"@timestamp": {"gte": f"now-{self.SLEEP_TIME}s", "lte": "now"}}}]
+                    "filter": [self.time_range(window)]
                 }
             },
+            # kibana.alert.uuid is unique per alert, so it is a stable search_after tiebreaker
+            "sort": [{"@timestamp": "asc"}, {"kibana.alert.uuid": "asc"}],
             "size": self.HITS_SIZE
-        }
+        })
+        if search_after:
+            query["search_after"] = search_after
+        return query
+
+    def _fetch_alerts(self, rule_id, window, search_after=None, is_host_alert=True):
+        """Fetch one page of alerts from Kibana based on rule ID. Returns None on error."""
+        query = self._alerts_query(rule_id, window, search_after, is_host_alert)
         
         try:
-            response = requests.post(self.KIBANA_RULE_URL, headers=self.headers, json=query)
+            response = self.es.search(self.KIBANA_RULE_URL, query)
+            response.raise_for_status()
+            return self.es.decode(response).get('hits', {}).get('hits', [])
+        except requests.RequestException as e:
+            self.log_message(f'Error fetching alerts: {e}')
+            return None
+
+    def _fetch_alerts_batch(self, rule_ids, windows, is_host_alert=True):
+        """
+        Fetch alerts for all rule IDs in one _msearch request and return them keyed by rule ID.
+
+        Rules whose first page is full are paged forward with search_after until caught up.
+        A rule that failed to fetch maps to None.
+        """
+        searches = [({}, self._alerts_query(rule_id, windows[rule_id], is_host_alert=is_host_alert)) for rule_id in rule_ids]
+        try:
+            response = self.es.msearch(self.KIBANA_RULE_MSEARCH_URL, searches)
             response.raise_for_status()
-            return response.json().get('hits', {}).get('hits', [])
+            responses = self.es.decode(response).get('responses', [])
         except requests.RequestException as e:
             self.log_message(f'Error fetching alerts: {e}')
-            return []
+            return {}
+
+        # _msearch answers in request order, so pair each response back with its rule
+        alerts_by_rule = {}
+        if len(responses) != len(rule_ids):
+            self.log_message(f'[-] Expected {len(rule_ids)} alert responses, got {len(responses)}; rules without one are retried next cycle')
+        for index, rule_id in enumerate(rule_ids):
+            result = responses[index] if index < len(responses) else None
+            if result is None:
+                alerts_by_rule[rule_id] = None
+                continue
+            if 'error' in result:
+                self.log_message(f'Error fetching alerts for rule {rule_id}: {result["error"]}')
+                alerts_by_rule[rule_id] = None
+                continue
+            alerts = result.get('hits', {}).get('hits', [])
+            page = alerts
+            while page is not None and len(page) >= self.HITS_SIZE:
+                page = self._fetch_alerts(rule_id, windows[rule_id], search_after=page[-1]['sort'], is_host_alert=is_host_alert)
+                if page is None:
+                    alerts = None
+                    break
+                alerts.extend(page)
+            alerts_by_rule[rule_id] = alerts
+        return alerts_by_rule
     
     def _process_alerts(self, alerts, is_host_alert=True):
         """Process alerts and extract relevant information."""
         alerts = alerts or []
         self.log_message('Found {} alerts'.format(len(alerts)))
-        extracted_data = []
-        for alert in alerts:
-            alert_source = alert.get('_source', {})
-            data = {
-                "name": alert_source.get('host.name' if is_host_alert else 'service.name', ''),
-                "alert_status": alert_source.get('kibana.alert.status', 'unknown'),
-                "features": alert_source.get('kibana.alert.rule.consumer', ''),
-                "started": alert_source.get('kibana.alert.start', ''),
-                "rule_name": alert_source.get('kibana.alert.rule.name', ''),
-                "rule_category": alert_source.get('kibana.alert.rule.category', ''),
-                "alert_reason": alert_source.get('kibana.alert.reason', ''),
-                "timestamp": alert_source.get('@timestamp', time.strftime('%Y-%m-%d %H:%M:%S')),
-                "threshold": alert_source.get('kibana.alert.evaluation.threshold', ''),
-            }
-            if is_host_alert:
-                data.update({
-                    "platform": alert_source.get('host.os.platform', ''),
-                    "version": alert_source.get('host.os.version', ''),
-                    "os": alert_source.get('host.os.type', ''),
-                    "kernel": alert_source.get('host.os.kernel', ''),
-                    "resource_type": alert_source.get('kibana.alert.rule.producer', ''),
-                })
-            else:
-                data.update({
-                    "language": alert_source.get('service.language.name', ''),
-                    "transaction_type": alert_source.get('transaction.type', ''),
-                    "service_environment": alert_source.get('service.environment', ''),
-                })
-            extracted_data.append(data)
-        return extracted_data
+        projection = HOST_ALERT if is_host_alert else SERVICE_ALERT
+        return list(projection.hits(alerts))
     
     def _send_notifications(self, alerts, is_host_alert=True):
         """Send notifications via email and Slack."""
         if not alerts:
             return
 
-        for alert in alerts[: self.NOTIFY_LIMIT]:
+        # Only alerts that are new, changed status or are past their re-notify TTL are sent
+        check = "host_rule" if is_host_alert else "service_rule"
+        new_alerts = self.new_alerts(alerts, check, ("rule_name", "name"), "alert_status")
+        for alert in new_alerts[: self.NOTIFY_LIMIT]:
                 message = f"""
 🔴 {alert['rule_name']} Rule Alert for {alert['name']} ❌
 
@@ -82,13 +137,14 @@ Rule Category: {alert['rule_category']}
 Features: {alert['features']}
                 """
                
-                self.brief_notify(message=message)
+                self.notify_alert(alert, message, check, ("rule_name", "name"), "alert_status")
         
         if self.USER_LOG_FILE:        
             subject = f"Rule Alert for {'CPU Usage' if is_host_alert else 'Latency'} Detected on {len(alerts)} {'hosts' if is_host_alert else 'services'}"
             body = f"{'CPU usage' if is_host_alert else 'Latency'} exceeded threshold. A file with logs is attached."
             self.write_to_log_file(alerts,subject)
-            self.full_notify(subject=subject,message=body)
+            if new_alerts:
+                self.full_notify(subject=subject,message=body)
        
         if self.VERBOSE:
             for alert in alerts:
@@ -96,24 +152,29 @@ Features: {alert['features']}
 
         self.log_message(f"[+] Fetching {'Host' if is_host_alert else 'services'} Alerts complete. Concluded {len(alerts)} ...")    
     
+    def _fetch_rule_alerts(self, rule_ids, is_host_alert=True):
+        """Fetch, process and notify alerts for each rule, advancing each rule's cursor once handled."""
+        windows = {rule_id: self.cursors.window(f"rule:{rule_id}", self.SLEEP_TIME) for rule_id in rule_ids}
+        for rule_id, alerts in self._fetch_alerts_batch(rule_ids, windows, is_host_alert).items():
+            if alerts is None:
+                continue
+            self.log_message(f'[-]  Processing {"HOST CPU Usage" if is_host_alert else "Latencies Exceeded"} alerts from rule {rule_id}...')
+            processed_alerts = self._process_alerts(alerts, is_host_alert=is_host_alert)
+            self._send_notifications(processed_alerts, is_host_alert=is_host_alert)
+            self.cursors.commit(f"rule:{rule_id}", windows[rule_id])
+
     def fetch_host_alerts(self):
         """Fetch and process alerts for host CPU usage."""
         if not self.HOSTS_RULE_IDS:
             self.log_message('[-] HOSTS_RULE_IDS not found. Skipping rule alerts.')
             return
-        for host_rule in self.HOSTS_RULE_IDS:
-            self.log_message(f'[-]  Fetching alerts for HOST CPU Usage from rule {host_rule} started...')
-            alerts = self._fetch_alerts(host_rule)
-            processed_alerts = self._process_alerts(alerts, is_host_alert=True)
-            self._send_notifications(processed_alerts, is_host_alert=True)
+        self.log_message(f'[-]  Fetching alerts for HOST CPU Usage from {len(self.HOSTS_RULE_IDS)} rules started...')
+        self._fetch_rule_alerts(self.HOSTS_RULE_IDS, is_host_alert=True)
     
     def fetch_service_alerts(self):
         """Fetch and process alerts for service latency."""
         if not self.SERVICE_RULE_IDS:
             self.log_message('[-] SERVICE_RULE_IDS not found. Skipping rule alerts.')
             return
-        for service_rule in self.SERVICE_RULE_IDS:
-            self.log_message(f'[-]  Fetching alerts for Latencies Exceeded alerts from rule {service_rule} started...')
-            alerts = self._fetch_alerts(service_rule)
-            processed_alerts = self._process_alerts(alerts, is_host_alert=False)
-            self._send_notifications(processed_alerts, is_host_alert=False)
\ No newline at end of file
+        self.log_message(f'[-]  Fetching alerts for Latencies Exceeded alerts from {len(self.SERVICE_RULE_IDS)} rules started...')
+        self._fetch_rule_alerts(self.SERVICE_RULE_IDS, is_host_alert=False)
\ No newline at end of file
@@ -0,0 +1,158 @@
+from slack_sdk import WebClient
+from rules import Rule
+from metrics import Metrics
+from monitor import Monitor
+from elasticlogs import ElasticLogs
+from genai import GeminiAI
+from deepseek import DeepSeek
+from gptai import GptAI
+from base import Base
+from esclient import ElasticClient
+from cursors import CursorStore
+from executor import CycleExecutor
+from dispatcher import NotificationDispatcher
+from mailer import SMTPSession, MailDigest
+from alertcache import AlertCache
+from reportcache import ReportCache
+from logwriter import BufferedLogWriter
+from logstore import RotatingLogStore
+from airunner import AIRunner
+from scheduler import AISchedule
+from settings import Settings
+
+
+class Runtime:
+    """Long-lived component graph built once at startup and reused every cycle."""
+
+    def __init__(self, config, check_timeout=None):
+        """
+        :param config: Mapping of Settings fields, typically read from the environment.
+        :param check_timeout: Deadline in seconds for each check of a cycle.
+        """
+        # Configuration is resolved once; components read it, they never receive it field by field
+        self.settings = settings = Settings(**config)
+        # One Slack client, one Elasticsearch pool, one cursor store and one cleanup list for every component
+        self.services = {}
+        self.services["slack_client"] = WebClient(token=settings.slack_token)
+        self.services["es_client"] = ElasticClient(
+            settings.api_key,
+            connect_timeout=settings.es_connect_timeout,
+            read_timeout=settings.es_read_timeout,
+            retries=settings.es_retries,
+            backoff=settings.es_backoff,
+            compress=settings.es_compress,
+        )
+        self.services["cursor_store"] = CursorStore(
+            settings.cursor_file,
+            max_lookback=settings.cursor_max_lookback,
+            ingest_delay=settings.cursor_ingest_delay,
+        )
+        self.services["generated_files"] = []
+        self.services["log_store"] = RotatingLogStore(
+            max_bytes=settings.log_max_bytes,
+            max_age=settings.log_max_age,
+            backups=settings.log_backups,
+            compress=settings.log_compress,
+        )
+        self.services["log_writer"] = BufferedLogWriter(
+            flush_interval=settings.log_flush_interval,
+            max_lines=settings.log_buffer_lines,
+            store=self.services["log_store"],
+        ).start()
+        self.services["dispatcher"] = NotificationDispatcher(
+            slack_client=self.services["slack_client"],
+            rate=settings.notify_rate,
+            burst=settings.notify_burst,
+            max_batch=settings.notify_batch_size,
+            log=lambda message: self.base.log_message(message),
+        ).start()
+        self.services["smtp_session"] = SMTPSession(
+            settings.smtp_server,
+            settings.smtp_port,
+            settings.smtp_user,
+            settings.smtp_password,
+        )
+        self.services["mail_digest"] = MailDigest() if settings.mail_digest_mode else None
+        self.services["alert_cache"] = AlertCache(settings.alert_cache_file, ttl=settings.alert_renotify_ttl)
+        self.services["report_cache"] = ReportCache(settings.report_cache_file, ttl=settings.report_cache_ttl)
+
+        self.base = Base(settings=settings, **self.services)
+        self.rule = Rule(settings=settings, **self.services)
+        self.metrics = Metrics(settings=settings, **self.services)
+        self.monitor = Monitor(settings=settings, **self.services)
+        self.logs = ElasticLogs(settings=settings, **self.services)
+        self.gemini = GeminiAI(settings=settings, **self.services)
+        self.deepseek = DeepSeek(settings=settings, **self.services)
+        self.gpt = GptAI(settings=settings, **self.services)
+
+        self.ai_runner = AIRunner(
+            [
+                ("gemini", self.gemini.generateAIresponse),
+                ("deepseek", self.deepseek.generateReport),
+                ("openai", self.gpt.promptGPT),
+            ],
+            timeout=settings.ai_timeout,
+            # Read and compact the logs once; every provider gets the same input
+            prepare=self.base.compact_logs,
+            log=self.base.log_message,
+        )
+        # Schedules are parsed and last runs loaded once; the state file is only written when a run completes
+        self.schedule = AISchedule(
+            settings.ai_run_schedules,
+            window=settings.ai_run_window,
+            path=settings.last_run_file,
+            log=self.base.log_message,
+        )
+        if self.schedule.next_run:
+            self.base.log_message(f"[+] Next AI analysis at {self.schedule.next_run:%Y-%m-%d %H:%M}")
+        self.executor = CycleExecutor(timeout=check_timeout, log=self.base.log_message)
+        self.checks = [
+            ("host_alerts", self.rule.fetch_host_alerts),            # Host CPU Usage
+            ("service_alerts", self.rule.fetch_service_alerts),      # Service Latency
+            ("latency", self.metrics.get_latency),                   # Fetch and process latency data
+            ("cpu_usage", self.metrics.get_cpu_usage),               # Fetch and process CPU usage data
+            ("host_downtime", self.monitor.check_host_downtime),
+            ("service_downtime", self.monitor.check_service_downtime),
+            ("logs", self.logs.fetch_logs),
+        ]
+
+    def run_cycle(self):
+        """Run one monitoring cycle: all checks, then start any scheduled AI analysis in the background."""
+        # Run all checks concurrently, each bounded by its own deadline
+        results = self.executor.run(self.checks)
+        self.base.log_message(f"[+] Notification dispatcher: {self.services['dispatcher'].stats()}")
+        self.base.log_message(f"[+] Elasticsearch responses this cycle: {self.services['es_client'].take_bytes()} bytes")
+        self.base.flush_mail_digest()
+        self.run_scheduled_ai()
+        return results
+
+    def run_scheduled_ai(self):
+        """Start the AI providers in the background if the schedule says so; never blocks the cycle."""
+        if self.ai_runner.running:
+            return False
+        scheduled = self.schedule.due()
+        if not scheduled:
+            return False
+        return self.ai_runner.start(on_complete=lambda: self._finish_ai_run(scheduled))
+
+    def _finish_ai_run(self, scheduled):
+        """Record the run and clean up once every provider has finished or been cancelled."""
+        self.schedule.complete(scheduled)
+        self.base.log_message(f"[+] Next AI analysis at {self.schedule.next_run:%Y-%m-%d %H:%M}")
+
+        # Send digested reports before they are removed, then cleanup old log and report files
+        self.base.flush_mail_digest()
+        self.base.clean_up_files()
+
+    def close(self):
+        """Release pooled resources."""
+        self.executor.shutdown()
+        self.ai_runner.join(timeout=self.settings.ai_timeout)
+        self.services["dispatcher"].stop()
+        self.metrics.save_sketches()
+        self.base.flush_mail_digest()
+        self.services["smtp_session"].close()
+        self.services["alert_cache"].close()
+        self.services["report_cache"].close()
+        self.services["log_writer"].close()
+        self.services["es_client"].close()
@@ -0,0 +1,159 @@
+import heapq
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+class CronExpression:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week).
+
+    A plain "HH:MM" is accepted as shorthand for a daily run at that time.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        if ":" in self.expression and " " not in self.expression:
+            hour, minute = self.expression.split(":")
+            fields = [str(int(minute)), str(int(hour)), "*", "*", "*"]
+        else:
+            fields = self.expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid schedule '{expression}': expected 'HH:MM' or five cron fields")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)
+        )
+        # As in cron, when both day fields are restricted a day matching either one fires
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        # Sunday may be written as 7 in the day-of-week field
+        limit = 7 if high == 6 else high
+        for part in field.split(","):
+            part, _, step = part.partition("/")
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-"))
+            else:
+                start = int(part)
+                end = high if step else start
+            values.update(range(start, end + 1, int(step) if step else 1))
+        if not values or min(values) < low or max(values) > limit:
+            raise ValueError(f"Invalid cron field '{field}'")
+        return {value % 7 for value in values} if high == 6 else values
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        """First fire time at or after moment, to the minute."""
+        moment = moment.replace(second=0, microsecond=0)
+        # Bounded so an expression that can never fire (e.g. 31 February) fails instead of spinning
+        for _ in range(100000):
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Schedule '{self.expression}' never fires")
+
+
+class AISchedule:
+    """
+    In-memory schedule of AI runs.
+
+    Every schedule keeps its next fire time in a heap. A run is due from its fire time
+    until the window has passed. Last-run times are loaded once and written, atomically,
+    only when a run completes.
+    """
+
+    def __init__(self, schedules, window=1800, path="last_run.json", log=print):
+        self.window = timedelta(seconds=window)
+        self.path = path
+        self.log = log
+        self._lock = threading.Lock()
+        self._expressions = {schedule: CronExpression(schedule) for schedule in schedules or []}
+        self._state = self._load()
+        self._heap = []
+        now = datetime.now()
+        for schedule, expression in self._expressions.items():
+            # The earliest occurrence whose window is still open, unless it already ran
+            fire_at = expression.next_after(now - self.window)
+            last_run = self._last_run(schedule)
+            if last_run is not None and last_run >= fire_at:
+                fire_at = expression.next_after(max(last_run, fire_at) + timedelta(minutes=1))
+            heapq.heappush(self._heap, (fire_at, schedule))
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        # Write then rename so a crash never leaves a half-written state file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def _last_run(self, schedule):
+        last_run = self._state.get(schedule, {}).get("last_run")
+        try:
+            return datetime.fromisoformat(last_run) if last_run else None
+        except ValueError:
+            return None
+
+    @property
+    def next_run(self):
+        """Next fire time of any schedule, or None when nothing is scheduled."""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def due(self, now=None):
+        """
+        Claim the schedules due now, moving each to its next occurrence.
+
+        Occurrences whose window passed without a run are skipped. Returns the claimed
+        schedule names, empty when nothing is due; pass them to complete() after the run.
+        """
+        now = now or datetime.now()
+        claimed = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, schedule = heapq.heappop(self._heap)
+                if now > fire_at + self.window:
+                    self.log(f"[-] AI run scheduled for {fire_at:%Y-%m-%d %H:%M} missed its window")
+                else:
+                    claimed.append(schedule)
+                next_at = self._expressions[schedule].next_after(max(now, fire_at + timedelta(minutes=1)))
+                heapq.heappush(self._heap, (next_at, schedule))
+        return claimed
+
+    def complete(self, schedules, finished_at=None):
+        """Record a finished run for the claimed schedules and persist the state."""
+        if not schedules:
+            return
+        finished_at = finished_at or datetime.now()
+        with self._lock:
+            for schedule in schedules:
+                self._state[schedule] = {"last_run": str(finished_at)}
+            self._save()
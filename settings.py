@@ -0,0 +1,113 @@
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class Settings:
+    """
+    Configuration shared by every component, built once at startup.
+
+    Each field is exposed on components as an upper-case attribute of the same name,
+    e.g. settings.latency_threshold as self.LATENCY_THRESHOLD.
+    """
+
+    # Elasticsearch
+    kibana_url: str = ''
+    api_key: str = None
+    hits_size: int = 100
+    es_connect_timeout: float = 5
+    es_read_timeout: float = 30
+    es_retries: int = 3
+    es_backoff: float = 0.5
+    es_compress: bool = True
+    cursor_file: str = 'cursors.json'
+    cursor_max_lookback: int = 3600
+    cursor_ingest_delay: int = 30
+
+    # Checks
+    sleep_time: int = 60
+    hosts_rule_ids: list = None
+    service_rule_ids: list = None
+    latency_threshold: float = 1000
+    latency_baseline_window: int = 120
+    latency_baseline_min_samples: int = 20
+    latency_zscore: float = 3.5
+    latency_min_delta: float = 50.0
+    latency_sketch_file: str = 'latency_sketches.json'
+    latency_sketch_accuracy: float = 0.01
+    latency_sketch_save_interval: int = 300
+    cpu_threshold: float = 99
+    memory_threshold: float = 90
+    disk_threshold: float = 90
+    resource_trend_window: int = 30
+    resource_trend_min_samples: int = 5
+    resource_forecast_horizon: int = 3600
+    host_downtime_lookback: str = '24h'
+    host_buckets_size: int = 1000
+    log_template_similarity: float = 0.5
+    log_template_max: int = 1000
+    log_template_top: int = 10
+    log_categories: dict = None
+    log_category_lines: int = 50
+
+    # Notifications
+    notify_limit: int = 3
+    slack_token: str = ''
+    slack_channel: str = ''
+    webhook_url: str = ''
+    notify_rate: float = 1.0
+    notify_burst: int = 3
+    notify_batch_size: int = 10
+    smtp_server: str = ''
+    smtp_port: int = 587
+    smtp_user: str = ''
+    smtp_password: str = ''
+    email_receivers: list = None
+    mail_digest_mode: bool = False
+    alert_cache_file: str = 'alerts.db'
+    alert_renotify_ttl: int = 3600
+
+    # Log files
+    app_log_file: str = 'anomaly.log'
+    user_log_file: str = 'user_activity.log'
+    save: bool = True
+    verbose: bool = True
+    log_flush_interval: float = 1.0
+    log_buffer_lines: int = 1000
+    log_max_bytes: int = 5242880
+    log_max_age: int = 86400
+    log_backups: int = 5
+    log_compress: bool = True
+
+    # AI
+    ai_prompt: str = ''
+    ai_context: str = ''
+    model_name: str = None
+    deepseek_api_key: str = None
+    deepseek_api_url: str = None
+    deepseek_api_model: str = 'deepseek-model'
+    gpt_model_name: str = 'gpt-3.5-turbo'
+    gpt_api_key: str = None
+    ai_run_schedules: list = None
+    ai_run_window: int = 1800
+    last_run_file: str = 'last_run.json'
+    ai_input_bytes: int = 1048576
+    ai_timeout: int = 300
+    ai_token_budget: int = 8000
+    ai_stream: bool = True
+    ai_stream_preview: bool = True
+    report_cache_file: str = 'reports.db'
+    report_cache_ttl: int = 86400
+
+    def __post_init__(self):
+        # Blank values from the environment fall back to the defaults
+        self.ai_prompt = self.ai_prompt or ''
+        self.deepseek_api_key = self.deepseek_api_key or None
+        self.deepseek_api_url = self.deepseek_api_url or None
+        self.deepseek_api_model = self.deepseek_api_model or 'deepseek-model'
+        self.gpt_model_name = self.gpt_model_name or 'gpt-3.5-turbo'
+        self.gpt_api_key = self.gpt_api_key or None
+
+    def attributes(self):
+        """Yield (ATTRIBUTE, value) for every setting."""
+        for item in fields(self):
+            yield item.name.upper(), getattr(self, item.name)
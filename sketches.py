@@ -0,0 +1,227 @@
+import json
+import math
+import os
+import threading
+import time
+
+WINDOWS = (("5m", 300, 60), ("1h", 3600, 300), ("24h", 86400, 3600))
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with a fixed relative accuracy.
+
+    Values are counted in logarithmic bins, so any quantile is returned within
+    relative_accuracy of the true value however many values were added. Two sketches
+    with the same accuracy merge by adding their bin counts.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "bins", "zero_count", "count")
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    @property
+    def _log_gamma(self):
+        return math.log1p(2 * self.relative_accuracy / (1 - self.relative_accuracy))
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += count
+
+    def _collapse(self):
+        # Fold the lowest bins together; only the smallest quantiles lose accuracy
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        folded = sum(self.bins.pop(key) for key in keys[:excess])
+        self.bins[keys[excess]] += folded
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0..1), or None for an empty sketch."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        gamma = math.exp(self._log_gamma)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                # Midpoint of the bin in relative terms
+                return 2 * gamma ** key / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+    def to_dict(self):
+        return {"zero": self.zero_count, "bins": [[key, count] for key, count in self.bins.items()]}
+
+    @classmethod
+    def from_dict(cls, data, relative_accuracy=0.01, max_bins=2048):
+        sketch = cls(relative_accuracy, max_bins)
+        sketch.zero_count = data.get("zero", 0)
+        sketch.bins = {int(key): count for key, count in data.get("bins", [])}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+class LatencySketches:
+    """
+    Rolling latency percentiles per URL and phase.
+
+    Each window is a ring of time buckets (1 minute buckets for 5m, 5 minute buckets for
+    1h, 1 hour buckets for 24h), each holding a DDSketch. A window's percentiles merge the
+    buckets still inside it, and buckets that fall out of the longest window are dropped,
+    so memory stays bounded. State is written atomically to a JSON file.
+    """
+
+    def __init__(self, path="latency_sketches.json", relative_accuracy=0.01, max_bins=512, max_urls=5000, quantiles=(0.5, 0.95, 0.99)):
+        self.path = path
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.max_urls = max_urls
+        self.quantiles = quantiles
+        self._lock = threading.Lock()
+        # {url: {phase: {window: {bucket: DDSketch}}}}
+        self._sketches = {}
+        self._last_seen = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for url, entry in state.get("urls", {}).items():
+            self._last_seen[url] = entry.get("last_seen", 0)
+            self._sketches[url] = {
+                phase: {
+                    window: {
+                        int(bucket): DDSketch.from_dict(data, self.relative_accuracy, self.max_bins)
+                        for bucket, data in buckets.items()
+                    }
+                    for window, buckets in windows.items()
+                }
+                for phase, windows in entry.get("phases", {}).items()
+            }
+        self.prune()
+
+    def save(self):
+        """Persist every sketch; written then renamed so a crash never leaves a partial file."""
+        with self._lock:
+            state = {"urls": {
+                url: {
+                    "last_seen": self._last_seen.get(url, 0),
+                    "phases": {
+                        phase: {
+                            window: {str(bucket): sketch.to_dict() for bucket, sketch in buckets.items()}
+                            for window, buckets in windows.items()
+                        }
+                        for phase, windows in phases.items()
+                    },
+                }
+                for url, phases in self._sketches.items()
+            }}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def add(self, url, values, timestamp=None):
+        """
+        Add one heartbeat.
+
+        :param url: Monitored URL.
+        :param values: Mapping of phase to milliseconds.
+        :param timestamp: Epoch seconds of the heartbeat; defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if url not in self._sketches and len(self._sketches) >= self.max_urls:
+                # Make room by dropping the URL seen least recently
+                oldest = min(self._last_seen, key=self._last_seen.get)
+                del self._sketches[oldest], self._last_seen[oldest]
+            phases = self._sketches.setdefault(url, {})
+            self._last_seen[url] = max(self._last_seen.get(url, 0), timestamp)
+            for phase, value in values.items():
+                windows = phases.setdefault(phase, {})
+                for window, _, width in WINDOWS:
+                    buckets = windows.setdefault(window, {})
+                    bucket = int(timestamp // width)
+                    sketch = buckets.get(bucket)
+                    if sketch is None:
+                        sketch = buckets[bucket] = DDSketch(self.relative_accuracy, self.max_bins)
+                    sketch.add(value)
+
+    def prune(self, now=None):
+        """Drop buckets that have left their window and URLs with nothing left."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for url in list(self._sketches):
+                phases = self._sketches[url]
+                for windows in phases.values():
+                    for window, span, width in WINDOWS:
+                        buckets = windows.get(window, {})
+                        oldest = int((now - span) // width)
+                        for bucket in [bucket for bucket in buckets if bucket <= oldest]:
+                            del buckets[bucket]
+                if not any(buckets for windows in phases.values() for buckets in windows.values()):
+                    del self._sketches[url]
+                    self._last_seen.pop(url, None)
+
+    def percentiles(self, url, now=None):
+        """
+        Quantiles of each phase over each window.
+
+        :return: {phase: {window: {quantile: milliseconds}}}, empty for an unknown URL.
+        """
+        now = time.time() if now is None else now
+        result = {}
+        with self._lock:
+            for phase, windows in self._sketches.get(url, {}).items():
+                result[phase] = {}
+                for window, span, width in WINDOWS:
+                    oldest = int((now - span) // width)
+                    merged = DDSketch(self.relative_accuracy, self.max_bins)
+                    for bucket, sketch in windows.get(window, {}).items():
+                        if bucket > oldest:
+                            merged.merge(sketch)
+                    if merged.count:
+                        result[phase][window] = {q: merged.quantile(q) for q in self.quantiles}
+        return result
+
+    def format(self, url, now=None, sep="\n"):
+        """One entry per phase, e.g. "HTTP p50/p95/p99 ms: 5m 21/40/52 | 1h ... | 24h ..."."""
+        lines = []
+        labels = "/".join(f"p{q * 100:g}" for q in self.quantiles)
+        for phase, windows in self.percentiles(url, now).items():
+            if not windows:
+                continue
+            spans = " | ".join(
+                f"{window} " + "/".join(f"{value:.0f}" for value in values.values())
+                for window, values in windows.items()
+            )
+            lines.append(f"{phase.upper()} {labels} ms: {spans}")
+        return sep.join(lines)
+
+    def __len__(self):
+        return len(self._sketches)
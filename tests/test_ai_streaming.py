@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+genai = pytest.importorskip("genai")
+gptai = pytest.importorskip("gptai")
+
+from settings import Settings
+
+
+class BlockedChunk:
+    @property
+    def text(self):
+        raise ValueError("response was blocked")
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def delta(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+def test_gemini_skips_blocked_chunks():
+    ai = genai.GeminiAI(settings=Settings(save=False, verbose=False))
+    chunks = [SimpleNamespace(text="first "), BlockedChunk(), SimpleNamespace(text="last")]
+    assert list(ai.stream_text(chunks)) == ["first ", "last"]
+
+
+def test_openai_stream_is_closed_when_fully_read_or_abandoned():
+    stream = FakeStream([delta("a"), SimpleNamespace(choices=[]), delta("b")])
+    assert list(gptai.GptAI.stream_text(stream)) == ["a", "b"]
+    assert stream.closed
+
+    stream = FakeStream([delta("a"), delta("b")])
+    chunks = gptai.GptAI.stream_text(stream)
+    next(chunks)
+    chunks.close()
+    assert stream.closed
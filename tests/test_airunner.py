@@ -0,0 +1,80 @@
+import threading
+import time
+
+from airunner import AIRunner
+from base import Base
+from settings import Settings
+
+
+def run(runner):
+    done = threading.Event()
+    assert runner.start(on_complete=done.set)
+    assert done.wait(10)
+    runner.join(1)
+
+
+def test_providers_run_in_parallel_on_shared_inputs():
+    seen = []
+
+    def provider(name):
+        def call(cancel, logs):
+            time.sleep(0.3)
+            seen.append((name, logs))
+        return call
+
+    prepared = []
+    runner = AIRunner([("a", provider("a")), ("b", provider("b"))], timeout=5, prepare=lambda: prepared.append(1) or "logs", log=lambda message: None)
+    started = time.monotonic()
+    run(runner)
+    assert time.monotonic() - started < 0.55
+    assert sorted(seen) == [("a", "logs"), ("b", "logs")] and prepared == [1]
+
+
+def test_a_slow_provider_is_cancelled_at_the_deadline_and_a_failing_one_logged():
+    logged, published = [], []
+
+    def slow(cancel, logs):
+        # Cooperative: waits on its work, then checks the event before publishing
+        cancel.wait(5)
+        if not cancel.is_set():
+            published.append("slow")
+
+    def failing(cancel, logs):
+        raise RuntimeError("quota exceeded")
+
+    def quick(cancel, logs):
+        published.append("quick")
+
+    runner = AIRunner([("slow", slow), ("failing", failing), ("quick", quick)], timeout=0.3, log=logged.append)
+    started = time.monotonic()
+    run(runner)
+    assert time.monotonic() - started < 2
+    assert published == ["quick"]
+    assert any("slow exceeded 0.3s and was cancelled" in message for message in logged)
+    assert any("failing failed: quota exceeded" in message for message in logged)
+    assert any("quick finished" in message for message in logged)
+
+
+def test_only_one_run_at_a_time():
+    release = threading.Event()
+    runner = AIRunner([("a", lambda cancel, logs: release.wait(5))], timeout=5, log=lambda message: None)
+    assert runner.start()
+    assert runner.running and not runner.start()
+    release.set()
+    runner.join(5)
+    assert not runner.running
+
+
+def test_a_cancelled_stream_discards_the_partial_report(tmp_path):
+    base = Base(settings=Settings(save=False, verbose=False, ai_stream_preview=False), cursor_store=object())
+    cancel = threading.Event()
+    report = tmp_path / "report.md"
+
+    def chunks():
+        yield "first part "
+        cancel.set()
+        yield "late part"
+
+    assert base.stream_report("Test", chunks(), str(report), cancel) is None
+    assert not report.exists()
+    assert base.stream_report("Test", iter(["all ", "done"]), str(report)) == "all done"
@@ -0,0 +1,75 @@
+import time
+
+from alertcache import AlertCache
+from base import Base
+from settings import Settings
+
+
+def test_is_new_does_not_record(tmp_path):
+    cache = AlertCache(str(tmp_path / "alerts.db"), ttl=3600)
+    assert cache.is_new("web-1", "cpu", "critical")
+    assert cache.is_new("web-1", "cpu", "critical")
+    cache.record("web-1", "cpu", "critical")
+    assert not cache.is_new("web-1", "cpu", "critical")
+    cache.close()
+
+
+def test_severity_change_and_expired_ttl_notify_again(tmp_path, monkeypatch):
+    cache = AlertCache(str(tmp_path / "alerts.db"), ttl=60)
+    cache.record("web-1", "cpu", "warning")
+    assert cache.is_new("web-1", "cpu", "critical")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.is_new("web-1", "cpu", "warning")
+    cache.close()
+
+
+def test_fingerprints_survive_a_restart(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    cache = AlertCache(path)
+    cache.record("https://a", "latency")
+    cache.close()
+    cache = AlertCache(path)
+    assert not cache.is_new("https://a", "latency")
+    cache.close()
+
+
+def test_only_sent_alerts_start_their_ttl(tmp_path):
+    cache = AlertCache(str(tmp_path / "alerts.db"))
+    base = Base(settings=Settings(save=False, verbose=False), alert_cache=cache, cursor_store=object())
+    items = [{"name": f"host-{index}", "level": "critical"} for index in range(5)]
+    new = base.new_alerts(items, "cpu", ("name",), "level")
+    assert new == items
+    base.record_alerts(new[:3], "cpu", ("name",), "level")
+    assert base.new_alerts(items, "cpu", ("name",), "level") == items[3:]
+    cache.close()
+
+
+def test_alerts_dropped_by_the_dispatcher_stay_unrecorded(tmp_path):
+    from dispatcher import NotificationDispatcher
+    from slack_sdk.errors import SlackApiError
+
+    class Response(dict):
+        status_code = 500
+        headers = {}
+
+    class Slack:
+        def __init__(self, fail):
+            self.fail = fail
+
+        def chat_postMessage(self, channel, text):
+            if self.fail:
+                raise SlackApiError("error", Response(error="channel_not_found"))
+
+    cache = AlertCache(str(tmp_path / "alerts.db"))
+    settings = Settings(save=False, verbose=False, slack_channel="#ops", slack_token="token")
+    item = {"name": "web-1", "level": "critical"}
+    for fail, recorded in ((True, False), (False, True)):
+        dispatcher = NotificationDispatcher(slack_client=Slack(fail), rate=1000, burst=1000, log=lambda message: None)
+        base = Base(settings=settings, alert_cache=cache, dispatcher=dispatcher, cursor_store=object())
+        assert base.notify_alert(item, "web-1 CPU", "cpu", ("name",), "level")
+        # Queued, but nothing is recorded until the batch is posted
+        assert cache.is_new("web-1", "cpu", "critical")
+        dispatcher.start().stop()
+        assert cache.is_new("web-1", "cpu", "critical") is not recorded
+    cache.close()
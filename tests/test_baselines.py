@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from baselines import LatencyBaselines
+
+
+def steady(count, http=100.0):
+    return [(10.0, 20.0, http + (index % 5)) for index in range(count)]
+
+
+def test_urls_warm_up_before_they_are_scored():
+    baselines = LatencyBaselines(window=50, min_samples=5)
+    for sample in steady(5):
+        scores, medians, anomalous = baselines.score(["a"], [sample])
+        assert np.isnan(scores).all() and np.isnan(medians).all() and not anomalous.any()
+    scores, medians, anomalous = baselines.score(["a"], [(10.0, 20.0, 102.0)])
+    assert medians[0, 2] == 102.0
+    assert not anomalous.any()
+
+
+def test_a_deviation_beyond_the_zscore_and_min_delta_is_anomalous():
+    baselines = LatencyBaselines(window=50, min_samples=5, threshold=3.5, min_delta=50.0)
+    baselines.score(["a"], [(10.0, 20.0, 100.0)], earlier=[steady(20)])
+    scores, medians, anomalous = baselines.score(["a", "b"], [(10.0, 20.0, 400.0), (10.0, 20.0, 400.0)])
+    assert anomalous.tolist() == [True, False]
+    assert scores[0, 2] > 3.5
+    # Far in MADs but within min_delta of the median is jitter, not an anomaly
+    _, _, anomalous = baselines.score(["a"], [(10.0, 20.0, 140.0)])
+    assert not anomalous.any()
+
+
+def test_earlier_samples_join_the_baseline_before_scoring():
+    baselines = LatencyBaselines(window=10, min_samples=5)
+    scores, medians, _ = baselines.score(["a"], [(1.0, 1.0, 1.0)], earlier=[steady(30)])
+    # Only the last window's worth of earlier samples is kept, so the URL is ready at once
+    assert medians[0, 0] == 10.0
+    assert baselines._count[baselines._rows["a"]] == 10
+
+
+def test_least_recently_seen_url_is_evicted_at_capacity():
+    baselines = LatencyBaselines(window=5, min_samples=1, max_urls=2)
+    baselines.score(["a", "b"], [(1.0, 1.0, 1.0), (1.0, 1.0, 1.0)])
+    baselines.score(["b"], [(1.0, 1.0, 1.0)])
+    baselines.score(["c"], [(1.0, 1.0, 1.0)])
+    assert set(baselines._rows) == {"b", "c"}
+    _, medians, _ = baselines.score(["c"], [(1.0, 1.0, 1.0)])
+    assert medians[0, 0] == 1.0
@@ -0,0 +1,57 @@
+from classifier import LogClassifier
+
+
+def test_each_line_is_counted_once_per_category(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text(
+        "GET / 200\n"
+        "connection refused after timeout\n"
+        "PHP Fatal error: Undefined variable $x\n"
+        "pod OOMKilled\n"
+    )
+    lines, counts = LogClassifier().classify(str(path))
+    assert counts["Network Issues"] == 1
+    assert lines["Network Issues"] == ["connection refused after timeout"]
+    assert counts["PHP Errors"] == 1
+    assert counts["Kubernetes Errors"] == 1
+    assert counts["SSL Errors"] == 0
+
+
+def test_only_the_most_recent_lines_are_kept_across_chunks(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"timeout {index}\n" for index in range(100)))
+    classifier = LogClassifier({"Timeouts": r"timeout"}, max_lines=3, chunk_size=64)
+    lines, counts = classifier.classify(str(path))
+    assert counts["Timeouts"] == 100
+    assert lines["Timeouts"] == ["timeout 97", "timeout 98", "timeout 99"]
+    assert classifier.format(str(path)).startswith("## Timeouts (last 3 of 100)")
+
+
+def test_matching_is_case_insensitive_and_format_skips_empty_categories(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("NETWORK UNREACHABLE\n")
+    text = LogClassifier().format(str(path))
+    assert text == "## Network Issues\n- NETWORK UNREACHABLE"
+
+
+def test_overlapping_categories_each_count_the_line(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("upstream timeout: connection refused\nok\n")
+    classifier = LogClassifier({"Timeouts": r"timeout", "Network": r"connection refused|timeout"})
+    lines, counts = classifier.classify(str(path))
+    assert counts == {"Timeouts": 1, "Network": 1}
+    assert lines["Network"] == ["upstream timeout: connection refused"]
+
+
+def test_patterns_with_their_own_groups_and_backreferences(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("retry retry failed\nuser=alice denied\nretry once failed\n")
+    classifier = LogClassifier({
+        "Users": r"user=(?P<name>\w+) denied",
+        "Repeated": r"\b(\w+) \1\b",
+        "Failures": r"(fail)ed",
+        "Also users": r"(?P<name>alice)",
+    })
+    lines, counts = classifier.classify(str(path))
+    assert counts == {"Users": 1, "Repeated": 1, "Failures": 2, "Also users": 1}
+    assert lines["Repeated"] == ["retry retry failed"]
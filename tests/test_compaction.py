@@ -0,0 +1,47 @@
+from compaction import LogCompactor
+
+
+def test_repeats_collapse_into_their_latest_occurrence_with_a_count():
+    text = "\n".join([
+        "2024-05-01T10:00:01 request 17 took 12 ms",
+        "cache warmed",
+        "2024-05-01T10:00:02 request 18 took 15 ms",
+        "",
+        "2024-05-01T10:00:03 request 19 took 11 ms",
+    ])
+    compacted = LogCompactor().compact([text])
+    assert compacted == "cache warmed\n2024-05-01T10:00:03 request 19 took 11 ms (x3)"
+
+
+def test_repeats_are_counted_across_texts():
+    compacted = LogCompactor().compact(["worker 1 failed", "worker 2 failed\nworker 3 failed"])
+    assert compacted == "worker 3 failed (x3)"
+
+
+def test_severity_ranks_before_recency_under_the_budget():
+    lines = ["fatal: disk is down", "info one", "warning: slow disk", "info two", "error: connection refused", "info three"]
+    # Room for about three lines: the fatal, error and warning lines win over newer info lines
+    compactor = LogCompactor(token_budget=17, chars_per_token=4)
+    assert compactor.compact(["\n".join(lines)]).splitlines() == ["fatal: disk is down", "warning: slow disk", "error: connection refused"]
+
+
+def test_recency_breaks_ties_and_output_keeps_the_original_order():
+    lines = [f"info event {name}" for name in ("alpha", "beta", "gamma", "delta")]
+    compactor = LogCompactor(token_budget=9, chars_per_token=4)
+    assert compactor.compact(["\n".join(lines)]).splitlines() == ["info event gamma", "info event delta"]
+
+
+def test_the_output_never_exceeds_the_character_budget():
+    compactor = LogCompactor(token_budget=50, chars_per_token=4)
+    text = "\n".join(f"error in module {chr(97 + index % 26)}{index // 26} while parsing" for index in range(500))
+    compacted = compactor.compact([text])
+    assert 0 < len(compacted) <= 200
+    # A line longer than the whole budget is skipped rather than truncated
+    assert compactor.compact(["x" * 500]) == ""
+
+
+def test_severity_levels():
+    assert LogCompactor.severity("Pod OOMKilled") == 3
+    assert LogCompactor.severity("Exception in thread main") == 2
+    assert LogCompactor.severity("CPU usage high") == 1
+    assert LogCompactor.severity("all good") == 0
@@ -0,0 +1,35 @@
+import time
+
+from cursors import CursorStore
+
+
+def test_first_window_looks_back_and_trails_the_ingest_delay(tmp_path):
+    store = CursorStore(str(tmp_path / "cursors.json"), max_lookback=3600, ingest_delay=30)
+    now = int(time.time() * 1000)
+    start, end = store.window("latency", 60)
+    assert abs(end - (now - 30000)) < 1000
+    assert end - start == 60000
+
+
+def test_windows_tile_and_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cursors.json")
+    store = CursorStore(path, ingest_delay=0)
+    first = store.window("logs", 60)
+    store.commit("logs", first)
+    second = CursorStore(path, ingest_delay=0).window("logs", 60)
+    assert second[0] == first[1]
+
+
+def test_catch_up_is_capped_by_max_lookback(tmp_path):
+    store = CursorStore(str(tmp_path / "cursors.json"), max_lookback=600, ingest_delay=0)
+    store.commit("logs", (0, 1000))
+    start, end = store.window("logs", 60)
+    assert end - start <= 600 * 1000 + 1000
+
+
+def test_uncommitted_window_is_read_again(tmp_path):
+    store = CursorStore(str(tmp_path / "cursors.json"), ingest_delay=0)
+    mark = int(time.time() * 1000) - 5000
+    store.commit("cpu", (0, mark))
+    assert store.window("cpu", 60)[0] == mark
+    assert store.window("cpu", 60)[0] == mark
@@ -0,0 +1,103 @@
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from dispatcher import NotificationDispatcher, TokenBucket
+
+
+class Response(dict):
+    def __init__(self, status_code, headers=None, error="failed"):
+        super().__init__(error=error)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSlack:
+    def __init__(self, failures=()):
+        self.posts = []
+        self.failures = list(failures)
+
+    def chat_postMessage(self, channel, text):
+        if self.failures:
+            raise SlackApiError("error", self.failures.pop(0))
+        self.posts.append((channel, text))
+
+
+def dispatcher(slack, **kwargs):
+    return NotificationDispatcher(slack_client=slack, rate=1000, burst=1000, log=lambda message: None, **kwargs)
+
+
+def test_queued_messages_are_coalesced_per_destination():
+    slack = FakeSlack()
+    sender = dispatcher(slack)
+    for index in range(3):
+        sender.enqueue(("slack", "#ops"), f"ops {index}")
+    sender.enqueue(("slack", "#db"), "db 0")
+    sender.start().stop()
+    assert sorted(slack.posts) == [("#db", "db 0"), ("#ops", "ops 0\n\nops 1\n\nops 2")]
+    stats = sender.stats()
+    assert (stats["sent"], stats["failed"], stats["queue_depth"]) == (4, 0, 0)
+    assert sender._posts == 2 and stats["avg_send_latency"] >= 0
+
+
+def test_batches_are_split_at_max_chars_and_max_batch():
+    slack = FakeSlack()
+    sender = dispatcher(slack, max_chars=25, max_batch=10)
+    for index in range(5):
+        sender.enqueue(("slack", "#ops"), f"message {index:02d}")
+    sender.start().stop()
+    assert [text for _, text in slack.posts] == ["message 00\n\nmessage 01", "message 02\n\nmessage 03", "message 04"]
+
+    slack = FakeSlack()
+    sender = dispatcher(slack, max_batch=2)
+    for index in range(3):
+        sender.enqueue(("slack", "#ops"), str(index))
+    sender.start().stop()
+    assert [text for _, text in slack.posts] == ["0\n\n1", "2"]
+
+
+def test_a_429_pauses_for_retry_after_and_retries():
+    slack = FakeSlack(failures=[Response(429, {"Retry-After": "1"})])
+    sender = dispatcher(slack)
+    sender.enqueue(("slack", "#ops"), "hello")
+    sender.start().stop()
+    assert slack.posts == [("#ops", "hello")]
+    assert sender.stats()["sent"] == 1 and sender.stats()["failed"] == 0
+
+
+def test_stop_flushes_messages_queued_while_running():
+    slack = FakeSlack()
+    sender = dispatcher(slack).start()
+    for index in range(20):
+        sender.enqueue(("slack", "#ops"), str(index))
+    sender.stop()
+    assert sum(len(text.split("\n\n")) for _, text in slack.posts) == 20
+
+
+def test_failed_posts_are_counted_per_message():
+    slack = FakeSlack(failures=[Response(500, error="channel_not_found")])
+    logged = []
+    sender = NotificationDispatcher(slack_client=slack, rate=1000, burst=1000, log=logged.append)
+    sender.enqueue(("slack", "#ops"), "a")
+    sender.enqueue(("slack", "#ops"), "b")
+    sender.start().stop()
+    stats = sender.stats()
+    assert (stats["sent"], stats["failed"]) == (0, 2)
+    assert any("channel_not_found" in message for message in logged)
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=1000, capacity=2)
+    bucket.acquire(), bucket.acquire()
+    assert bucket.tokens < 1
+    bucket.pause(0.05)
+    assert bucket.tokens == 0 and bucket.blocked_until > 0
+
+
+def test_on_sent_runs_only_for_delivered_messages():
+    delivered = []
+    slack = FakeSlack(failures=[Response(500)])
+    sender = dispatcher(slack, max_batch=1)
+    sender.enqueue(("slack", "#ops"), "dropped", lambda: delivered.append("dropped"))
+    sender.enqueue(("slack", "#ops"), "posted", lambda: delivered.append("posted"))
+    sender.start().stop()
+    assert delivered == ["posted"]
@@ -0,0 +1,78 @@
+from drain import WILDCARD, TemplateMiner
+
+
+def test_messages_differing_in_variables_share_a_template():
+    miner = TemplateMiner()
+    first, is_new = miner.add("User 17 logged in from 10.0.0.1", "auth")
+    second, again = miner.add("User 42 logged in from 10.0.0.9", "auth")
+    assert is_new and not again and first is second
+    assert first.template == f"User {WILDCARD} logged in from {WILDCARD}"
+    assert first.count == 2 and first.services["auth"] == 2
+
+
+def test_differing_words_become_wildcards_once_similar_enough():
+    miner = TemplateMiner(similarity=0.5)
+    template, _ = miner.add("Connection to db closed cleanly")
+    miner.add("Connection to cache closed cleanly")
+    assert template.template == f"Connection to {WILDCARD} closed cleanly"
+    _, is_new = miner.add("Worker pool resized after rebalance")
+    assert is_new and len(miner) == 2
+
+
+def test_messages_of_other_lengths_never_merge():
+    miner = TemplateMiner()
+    miner.add("disk full")
+    _, is_new = miner.add("disk full on /var")
+    assert is_new and len(miner) == 2
+
+
+def test_top_orders_by_count_and_counts_services():
+    miner = TemplateMiner()
+    for service in ("api", "api", "worker"):
+        miner.add("Request failed with status 500", service)
+    miner.add("Cache warmed")
+    [first, second] = miner.top(2)
+    assert first.count == 3 and dict(first.services) == {"api": 2, "worker": 1}
+    assert second.template == "Cache warmed"
+
+
+def test_least_recently_matched_templates_are_evicted():
+    miner = TemplateMiner(max_templates=2)
+    old, _ = miner.add("alpha happened")
+    miner.add("beta went wrong here")
+    miner.add("alpha happened")
+    miner.add("gamma is a longer message than the rest")
+    assert len(miner) == 2
+    assert [template.template for template in miner.top()] == ["alpha happened", "gamma is a longer message than the rest"]
+    assert old in miner.top()
+
+
+
+def leaves(node):
+    found = [node[None]] if None in node else []
+    for key, child in node.items():
+        if key is not None:
+            found.extend(leaves(child))
+    return found
+
+
+def test_eviction_prunes_emptied_branches_of_the_prefix_tree():
+    miner = TemplateMiner(depth=4, max_templates=3)
+    # Distinct lengths and leading words, so every template gets its own branch
+    for index in range(200):
+        miner.add(" ".join([f"service{chr(97 + index % 26)}", f"event{chr(97 + index // 26)}"] + ["word"] * (index % 9)))
+    assert len(miner) == 3
+    remaining = leaves(miner._root)
+    assert len(remaining) == 3 and all(remaining)
+    # One node per token count, then one per leading token on the way to each leaf
+    assert len(miner._root) <= 3
+    assert sum(len(branch) for branch in miner._root.values()) <= 3
+
+
+def test_a_leaf_shared_with_a_live_template_is_kept():
+    miner = TemplateMiner(depth=4, similarity=0.9, max_templates=2)
+    miner.add("disk full on alpha")
+    miner.add("disk full on beta")
+    miner.add("cache miss")
+    assert [template.template for template in miner.top()] == ["disk full on beta", "cache miss"]
+    assert [len(leaf) for leaf in leaves(miner._root)] == [1, 1]
@@ -0,0 +1,55 @@
+import pytest
+
+from elasticlogs import ElasticLogs
+from settings import Settings
+
+
+class FakeCursors:
+    def __init__(self):
+        self.commits = []
+
+    def window(self, check, lookback):
+        return (0, 1000)
+
+    def commit(self, check, window):
+        self.commits.append(window)
+
+
+class FakeClient:
+    def __init__(self, pages, fail_after=None):
+        self.pages = pages
+        self.fail_after = fail_after
+
+    def paginate(self, base_url, index, query, page_size):
+        for number, page in enumerate(self.pages):
+            if number == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield page
+
+
+def hit(timestamp, message):
+    return {"_source": {"@timestamp": timestamp, "message": message, "service": {"name": "svc"}}, "sort": [timestamp, 0]}
+
+
+@pytest.fixture
+def make_logs():
+    def make(client):
+        logs = ElasticLogs(settings=Settings(save=False, verbose=False, user_log_file=None, notify_limit=1), es_client=client, cursor_store=FakeCursors())
+        logs.alerts = []
+        logs.alert_log_issue = logs.alerts.append
+        return logs
+    return make
+
+
+def test_cursor_advances_per_page_and_to_window_end(make_logs):
+    logs = make_logs(FakeClient([[hit(10, "disk full on /var")], [hit(20, "user 42 logged in")]]))
+    assert logs.fetch_logs() == 2
+    assert logs.cursors.commits == [(0, 10), (0, 20), (0, 1000)]
+    # NOTIFY_LIMIT holds across pages
+    assert len(logs.alerts) == 1
+
+
+def test_failure_mid_stream_keeps_the_handled_pages_committed(make_logs):
+    logs = make_logs(FakeClient([[hit(10, "disk full on /var")], [hit(20, "user 42 logged in")]], fail_after=1))
+    assert logs.fetch_logs() is None
+    assert logs.cursors.commits == [(0, 10)]
@@ -0,0 +1,53 @@
+import gzip
+import http.server
+import json
+import threading
+
+import pytest
+
+from esclient import ElasticClient
+
+BODY = json.dumps({"hits": {"hits": [{"_source": {"message": "x" * 64}} for _ in range(200)]}}).encode()
+PAYLOAD = gzip.compress(BODY)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        if "chunked" in self.path:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(PAYLOAD), 100):
+                chunk = PAYLOAD[start:start + 100]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("path", ["/_search", "/chunked/_search"])
+def test_bytes_are_counted_compressed_as_received(url, path):
+    client = ElasticClient("key", compress=False)
+    response = client.search(url + path, {"query": {"match_all": {}}})
+    assert client.take_bytes() == len(PAYLOAD)
+    assert client.take_bytes() == 0
+    assert len(client.decode(response)["hits"]["hits"]) == 200
+    client.close()
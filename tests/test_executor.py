@@ -0,0 +1,51 @@
+import threading
+
+from executor import CycleExecutor
+
+
+def test_checks_run_concurrently_and_report_status():
+    executor = CycleExecutor(timeout=5, log=lambda message: None)
+    barrier = threading.Barrier(2, timeout=2)
+    try:
+        results = executor.run([
+            ("first", barrier.wait),
+            ("second", barrier.wait),
+            ("broken", lambda: 1 / 0),
+        ])
+    finally:
+        executor.shutdown()
+    statuses = {item["name"]: item["status"] for item in results}
+    assert statuses == {"first": "ok", "second": "ok", "broken": "error"}
+
+
+def test_overrunning_check_times_out_and_is_skipped_next_cycle():
+    executor = CycleExecutor(timeout=0.1, log=lambda message: None)
+    release = threading.Event()
+    try:
+        first = executor.run([("slow", release.wait)])
+        second = executor.run([("slow", release.wait)])
+    finally:
+        release.set()
+        executor.shutdown()
+    assert first[0]["status"] == "timeout"
+    assert second[0]["status"] == "skipped"
+
+
+def test_direct_log_writes_do_not_interleave(tmp_path):
+    from base import Base
+
+    path = tmp_path / "app.log"
+    base = Base.__new__(Base)
+    base.log_writer = None
+    line = "x" * 5000 + "\n"
+
+    def write():
+        for _ in range(50):
+            base.append_to_file(str(path), line)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert path.read_text().splitlines() == [line.strip()] * 200
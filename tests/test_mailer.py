@@ -0,0 +1,92 @@
+import smtplib
+
+import pytest
+
+import mailer
+from mailer import MailDigest, SMTPSession, build_message
+
+
+class FakeSMTP:
+    connections = []
+
+    def __init__(self, server, port, timeout=None):
+        self.sent = []
+        self.drop_next = False
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.user = user
+
+    def sendmail(self, sender, receivers, message):
+        if self.drop_next:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append((sender, receivers, message))
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.connections = []
+    monkeypatch.setattr(mailer.smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def test_one_connection_is_reused_across_sends(smtp):
+    session = SMTPSession("mail", 587, "user", "secret")
+    session.sendmail("a@x.io", ["b@x.io"], "one")
+    session.sendmail("a@x.io", ["b@x.io"], "two")
+    assert len(smtp.connections) == 1 and len(smtp.connections[0].sent) == 2
+    session.close()
+    assert smtp.connections[0].closed
+
+
+def test_a_dropped_connection_is_reopened_and_the_send_retried(smtp):
+    session = SMTPSession("mail", 587, "user", "secret")
+    session.sendmail("a@x.io", ["b@x.io"], "one")
+    smtp.connections[0].drop_next = True
+    session.sendmail("a@x.io", ["b@x.io"], "two")
+    assert len(smtp.connections) == 2
+    assert [message for _, _, message in smtp.connections[1].sent] == ["two"]
+
+
+def test_a_second_failure_is_raised(smtp, monkeypatch):
+    def disconnected(*args):
+        raise smtplib.SMTPServerDisconnected("gone")
+
+    monkeypatch.setattr(FakeSMTP, "sendmail", disconnected)
+    session = SMTPSession("mail", 587, "user", "secret")
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        session.sendmail("a@x.io", ["b@x.io"], "one")
+    assert len(smtp.connections) == 2
+
+
+def test_the_digest_groups_per_receiver_list_and_attaches_each_file_once():
+    digest = MailDigest()
+    digest.add(["ops@x.io"], "High CPU", "web-1 at 99%", "anomaly.log")
+    digest.add(["ops@x.io"], "High Latency", "api slow", "anomaly.log")
+    digest.add(["ops@x.io"], "AI Analysis", "report", "report.md")
+    digest.add(["db@x.io", "ops@x.io"], "Host Down", "db-1 silent")
+    digests = {tuple(receivers): rest for receivers, *rest in digest.drain()}
+
+    subject, body, attachments = digests[("ops@x.io",)]
+    assert subject == "Kibalert digest: 3 notifications"
+    assert body.index("High CPU") < body.index("High Latency") < body.index("AI Analysis")
+    assert attachments == ["anomaly.log", "report.md"]
+    assert digests[("db@x.io", "ops@x.io")] == ["Host Down", "Host Down\n---------\ndb-1 silent", []]
+    assert digest.drain() == []
+
+
+def test_build_message_attaches_files_and_skips_missing_ones(tmp_path):
+    path = tmp_path / "anomaly.log"
+    path.write_text("line\n")
+    logged = []
+    message = build_message("a@x.io", ["b@x.io", "c@x.io"], "Subject", "Body", [str(path), str(tmp_path / "missing.log")], log=logged.append)
+    assert message["To"] == "b@x.io, c@x.io"
+    assert [part.get_filename() for part in message.get_payload()[1:]] == ["anomaly.log"]
+    assert logged and "Failed to attach file" in logged[0]
@@ -0,0 +1,120 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from metrics import Metrics
+from settings import Settings
+
+
+def cpu_hit(name, usage):
+    return {"fields": {"host.name": [name], "@timestamp": ["2024-05-01T10:00:00Z"], "host.cpu.usage": [usage]}}
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    settings = Settings(save=False, verbose=False, cpu_threshold=90, latency_sketch_file=str(tmp_path / "sketches.json"))
+    return Metrics(settings=settings, es_client=object(), cursor_store=object())
+
+
+def test_integral_cpu_readings_are_checked(metrics):
+    hits = [cpu_hit("full", 1), cpu_hit("busy", 95), cpu_hit("idle", 0), cpu_hit("flag", True)]
+    affected = metrics.process_cpu_data({"hits": {"hits": hits}})
+    assert [(record.name, record.cpu_usage) for record in affected] == [("full", 100.0), ("busy", 95.0)]
+    assert all(record.level == "critical" for record in affected)
+
+
+def latency_hit(url, timestamps, http_ms):
+    beats = [
+        {"fields": {"url.full": [url], "@timestamp": [timestamp], "tcp.rtt.connect.us": [1000], "tls.rtt.handshake.us": [2000], "http.rtt.total.us": [int(ms * 1000)]}}
+        for timestamp, ms in zip(timestamps, http_ms)
+    ]
+    return dict(beats[0], inner_hits={"heartbeats": {"hits": {"hits": beats}}})
+
+
+def stamps(count, minute=0):
+    return [f"2024-05-01T10:{minute:02d}:{59 - second:02d}Z" for second in range(count)]
+
+
+def test_every_heartbeat_feeds_the_baseline(metrics):
+    metrics.baselines.min_samples = 20
+    data = {"hits": {"hits": [latency_hit("https://a", stamps(25), [100 + index % 5 for index in range(25)])]}}
+    assert metrics.process_latency_data(data) == []
+    assert metrics.baselines._count[metrics.baselines._rows["https://a"]] == 25
+
+    # The next window's spike is judged against the baseline built from all 25 heartbeats
+    data = {"hits": {"hits": [latency_hit("https://a", stamps(1, minute=1), [500])]}}
+    [record] = metrics.process_latency_data(data)
+    assert (record.level, record.phase, record.http) == ("anomaly", "http", 500.0)
+    assert record.baseline == 102.0 and record.score > 3.5
+
+    message = metrics.generate_notification_message(record, "latency", metrics.LATENCY_THRESHOLD)
+    assert "Latency Deviating From Baseline" in message and "Exceeded threshold" not in message
+    assert f"HTTP 500.0 ms is {record.score} MADs above its baseline median of 102.0 ms" in message
+    subject, body = metrics.latency_summary([record])
+    assert subject == "Latency Deviating From Baseline on 1 Hosts"
+    assert "exceeded" not in body and "deviated from their own baseline" in body
+
+
+def test_the_threshold_is_a_hard_ceiling_once_a_baseline_exists(metrics):
+    metrics.LATENCY_THRESHOLD = 1000
+    data = {"hits": {"hits": [latency_hit("https://slow", stamps(30), [1500] * 30)]}}
+    [record] = metrics.process_latency_data(data)
+    assert record.level == "critical"
+
+    # Steady at 1500 ms, so no anomaly against its own baseline, yet still above the ceiling
+    data = {"hits": {"hits": [latency_hit("https://slow", stamps(1, minute=1), [1500])]}}
+    [record] = metrics.process_latency_data(data)
+    assert record.level == "critical" and record.baseline is None
+    assert "Exceeded threshold: 1000 ms" in metrics.generate_notification_message(record, "latency", 1000)
+    assert metrics.latency_summary([record])[0] == "High Latency Detected on 1 Hosts"
+
+
+def test_phases_a_monitor_lacks_are_skipped(metrics):
+    hit = latency_hit("http://plain", stamps(1), [1500])
+    for beat in [hit] + hit["inner_hits"]["heartbeats"]["hits"]["hits"]:
+        beat["fields"].pop("tls.rtt.handshake.us", None)
+    [record] = metrics.process_latency_data({"hits": {"hits": [hit]}})
+    assert record.tls is None and record.http == 1500.0
+    assert "tls" not in metrics.sketches.percentiles("http://plain")
+    message = metrics.generate_notification_message(record, "latency", 1000)
+    assert "HTTP Latency: 1500.0 ms" in message and "TLS" not in message
+
+
+def test_sketches_are_saved_on_an_interval_and_on_demand(metrics, tmp_path):
+    path = tmp_path / "sketches.json"
+    metrics.process_latency_data({"hits": {"hits": [latency_hit("https://a", stamps(3), [100, 100, 100])]}})
+    assert not path.exists()
+    metrics.save_sketches()
+    assert path.exists()
+    metrics.LATENCY_SKETCH_SAVE_INTERVAL = 0
+    path.unlink()
+    metrics.process_latency_data({"hits": {"hits": [latency_hit("https://a", stamps(1, minute=1), [100])]}})
+    assert path.exists()
+
+
+def test_memory_and_disk_from_their_metricsets_feed_the_trends(metrics):
+    memory = {"hits": {"hits": [{"fields": {"host.name": ["web-1"], "@timestamp": ["2024-05-01T10:00:05Z"], "system.memory.actual.used.pct": [0.42]}}]}}
+    disk = {"aggregations": {"hosts": {"buckets": [
+        {"key": "web-1", "usage": {"value": 0.8}, "latest": {"value": 1714557610000}},
+        {"key": "db-1", "usage": {"value": 0.5}, "latest": {"value": 1714557610000}},
+    ]}}}
+    records = metrics.process_cpu_data({"hits": {"hits": [cpu_hit("web-1", 0.5)]}}, memory, disk)
+    assert records == []
+    samples = metrics.resource_samples([], memory, disk)
+    assert samples["web-1"][2:] == [42.0, 80.0] and samples["web-1"][0] == 1714557610
+    assert samples["db-1"][3] == 50.0
+    row = metrics.trends._rows["web-1"]
+    assert metrics.trends._values[row, 0].tolist() == [50.0, 42.0, 80.0]
+
+
+def test_memory_and_disk_already_over_their_threshold_are_alerted(metrics):
+    memory = {"hits": {"hits": [{"fields": {"host.name": ["web-1"], "@timestamp": ["2024-05-01T10:00:05Z"], "system.memory.actual.used.pct": [0.95]}}]}}
+    disk = {"aggregations": {"hosts": {"buckets": [
+        {"key": "web-1", "usage": {"value": 0.5}, "latest": {"value": 1714557610000}},
+        {"key": "db-1", "usage": {"value": 0.97}, "latest": {"value": 1714557610000}},
+    ]}}}
+    alerts = metrics.resource_alerts({"hits": {"hits": [cpu_hit("web-1", 0.5)]}}, memory, disk)
+    assert [(alert["name"], alert["resource"], alert["current"]) for alert in alerts] == [("web-1", "memory", 95.0), ("db-1", "disk", 97.0)]
+    assert all(alert["level"] == "critical" for alert in alerts)
+    message = metrics.generate_notification_message(alerts[1], "resource", None)
+    assert "High Disk Usage Alert on db-1" in message and "Threshold: 90%" in message
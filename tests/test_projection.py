@@ -0,0 +1,46 @@
+from projection import Projection
+
+SERVICE = Projection("ServiceRecord", {
+    "name": ("monitor.name", "unknown"),
+    "status": ("monitor.status", "down"),
+    "message": ("error.exception[0].message", lambda: "no message"),
+    "latency": ("http.rtt.total.us", 0),
+}, extra=("level",), docvalues=("latency",))
+
+FLAT = Projection("AlertRecord", {
+    "host": ("host.name", "unknown"),
+    "reason": ("kibana.alert.reason", ""),
+}, flat=True)
+
+
+def test_nested_paths_list_indexes_and_docvalues():
+    hit = {
+        "_source": {"monitor": {"name": "api", "status": "up"}, "error": {"exception": [{"message": "boom"}]}},
+        "fields": {"http.rtt.total.us": [1500]},
+    }
+    record = next(SERVICE.hits([hit]))
+    assert (record.name, record.status, record.message, record.latency, record.level) == ("api", "up", "boom", 1500, None)
+    assert record["name"] == "api" and record.get("missing", "x") == "x"
+    assert dict(record.items())["level"] is None
+
+
+def test_missing_fields_take_their_defaults():
+    record = next(SERVICE.hits([{}]))
+    assert (record.name, record.status, record.message, record.latency) == ("unknown", "down", "no message", 0)
+
+
+def test_malformed_sources_fall_back_to_the_checked_extractor():
+    hit = {"_source": {"monitor": "not an object", "error": {"exception": "nor a list"}}, "fields": {"http.rtt.total.us": []}}
+    record = next(SERVICE.hits([hit]))
+    assert (record.name, record.message, record.latency) == ("unknown", "no message", 0)
+
+
+def test_flat_sources_keep_dotted_keys():
+    record = next(FLAT.hits([{"_source": {"host.name": "web-1", "kibana.alert.reason": "down"}}]))
+    assert (record.host, record.reason) == ("web-1", "down")
+
+
+def test_shape_requests_only_projected_paths():
+    query = SERVICE.shape({})
+    assert query["_source"] == ["monitor.name", "monitor.status", "error.exception.message"]
+    assert query["docvalue_fields"] == ["http.rtt.total.us"]
@@ -0,0 +1,32 @@
+from reportcache import ReportCache, mask_identifiers
+
+
+def key(inputs):
+    return ReportCache.key("openai", "gpt", "context", "prompt", inputs)
+
+
+def test_timestamps_and_ids_do_not_change_the_key():
+    first = "2024-05-01T10:00:00.123Z request_id=ab12 host web-1 0x7f3a latency 1200 ms"
+    second = "2024-05-02T11:30:05.999Z request_id=cd34 host web-1 0x1b2c latency 1200 ms"
+    assert key(first) == key(second)
+    assert key("trace 3f2a1b0c9d8e7f60 at 12:00:01 failed") == key("trace 0a9b8c7d6e5f4a3b at 13:15:42 failed")
+    assert key("job 550e8400-e29b-41d4-a716-446655440000 epoch 1714557600") == key("job 123e4567-e89b-12d3-a456-426614174000 epoch 1714644000")
+
+
+def test_measured_values_change_the_key():
+    assert key("latency 1200 ms on web-1") != key("latency 90 ms on web-1")
+    assert key("cpu 99.5% on web-1") != key("cpu 12.0% on web-1")
+    assert key("3 errors in 5 minutes") != key("300 errors in 5 minutes")
+
+
+def test_labelled_ids_keep_their_label():
+    assert mask_identifiers("pid=4242 user_id: 17 done") == "pid=# user_id: # done"
+
+
+def test_reports_expire_after_the_ttl(tmp_path):
+    cache = ReportCache(str(tmp_path / "reports.db"), ttl=60)
+    cache.put("k", "report")
+    assert cache.get("k") == "report"
+    cache.ttl = 0
+    assert cache.get("k") is None
+    cache.close()
@@ -0,0 +1,44 @@
+from settings import Settings
+from rules import Rule
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def msearch(self, url, searches):
+        return FakeResponse({"responses": self.responses})
+
+    @staticmethod
+    def decode(response):
+        return response.payload
+
+
+def make_rule(responses, messages):
+    rule = Rule(settings=Settings(save=False, verbose=False, hits_size=100), es_client=FakeClient(responses), cursor_store=object())
+    rule.log_message = messages.append
+    return rule
+
+
+def test_missing_msearch_responses_map_to_none_and_are_logged():
+    messages = []
+    rule = make_rule([{"hits": {"hits": [{"_source": {}}]}}], messages)
+    windows = {"r1": (0, 1), "r2": (0, 1)}
+    alerts = rule._fetch_alerts_batch(["r1", "r2"], windows)
+    assert alerts["r1"] == [{"_source": {}}]
+    assert alerts["r2"] is None
+    assert any("Expected 2 alert responses, got 1" in message for message in messages)
+
+
+def test_errored_msearch_response_maps_to_none():
+    messages = []
+    rule = make_rule([{"error": "boom"}], messages)
+    assert rule._fetch_alerts_batch(["r1"], {"r1": (0, 1)}) == {"r1": None}
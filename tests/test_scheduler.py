@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from main import parse_list_remove_blanks, parse_schedules
+from scheduler import AISchedule, CronExpression
+
+
+def test_daily_shorthand_and_cron_fields():
+    assert CronExpression("07:30").next_after(datetime(2024, 5, 1, 8, 0)) == datetime(2024, 5, 2, 7, 30)
+    # 2024-05-04 is a Saturday; the next weekday run is Monday
+    weekdays = CronExpression("30 9 * * 1-5")
+    assert weekdays.next_after(datetime(2024, 5, 4, 10, 0)) == datetime(2024, 5, 6, 9, 30)
+    every_six_hours = CronExpression("0 */6 * * *")
+    assert every_six_hours.next_after(datetime(2024, 5, 1, 6, 1)) == datetime(2024, 5, 1, 12, 0)
+
+
+def test_sunday_may_be_written_as_seven():
+    assert CronExpression("0 0 * * 7").weekdays == {0}
+    assert CronExpression("0 0 * * 5-7").weekdays == {5, 6, 0}
+
+
+@pytest.mark.parametrize("expression", ["0 0 * * 8", "0 0 * * 9", "60 0 * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "0 0 * *", "ab:cd", "x * * * *"])
+def test_out_of_range_fields_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_impossible_dates_fail_instead_of_spinning():
+    with pytest.raises(ValueError):
+        CronExpression("0 0 31 2 *").next_after(datetime(2024, 1, 1))
+
+
+def test_only_schedules_split_on_semicolons():
+    assert parse_schedules("0 */6 * * *;30 9 * * 1-5") == ["0 */6 * * *", "30 9 * * 1-5"]
+    assert parse_schedules("00:00,12:00") == ["00:00", "12:00"]
+    assert parse_list_remove_blanks("a@x.io;b@x.io,c@x.io,") == ["a@x.io;b@x.io", "c@x.io"]
+
+
+def test_due_runs_are_claimed_once_and_missed_windows_skipped(tmp_path):
+    path = str(tmp_path / "last_run.json")
+    logged = []
+    schedule = AISchedule(["12:00"], window=600, path=path, log=logged.append)
+    noon = schedule.next_run
+    assert schedule.due(noon - timedelta(minutes=1)) == []
+    assert schedule.due(noon + timedelta(minutes=5)) == ["12:00"]
+    assert schedule.due(noon + timedelta(minutes=6)) == []
+    schedule.complete(["12:00"], finished_at=noon + timedelta(minutes=7))
+    assert schedule.next_run == noon + timedelta(days=1)
+
+    # Restarted inside the same window, the completed run is not repeated
+    assert AISchedule(["12:00"], window=600, path=path).next_run == noon + timedelta(days=1)
+
+    assert schedule.due(noon + timedelta(days=1, hours=1)) == []
+    assert logged and "missed its window" in logged[0]
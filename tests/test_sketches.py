@@ -0,0 +1,64 @@
+import pytest
+
+from sketches import DDSketch, LatencySketches
+
+
+def test_quantiles_stay_within_the_relative_accuracy():
+    sketch = DDSketch(relative_accuracy=0.01)
+    values = range(1, 10001)
+    for value in values:
+        sketch.add(value)
+    for q, exact in ((0.5, 5000), (0.95, 9500), (0.99, 9900)):
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert DDSketch().quantile(0.5) is None
+
+
+def test_merged_sketches_match_one_sketch_of_all_values():
+    left, right, whole = DDSketch(), DDSketch(), DDSketch()
+    for value in range(1, 501):
+        (left if value % 2 else right).add(value)
+        whole.add(value)
+    merged = left.merge(right)
+    assert merged.count == whole.count == 500
+    assert [merged.quantile(q) for q in (0.5, 0.9, 0.99)] == [whole.quantile(q) for q in (0.5, 0.9, 0.99)]
+
+
+def test_zero_values_and_collapsed_bins_are_counted():
+    sketch = DDSketch(max_bins=8)
+    sketch.add(0)
+    for value in range(1, 1000):
+        sketch.add(value)
+    assert len(sketch.bins) <= 8 and sketch.count == 1000
+    assert sketch.quantile(0) == 0.0
+    assert sketch.quantile(1) == pytest.approx(999, rel=0.011)
+
+
+def test_windows_only_merge_buckets_still_inside_them(tmp_path):
+    sketches = LatencySketches(str(tmp_path / "sketches.json"))
+    now = 100000
+    sketches.add("https://a", {"http": 1000.0}, now - 7200)
+    sketches.add("https://a", {"http": 1000.0}, now - 7100)
+    sketches.add("https://a", {"http": 10.0, "tcp": 1.0}, now - 30)
+    windows = sketches.percentiles("https://a", now)
+    assert windows["http"]["5m"][0.5] == pytest.approx(10, rel=0.011)
+    assert windows["http"]["24h"][0.5] == pytest.approx(1000, rel=0.011)
+    assert "1h" in windows["tcp"] and windows["http"]["1h"][0.99] == pytest.approx(10, rel=0.011)
+    assert sketches.format("https://a", now).startswith("HTTP p50/p95/p99 ms: 5m 10/10/10")
+
+
+def test_state_survives_a_save_and_reload(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    sketches = LatencySketches(path)
+    for value in range(1, 101):
+        sketches.add("https://a", {"http": float(value)})
+    sketches.save()
+    reloaded = LatencySketches(path)
+    assert reloaded.percentiles("https://a") == sketches.percentiles("https://a")
+
+
+def test_the_least_recently_seen_url_makes_room():
+    sketches = LatencySketches("unused.json", max_urls=2)
+    sketches.add("a", {"http": 1.0}, 1000)
+    sketches.add("b", {"http": 1.0}, 2000)
+    sketches.add("c", {"http": 1.0}, 3000)
+    assert set(sketches._sketches) == {"b", "c"}
@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from trends import ResourceTrends
+
+
+def feed(trends, hosts, start, count, step=60):
+    """Add count samples per host; hosts maps a name to a function of the sample index."""
+    for index in range(count):
+        names = list(hosts)
+        trends.add(names, [start + index * step] * len(names), [hosts[name](index) for name in names])
+
+
+def test_a_rising_resource_is_projected_to_its_threshold():
+    trends = ResourceTrends(window=30, min_samples=5)
+    now = 10000
+    # Disk grows 1% a minute from 50%; memory is flat; CPU is not reported
+    feed(trends, {"web-1": lambda i: (math.nan, 40.0, 50.0 + i)}, now - 9 * 60, 10)
+    [(host, resource, current, rate, eta)] = trends.forecast([99, 90, 90], 3600, now)
+    assert (host, resource, current) == ("web-1", "disk", 59.0)
+    assert rate == pytest.approx(60.0)
+    assert eta == pytest.approx(31 * 60)
+
+
+def test_no_forecast_beyond_the_horizon_or_before_min_samples():
+    trends = ResourceTrends(window=30, min_samples=5)
+    feed(trends, {"web-1": lambda i: (10.0 + i, 40.0, 50.0)}, 0, 4)
+    assert trends.forecast([99, 90, 90], 86400, 180) == []
+    feed(trends, {"web-1": lambda i: (14.0 + i, 40.0, 50.0)}, 240, 2)
+    assert trends.forecast([99, 90, 90], 60, 300) == []
+    assert [warning[1] for warning in trends.forecast([99, 90, 90], 86400, 300)] == ["cpu"]
+
+
+def test_stale_samples_and_silent_hosts_are_ignored():
+    trends = ResourceTrends(window=30, min_samples=3)
+    feed(trends, {"a": lambda i: (10.0 * i, 0.0, 0.0), "b": lambda i: (10.0 * i, 0.0, 0.0)}, 0, 5)
+    # A repeated timestamp is not a new sample, and only hosts seen this cycle are forecast
+    trends.add(["a"], [240], [(99.0, 0.0, 0.0)])
+    warnings = trends.forecast([95, 90, 90], 3600, 240)
+    assert [(host, current) for host, _, current, _, _ in warnings] == [("a", 40.0)]
+
+
+def test_hosts_beyond_capacity_reuse_the_least_recently_seen_row():
+    trends = ResourceTrends(window=5, max_hosts=2)
+    trends.add(["a", "b"], [1, 1], [(1, 1, 1), (1, 1, 1)])
+    trends.add(["b"], [2], [(1, 1, 1)])
+    trends.add(["c"], [3], [(1, 1, 1)])
+    assert len(trends) == 2 and set(trends._rows) == {"b", "c"}
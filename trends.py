@@ -0,0 +1,125 @@
+import numpy as np
+
+RESOURCES = ("cpu", "memory", "disk")
+
+
+class ResourceTrends:
+    """
+    Per-host resource usage trends.
+
+    Each host owns one fixed-size ring buffer row of recent CPU, memory and disk
+    percentages. Every cycle a least-squares line is fitted to all hosts and resources
+    at once, and extrapolated to the time each resource reaches its threshold.
+    """
+
+    def __init__(self, window=30, min_samples=5, max_hosts=5000):
+        """
+        :param window: Samples kept per host.
+        :param min_samples: Samples a resource needs before it is forecast.
+        :param max_hosts: Hosts tracked; beyond it the least recently seen host's row is reused.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.max_hosts = max_hosts
+        self._rows = {}
+        self._hosts = []
+        self._tick = 0
+        self._allocate(min(64, max_hosts))
+
+    def _allocate(self, capacity):
+        old = len(self._hosts)
+        times = np.full((capacity, self.window), np.nan)
+        values = np.full((capacity, self.window, len(RESOURCES)), np.nan)
+        cursor = np.zeros(capacity, dtype=np.int64)
+        last_seen = np.zeros(capacity, dtype=np.int64)
+        if old:
+            times[:old], values[:old], cursor[:old], last_seen[:old] = self._times, self._values, self._cursor, self._last_seen
+        self._times, self._values, self._cursor, self._last_seen = times, values, cursor, last_seen
+
+    def _row(self, host):
+        row = self._rows.get(host)
+        if row is None:
+            row = self._claim(host)
+        # Marked as soon as it is looked up, so a row used earlier in this cycle is never evicted
+        self._last_seen[row] = self._tick
+        return row
+
+    def _claim(self, host):
+        if len(self._hosts) < len(self._times):
+            row = len(self._hosts)
+            self._hosts.append(host)
+        elif len(self._times) < self.max_hosts:
+            self._allocate(min(len(self._times) * 2, self.max_hosts))
+            row = len(self._hosts)
+            self._hosts.append(host)
+        else:
+            row = int(np.argmin(self._last_seen))
+            del self._rows[self._hosts[row]]
+            self._hosts[row] = host
+            self._times[row] = np.nan
+            self._values[row] = np.nan
+            self._cursor[row] = 0
+        self._rows[host] = row
+        return row
+
+    def add(self, hosts, times, values):
+        """
+        Append one sample per host.
+
+        :param hosts: Host names; a host should appear once per call.
+        :param times: Epoch seconds of each sample.
+        :param values: Array-like of shape (len(hosts), 3) holding CPU, memory and disk
+            percentages; NaN where a resource was not reported.
+        """
+        if not len(hosts):
+            return
+        self._tick += 1
+        rows = np.fromiter((self._row(host) for host in hosts), dtype=np.int64, count=len(hosts))
+        times = np.asarray(times, dtype=float)
+        # A sample no newer than the host's latest one was already seen
+        latest = np.where(np.isnan(self._times[rows]), -np.inf, self._times[rows]).max(axis=1)
+        fresh = times > latest
+        rows = rows[fresh]
+        self._times[rows, self._cursor[rows]] = times[fresh]
+        self._values[rows, self._cursor[rows]] = np.asarray(values, dtype=float).reshape(len(hosts), len(RESOURCES))[fresh]
+        self._cursor[rows] = (self._cursor[rows] + 1) % self.window
+
+    def forecast(self, thresholds, horizon, now):
+        """
+        Find the resources projected to reach their threshold within the horizon.
+
+        :param thresholds: Threshold percentage of each resource, in RESOURCES order.
+        :param horizon: Seconds ahead to look.
+        :param now: Epoch seconds the projection starts from.
+        :return: List of (host, resource, current, slope per hour, seconds to threshold).
+        """
+        # Only hosts that reported this cycle; a silent host is the downtime check's concern
+        rows = np.flatnonzero(self._last_seen[:len(self._hosts)] == self._tick)
+        if not len(rows):
+            return []
+        thresholds = np.asarray(thresholds, dtype=float)
+        # Times are centred on now, so the fitted intercept is the current level
+        times = self._times[rows][:, :, None] - now
+        values = self._values[rows]
+        mask = ~(np.isnan(times) | np.isnan(values))
+        t = np.where(mask, times, 0.0)
+        y = np.where(mask, values, 0.0)
+        n = mask.sum(axis=1)
+        st, sy = t.sum(axis=1), y.sum(axis=1)
+        stt, sty = (t * t).sum(axis=1), (t * y).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (n * sty - st * sy) / (n * stt - st * st)
+            level = (sy - slope * st) / n
+            eta = np.maximum((thresholds - level) / slope, 0.0)
+        latest = values[np.arange(len(rows)), (self._cursor[rows] - 1) % self.window]
+        # Only rising resources that have not yet crossed; the CPU check and the memory and disk
+        # threshold alerts report hosts already over
+        warn = (n >= self.min_samples) & (slope > 0) & (latest < thresholds) & (eta <= horizon)
+
+        return [
+            (self._hosts[rows[index]], RESOURCES[resource], float(latest[index, resource]), float(slope[index, resource] * 3600), float(eta[index, resource]))
+            for index, resource in zip(*np.nonzero(warn))
+        ]
+
+    def __len__(self):
+        return len(self._rows)